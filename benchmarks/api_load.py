@@ -0,0 +1,362 @@
+"""Throughput and latency of the REST API under a realistic request mix.
+
+Seeds managers, employees, tasks and comments into the database of
+``SKILL_TRACKER_CONFIG_PATH`` (the local test Postgres with
+``configs/app_test.toml``), then replays a weighted mix of list tasks, get
+task, post comment and update progress from ``--concurrency`` clients, each
+request signed as a user allowed to make it. ``--transport asgi`` drives the
+app in process through httpx's ``ASGITransport``, which leaves out the
+socket, HTTP parsing and the server loop; ``--transport uvicorn`` starts a
+real server with ``--workers`` processes and talks to it over TCP. Queries
+per request are read from the app's own ``skill_tracker_db_queries_per_request``
+histogram; with several workers the scrape reaches one of them, so it is a
+sample. The report is JSON with the commit it ran on, so runs can be diffed
+across commits. Seeded rows are removed afterwards unless ``--keep``.
+
+    SKILL_TRACKER_CONFIG_PATH=configs/app_test.toml uv run python -m benchmarks.api_load \\
+        [--transport asgi|uvicorn] [--mix default|read_only] [--requests 5000] [--concurrency 50] [--output report.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager, redirect_stdout
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Optional
+from uuid import UUID, uuid4
+
+import httpx
+from dishka import AsyncContainer
+from fastapi_users.authentication import JWTStrategy
+from fastapi_users.password import PasswordHelper
+from loguru import logger
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from skill_tracker.db_access.models import Base, Comment, Task, TaskStatusEnum, User, UserRoleEnum
+from skill_tracker.di import setup_di
+
+SEED_EMAIL_DOMAIN = "bench.example.com"
+INSERT_BATCH_SIZE = 1000
+QUERIES_PER_REQUEST_METRIC = "skill_tracker_db_queries_per_request"
+
+MIXES = {
+    "default": {"list_tasks": 0.4, "get_task": 0.3, "post_comment": 0.15, "update_progress": 0.15},
+    "read_only": {"list_tasks": 0.5, "get_task": 0.5},
+}
+# the (method, route template) each operation is recorded under in the app's metrics
+OPERATION_ROUTES = {
+    "list_tasks": ("GET", "/api/v1/tasks/"),
+    "get_task": ("GET", "/api/v1/tasks/{task_id}"),
+    "post_comment": ("POST", "/api/v1/comments/"),
+    "update_progress": ("PUT", "/api/v1/tasks/{task_id}"),
+}
+
+
+@dataclass
+class SeededTask:
+    id: UUID
+    manager_id: UUID
+    employee_id: UUID
+
+
+@dataclass
+class Seed:
+    manager_ids: list[UUID]
+    employee_ids: list[UUID]
+    tasks: list[SeededTask]
+    comments: int
+
+
+@dataclass
+class Sample:
+    operation: str
+    seconds: float
+    ok: bool
+
+
+async def insert_batched(engine: AsyncEngine, model, rows: list[dict]) -> None:
+    async with engine.begin() as conn:
+        for offset in range(0, len(rows), INSERT_BATCH_SIZE):
+            await conn.execute(insert(model), rows[offset:offset + INSERT_BATCH_SIZE])
+
+
+async def remove_seed(engine: AsyncEngine) -> None:
+    seeded_users = select(User.id).where(User.email.like(f"%@{SEED_EMAIL_DOMAIN}"))
+    async with engine.begin() as conn:
+        # comments go with their tasks; tasks have to go before the users they point at
+        await conn.execute(delete(Task).where(Task.manager_id.in_(seeded_users)))
+        await conn.execute(delete(User).where(User.email.like(f"%@{SEED_EMAIL_DOMAIN}")))
+
+
+async def seed(engine: AsyncEngine, args: argparse.Namespace, rng: random.Random) -> Seed:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await remove_seed(engine)
+
+    hashed_password = PasswordHelper().hash("bench")
+    users = []
+    for role, count in ((UserRoleEnum.manager, args.managers), (UserRoleEnum.employee, args.employees)):
+        users += [
+            {
+                "id": uuid4(),
+                "email": f"{role.value}-{i}@{SEED_EMAIL_DOMAIN}",
+                "hashed_password": hashed_password,
+                "given_name": role.value.title(),
+                "family_name": str(i),
+                "role": role,
+                "is_active": True,
+                "is_superuser": False,
+                "is_verified": True,
+            }
+            for i in range(count)
+        ]
+    manager_ids = [user["id"] for user in users[:args.managers]]
+    employee_ids = [user["id"] for user in users[args.managers:]]
+
+    now = datetime.now(timezone.utc)
+    tasks = []
+    for i in range(args.tasks):
+        tasks.append({
+            "id": uuid4(),
+            "manager_id": rng.choice(manager_ids),
+            "employee_id": rng.choice(employee_ids),
+            "title": f"Task {i}",
+            "description": f"Seeded task {i} for the load benchmark",
+            "status": rng.choice(list(TaskStatusEnum)),
+            "progress": rng.randrange(0, 101),
+            "deadline": now + timedelta(days=rng.randrange(1, 60)) if rng.random() < 0.8 else None,
+            "created_at": now - timedelta(minutes=rng.randrange(0, 90 * 24 * 60)),
+        })
+    comments = [
+        {
+            "id": uuid4(),
+            "task_id": task["id"],
+            "user_id": rng.choice((task["manager_id"], task["employee_id"])),
+            "text": f"Seeded comment {i}",
+            "created_at": task["created_at"] + timedelta(minutes=rng.randrange(1, 10000)),
+        }
+        for i, task in enumerate(rng.choice(tasks) for _ in range(args.comments))
+    ] if tasks else []
+
+    started = time.perf_counter()
+    await insert_batched(engine, User, users)
+    await insert_batched(engine, Task, tasks)
+    await insert_batched(engine, Comment, comments)
+    print(f"Seeded {len(users)} users, {len(tasks)} tasks, {len(comments)} comments in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    return Seed(
+        manager_ids=manager_ids,
+        employee_ids=employee_ids,
+        tasks=[SeededTask(task["id"], task["manager_id"], task["employee_id"]) for task in tasks],
+        comments=len(comments),
+    )
+
+
+def plan(seed_: Seed, mix: dict[str, float], count: int, rng: random.Random) -> list[tuple[str, str, str, UUID, Optional[dict]]]:
+    """(operation, method, url, acting user, body) for every request, drawn up front so the run is repeatable."""
+    requests = []
+    for operation in rng.choices(list(mix), weights=list(mix.values()), k=count):
+        task = rng.choice(seed_.tasks)
+        if operation == "list_tasks":
+            user_id = rng.choice(seed_.manager_ids) if rng.random() < 0.5 else rng.choice(seed_.employee_ids)
+            requests.append((operation, "GET", "/api/v1/tasks/?limit=20", user_id, None))
+        elif operation == "get_task":
+            requests.append((operation, "GET", f"/api/v1/tasks/{task.id}", task.manager_id, None))
+        elif operation == "post_comment":
+            requests.append((operation, "POST", "/api/v1/comments/", task.employee_id, {"text": "Load test comment", "task_id": str(task.id)}))
+        else:
+            requests.append((operation, "PUT", f"/api/v1/tasks/{task.id}", task.employee_id, {"progress": rng.randrange(0, 101)}))
+    return requests
+
+
+async def issue_tokens(container: AsyncContainer, seed_: Seed) -> dict[UUID, dict[str, str]]:
+    strategy = await container.get(JWTStrategy[User, UUID])
+    headers = {}
+    for user_id in seed_.manager_ids + seed_.employee_ids:
+        # write_token only reads the id
+        token = await strategy.write_token(User(id=user_id))
+        headers[user_id] = {"Authorization": f"Bearer {token}"}
+    return headers
+
+
+async def queries_per_route(client: httpx.AsyncClient) -> dict[tuple[str, str], tuple[float, float]]:
+    response = await client.get("/api/v1/metrics")
+    response.raise_for_status()
+    totals = {}
+    for family in text_string_to_metric_families(response.text):
+        if family.name != QUERIES_PER_REQUEST_METRIC:
+            continue
+        for sample in family.samples:
+            key = sample.labels["method"], sample.labels["route"]
+            queries, requests = totals.get(key, (0.0, 0.0))
+            if sample.name.endswith("_sum"):
+                queries = sample.value
+            elif sample.name.endswith("_count"):
+                requests = sample.value
+            totals[key] = queries, requests
+    return totals
+
+
+async def replay(client: httpx.AsyncClient, requests: list, headers: dict, concurrency: int) -> list[Sample]:
+    samples = []
+    pending = iter(requests)
+
+    async def worker() -> None:
+        for operation, method, url, user_id, body in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body, headers=headers[user_id])
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            samples.append(Sample(operation, time.perf_counter() - started, ok))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+def percentile(values: list[float], share: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=1000)[int(share * 1000) - 1]
+
+
+def summarize(samples: list[Sample]) -> dict:
+    seconds = [sample.seconds for sample in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(not sample.ok for sample in samples),
+        "p50_ms": round(percentile(seconds, 0.5) * 1000, 2),
+        "p95_ms": round(percentile(seconds, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(seconds, 0.99) * 1000, 2),
+    }
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@asynccontextmanager
+async def asgi_client(args: argparse.Namespace) -> AsyncIterator[httpx.AsyncClient]:
+    # imported here: the module builds its own container on import
+    from skill_tracker.main import app
+
+    # the app logs to stdout: keep the cost of formatting records, but not of printing them
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+                yield client
+        logger.remove()
+
+
+@asynccontextmanager
+async def uvicorn_client(args: argparse.Namespace) -> AsyncIterator[httpx.AsyncClient]:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "skill_tracker.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--no-access-log"],
+        stdout=subprocess.DEVNULL,
+    )
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if (await client.get("/api/v1/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not come up")
+                await asyncio.sleep(0.2)
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    container = setup_di()
+    engine = await container.get(AsyncEngine)
+    try:
+        seed_ = await seed(engine, args, rng)
+        headers = await issue_tokens(container, seed_)
+        warmup = plan(seed_, MIXES[args.mix], args.warmup, rng)
+        requests = plan(seed_, MIXES[args.mix], args.requests, rng)
+
+        transport = asgi_client if args.transport == "asgi" else uvicorn_client
+        async with transport(args) as client:
+            await replay(client, warmup, headers, args.concurrency)
+            queries_before = await queries_per_route(client)
+            started = time.perf_counter()
+            samples = await replay(client, requests, headers, args.concurrency)
+            elapsed = time.perf_counter() - started
+            queries_after = await queries_per_route(client)
+    finally:
+        if not args.keep:
+            await remove_seed(engine)
+        await container.close()
+
+    operations = {}
+    for operation in MIXES[args.mix]:
+        route = OPERATION_ROUTES[operation]
+        queries_after_run, served_after_run = queries_after.get(route, (0.0, 0.0))
+        queries_before_run, served_before_run = queries_before.get(route, (0.0, 0.0))
+        served = served_after_run - served_before_run
+        operations[operation] = {
+            **summarize([sample for sample in samples if sample.operation == operation]),
+            "queries_per_request": round((queries_after_run - queries_before_run) / served, 2) if served else None,
+        }
+
+    report = {
+        "commit": current_commit(),
+        "transport": args.transport,
+        "workers": args.workers if args.transport == "uvicorn" else None,
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "seed": {"managers": len(seed_.manager_ids), "employees": len(seed_.employee_ids), "tasks": len(seed_.tasks), "comments": seed_.comments},
+        "duration_s": round(elapsed, 2),
+        "requests_per_second": round(len(samples) / elapsed, 1),
+        **summarize(samples),
+        "operations": operations,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            report_file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transport", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--managers", type=int, default=10)
+    parser.add_argument("--employees", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the data and the request plan")
+    parser.add_argument("--keep", action="store_true", help="leave the seeded rows in the database")
+    parser.add_argument("--output", help="also write the report to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,73 @@
+"""Per-request cost of building the auth stack.
+
+Compares what every request used to allocate (UserManager with its own
+PasswordHelper, SQLAlchemyUserDatabase and a fresh FastAPIUsers) with what it
+allocates now (only UserManager and SQLAlchemyUserDatabase, sharing the
+app-scoped PasswordHelper). No database connection is opened.
+
+    uv run python -m benchmarks.auth_stack
+"""
+import json
+import time
+import tracemalloc
+import uuid
+
+from fastapi_users import FastAPIUsers
+from fastapi_users.authentication import AuthenticationBackend, BearerTransport, JWTStrategy
+from fastapi_users.db import SQLAlchemyUserDatabase
+from fastapi_users.password import PasswordHelper
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from skill_tracker.db_access.models import User
+from skill_tracker.services.user_cache import InMemoryUserCache
+from skill_tracker.services.user_service import UserManager
+
+ITERATIONS = 2000
+SECRET = "SECRET"
+
+
+def build_per_request_stack(session: AsyncSession, auth_backend: AuthenticationBackend) -> None:
+    user_manager = UserManager(SQLAlchemyUserDatabase[User, uuid.UUID](session, User), SECRET)
+    FastAPIUsers[User, uuid.UUID](lambda: user_manager, auth_backends=[auth_backend])
+
+
+def build_app_scoped_stack(session: AsyncSession, user_cache: InMemoryUserCache, password_helper: PasswordHelper) -> None:
+    UserManager(SQLAlchemyUserDatabase[User, uuid.UUID](session, User), SECRET, user_cache, password_helper)
+
+
+def measure(build, *args) -> dict:
+    build(*args)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    build(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        build(*args)
+    elapsed = time.perf_counter() - started
+
+    return {"us_per_request": round(elapsed / ITERATIONS * 1e6, 2), "peak_bytes_per_request": peak - before}
+
+
+def main() -> None:
+    session = AsyncSession()
+    strategy = JWTStrategy(secret=SECRET, lifetime_seconds=3600)
+    auth_backend = AuthenticationBackend(
+        name="jwt",
+        transport=BearerTransport(tokenUrl="/api/v1/auth/jwt/login"),
+        get_strategy=lambda: strategy,
+    )
+
+    report = {
+        "per_request_stack": measure(build_per_request_stack, session, auth_backend),
+        "app_scoped_stack": measure(build_app_scoped_stack, session, InMemoryUserCache(30, 100), PasswordHelper()),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Request latency with logging enabled: synchronous sink vs background writer vs sampling.
+
+Each simulated request logs like a service method does (four info lines
+around an awaited 1 ms "query"), with many requests in flight at once. The
+sink stands in for stdout read by a log shipper: each write call takes
+``--write-us`` and every ``--stall-every``-th call stalls for ``--stall-ms``
+while the reader falls behind. With a synchronous sink those waits happen on
+the event loop and every in-flight request pays for them. loguru's own
+``enqueue=True`` is measured for comparison: it moves the writes to a
+thread, but pickles every record and still writes them one by one. The
+``BackgroundSink`` that ``[logging] enqueue`` selects writes whatever has
+queued up in one call. Sampling cuts the number of lines on top of that. No
+database connection is opened.
+
+    uv run python -m benchmarks.logging_latency [--requests 5000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Optional
+
+from loguru import logger
+
+from skill_tracker.config import LoggingConfig
+from skill_tracker.log_config import format_json, setup_logging
+
+
+class SlowSink:
+    def __init__(self, write_seconds: float, stall_every: int, stall_seconds: float):
+        self.write_seconds = write_seconds
+        self.stall_every = stall_every
+        self.stall_seconds = stall_seconds
+        self.writes = 0
+        self.lines = 0
+
+    def write(self, message: str) -> None:
+        self.writes += 1
+        self.lines += message.count("\n")
+        time.sleep(self.stall_seconds if self.writes % self.stall_every == 0 else self.write_seconds)
+
+    def flush(self) -> None:
+        pass
+
+
+async def handle_request(request_id: int) -> None:
+    logger.info(f"User {request_id} fetching tasks (skip=0, limit=10)")
+    await asyncio.sleep(0.001)
+    logger.info(f"Retrieved 10 tasks, total: {request_id}")
+    logger.info(f"Comment stats for {request_id} computed")
+    logger.info(f"Request {request_id} done")
+
+
+async def run(requests: int, concurrency: int) -> list[float]:
+    latencies = []
+    pending = iter(range(requests))
+
+    async def worker() -> None:
+        for request_id in pending:
+            started = time.perf_counter()
+            await handle_request(request_id)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def percentile(values: list[float], share: float) -> float:
+    return statistics.quantiles(values, n=1000)[int(share * 1000) - 1]
+
+
+async def measure(cfg: Optional[LoggingConfig], requests: int, concurrency: int, sink: SlowSink) -> dict:
+    if cfg is None:
+        setup_logging(LoggingConfig(enqueue=False), sink)
+        logger.remove()
+        logger.add(sink, format=format_json, enqueue=True)
+    else:
+        setup_logging(cfg, sink)
+    started = time.perf_counter()
+    latencies = await run(requests, concurrency)
+    elapsed = time.perf_counter() - started
+    await logger.complete()
+    logger.remove()
+    return {
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "requests_per_second": round(requests / elapsed),
+        "lines_written": sink.lines,
+        "write_calls": sink.writes,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    scenarios = {
+        "sync": LoggingConfig(enqueue=False),
+        "loguru_enqueue": None,
+        "background": LoggingConfig(enqueue=True),
+        "background_info_sampled_10pct": LoggingConfig(enqueue=True, sample_rates={"INFO": 0.1}),
+    }
+    report = {}
+    for name, cfg in scenarios.items():
+        sink = SlowSink(args.write_us / 1e6, args.stall_every, args.stall_ms / 1000)
+        report[name] = await measure(cfg, args.requests, args.concurrency, sink)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--write-us", type=float, default=10)
+    parser.add_argument("--stall-every", type=int, default=1000)
+    parser.add_argument("--stall-ms", type=float, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -29,7 +29,7 @@ const EmployeeDashboardPage = () => {
                 }
                 
                 const data = await response.json();
-                const tasksData = Array.isArray(data) ? data[1] || [] : (data?.items || data || []);
+                const tasksData = data.items;
                 setTasks(tasksData);
             } catch (err) {
                 setError(err.message);
@@ -35,10 +35,10 @@ const ManagerDashboardPage = () => {
                 if (!employeesResponse.ok) throw new Error('Failed to fetch employees');
                 
                 const tasksDataRaw = await tasksResponse.json();
-                const tasksData = Array.isArray(tasksDataRaw) ? tasksDataRaw[1] || [] : (tasksDataRaw?.items || tasksDataRaw || []);
+                const tasksData = tasksDataRaw.items;
 
                 const employeesRaw = await employeesResponse.json();
-                const employeesList = Array.isArray(employeesRaw) && Array.isArray(employeesRaw[1]) ? employeesRaw[1] : employeesRaw;
+                const employeesList = employeesRaw.items;
                 const map = {};
                 for (const e of employeesList) {
                     const fullName = e.given_name ? `${e.given_name} ${e.family_name}` : e.email;
@@ -130,7 +130,7 @@ const TaskEditorPage = () => {
                 });
                 if (!response.ok) throw new Error('Failed to fetch users');
                 const data = await response.json();
-                const usersList = Array.isArray(data) && Array.isArray(data[1]) ? data[1] : data;
+                const usersList = data.items;
                 setUsers(usersList);
             } catch (err) {
                 setError(err.message);
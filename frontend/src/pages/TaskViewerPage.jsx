@@ -59,8 +59,7 @@ const TaskViewerPage = () => {
                 });
                 if (!res.ok) throw new Error('Failed to fetch comments');
                 const data = await res.json();
-                // backend returns [total, list] or list; handle both
-                const list = Array.isArray(data) && Array.isArray(data[1]) ? data[1] : data;
+                const list = data.items;
                 // sort by created_at ascending
                 list.sort((a,b)=> new Date(a.created_at)-new Date(b.created_at));
                 setComments(list);
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
 
 import toml
 
@@ -10,12 +11,23 @@ class DatabaseConfig:
     name: str
     host: str
     port: int
+    echo: bool = False
+    pool_size: int = 10
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    statement_timeout_ms: Optional[int] = None
+    # asyncpg server-side prepared statements; set both to 0 behind pgbouncer in transaction mode
+    statement_cache_size: int = 100
+    prepared_statement_cache_size: int = 100
 
     def __post_init__(self) -> None:
         self.uri = (
             f"postgresql+asyncpg://{self.user}:{self.password}@"
             f"{self.host}:{self.port}/{self.name}"
         )
+        self.dsn = f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
 
 
 @dataclass
@@ -23,10 +35,75 @@ class AuthConfig:
     secret: str
 
 
+@dataclass
+class UserCacheConfig:
+    backend: str = "memory"
+    # upper bound on how long a deactivated user stays authenticated on other workers
+    ttl_seconds: float = 30.0
+    max_size: int = 10000
+    redis_url: Optional[str] = None
+
+
+@dataclass
+class ReadCacheConfig:
+    # bounds how long a write made on another worker can go unnoticed by this one
+    ttl_seconds: float = 5.0
+    max_size: int = 10000
+    # with [db_replica], how long after a write reads of the written task bypass the cache; cover the replica's usual lag
+    replica_lag_seconds: float = 1.0
+
+
+@dataclass
+class EventsConfig:
+    # "memory" keeps events inside one worker; "postgres" fans them out with LISTEN/NOTIFY
+    backend: str = "memory"
+    channel: str = "skill_tracker_events"
+    queue_size: int = 100
+    keepalive_seconds: float = 15.0
+
+
+@dataclass
+class LoggingConfig:
+    level: str = "INFO"
+    # one JSON object per line for Promtail/Loki; false gives loguru's colored text for local runs
+    json: bool = True
+    # hand formatted lines to a writer thread so a slow stdout never blocks the event loop
+    enqueue: bool = True
+    # share of records kept per level, e.g. {INFO = 0.1}; levels not listed are always kept
+    sample_rates: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class ServerConfig:
+    host: str = "0.0.0.0"
+    port: int = 8000
+    # 0 starts one worker per CPU available to the process
+    workers: int = 0
+    # "auto" takes uvloop and httptools when they are installed, asyncio and h11 otherwise
+    loop: str = "auto"
+    http: str = "auto"
+    # keep above the idle timeout of the proxy in front, or it may reuse a connection the worker is closing
+    keep_alive_seconds: int = 75
+    backlog: int = 2048
+    # per worker; requests beyond it get a 503 instead of queueing
+    limit_concurrency: Optional[int] = None
+    # restart a worker after this many requests, to bound slow leaks
+    max_requests: Optional[int] = None
+    access_log: bool = False
+    # shared by the workers so /api/v1/metrics reports all of them; emptied on start
+    prometheus_multiproc_dir: str = "/tmp/skill_tracker_prometheus"
+
+
 @dataclass
 class Config:
     db: DatabaseConfig
     auth: AuthConfig
+    db_replica: Optional[DatabaseConfig] = None
+    user_cache: UserCacheConfig = field(default_factory=UserCacheConfig)
+    read_cache: ReadCacheConfig = field(default_factory=ReadCacheConfig)
+    events: EventsConfig = field(default_factory=EventsConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    server: ServerConfig = field(default_factory=ServerConfig)
 
 
 def load_config(config_path: str) -> Config:
@@ -34,5 +111,11 @@ def load_config(config_path: str) -> Config:
         data = toml.load(config_file)
     return Config(
         db=DatabaseConfig(**data["db"]),
-        auth=AuthConfig(**data["auth"])
+        auth=AuthConfig(**data["auth"]),
+        db_replica=DatabaseConfig(**data["db_replica"]) if "db_replica" in data else None,
+        user_cache=UserCacheConfig(**data.get("user_cache", {})),
+        read_cache=ReadCacheConfig(**data.get("read_cache", {})),
+        events=EventsConfig(**data.get("events", {})),
+        logging=LoggingConfig(**data.get("logging", {})),
+        server=ServerConfig(**data.get("server", {})),
     )
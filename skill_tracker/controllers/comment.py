@@ -4,12 +4,22 @@ from uuid import UUID
 
 from dishka import AsyncContainer, FromDishka
 from dishka.integrations.fastapi import DishkaRoute
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi_users import FastAPIUsers
 from pydantic import BaseModel, ConfigDict
 
+from skill_tracker.controllers.middleware import query_budget
 from skill_tracker.db_access.models import User
-from skill_tracker.services.comment_service import CommentCreateDTO, CommentService, CommentUpdateDTO
+from skill_tracker.services.comment_service import (
+    COMMENT_EXPORT_COLUMNS,
+    CommentCreateDTO,
+    CommentService,
+    CommentUpdateDTO,
+)
+from skill_tracker.services.export import EXPORT_MEDIA_TYPES, ExportFormatEnum, encode_export
+from skill_tracker.services.pagination import InvalidCursorError, TotalModeEnum
+from skill_tracker.services.read_cache import etag_matches
 
 
 class CommentCreate(BaseModel):
@@ -31,12 +41,18 @@ class CommentResponse(BaseModel):
     user_id: UUID
 
 
+class CommentListResponse(BaseModel):
+    total: Optional[int] = None
+    items: list[CommentResponse]
+    next_cursor: Optional[str] = None
+
+
 async def get_comments_controller(container: AsyncContainer) -> APIRouter:
     router = APIRouter(route_class=DishkaRoute, tags=["comments"], prefix="/api/v1")
     fastapi_users = await container.get(FastAPIUsers[User, UUID])
 
-
-    @router.post("/comments/", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
+    # query budgets include the user lookup on a cold user cache; the tests run these routes with budgets enforced
+    @router.post("/comments/", response_model=CommentResponse, status_code=status.HTTP_201_CREATED, openapi_extra=query_budget(3))
     async def create_comment(
             comment: CommentCreate,
             service: FromDishka[CommentService],
@@ -55,7 +71,24 @@ async def get_comments_controller(container: AsyncContainer) -> APIRouter:
 
         return db_comment
 
-    @router.get("/comments/{comment_id}", response_model=CommentResponse)
+    # declared before /comments/{comment_id} so "export" is not parsed as a comment id
+    @router.get("/comments/export")
+    async def export_comments(
+            service: FromDishka[CommentService],
+            export_format: ExportFormatEnum = Query(ExportFormatEnum.ndjson, alias="format"),
+            compress: bool = Query(False, alias="gzip"),
+            user: User = Depends(fastapi_users.current_user(active=True))
+    ):
+        headers = {"Content-Disposition": f'attachment; filename="comments.{export_format.value}"'}
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(
+            encode_export(service.export_comments(user), COMMENT_EXPORT_COLUMNS, export_format, compress),
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers=headers,
+        )
+
+    @router.get("/comments/{comment_id}", response_model=CommentResponse, openapi_extra=query_budget(2))
     async def get_comment(
             comment_id: UUID,
             service: FromDishka[CommentService],
@@ -68,19 +101,35 @@ async def get_comments_controller(container: AsyncContainer) -> APIRouter:
 
         return comment
 
-    @router.get("/comments/")
+    @router.get("/comments/", response_model=CommentListResponse, openapi_extra=query_budget(3))
     async def get_comments(
             service: FromDishka[CommentService],
+            response: Response,
             task_id: UUID | None = None,
             skip: int = 0,
             limit: int = 10,
+            cursor: str | None = None,
+            total_mode: TotalModeEnum = Query(TotalModeEnum.exact, alias="total"),
+            if_none_match: str | None = Header(None),
             user: User = Depends(fastapi_users.current_user(active=True))
     ):
-        res = await service.get_comments(skip=skip, limit=limit, task_id=task_id)
-        return res
+        page = {"skip": skip, "limit": limit, "task_id": task_id, "cursor": cursor, "total_mode": total_mode}
+        etag = service.comments_etag(**page)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        try:
+            total, comments, next_cursor = await service.get_comments(**page)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        etag = service.comments_etag(**page)
+        if etag:
+            response.headers["ETag"] = etag
+        return CommentListResponse(total=total, items=comments, next_cursor=next_cursor)
 
 
-    @router.put("/comment/{comment_id}", response_model=CommentResponse)
+    @router.put("/comment/{comment_id}", response_model=CommentResponse, openapi_extra=query_budget(2))
     async def update_comment(
             comment_id: UUID,
             comment_update: CommentUpdate,
@@ -99,7 +148,7 @@ async def get_comments_controller(container: AsyncContainer) -> APIRouter:
         return db_comment
 
 
-    @router.delete("/comment/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
+    @router.delete("/comment/{comment_id}", status_code=status.HTTP_204_NO_CONTENT, openapi_extra=query_budget(2))
     async def delete_comment(
             comment_id: UUID,
             service: FromDishka[CommentService],
@@ -0,0 +1,87 @@
+from typing import Optional
+
+from loguru import logger
+from prometheus_client import Counter, Histogram
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from skill_tracker.db_access.instrumentation import QueryCounter, current_query_counter
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "skill_tracker_db_queries_per_request",
+    "SQL statements run while handling one request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55, 89),
+)
+QUERY_BUDGET_EXCEEDED = Counter(
+    "skill_tracker_query_budget_exceeded_total",
+    "Requests that ran more SQL statements than their route's query budget",
+    ["method", "route"],
+)
+
+QUERY_BUDGET_KEY = "x-query-budget"
+
+
+class QueryBudgetExceededError(Exception):
+    def __init__(self, method: str, route: str, count: int, budget: int, summary: str):
+        super().__init__(f"{method} {route} ran {count} SQL statements, its budget is {budget}:\n{summary}")
+        self.count = count
+        self.budget = budget
+
+
+def query_budget(limit: int) -> dict:
+    """``openapi_extra`` declaring the most SQL statements one request to a route may run, authentication included.
+
+    Kept on the route rather than the endpoint, which dishka replaces with a wrapper,
+    and published in the OpenAPI schema next to the operation.
+    """
+    return {QUERY_BUDGET_KEY: limit}
+
+
+def route_template(scope: Scope) -> str:
+    # the template, not the concrete path, so task ids don't become label values
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+def route_query_budget(scope: Scope) -> Optional[int]:
+    extra = getattr(scope.get("route"), "openapi_extra", None) or {}
+    return extra.get(QUERY_BUDGET_KEY)
+
+
+class QueryMetricsMiddleware:
+    """Counts the SQL statements each HTTP request runs, per route.
+
+    Plain ASGI rather than ``BaseHTTPMiddleware``, so streaming responses are
+    not buffered and the counter set here is the one the database hooks see.
+    A request over its route's ``query_budget`` is counted and logged; with
+    ``strict`` it also raises once the response is sent, which is how the
+    tests turn a new round trip on a hot path into a failure.
+    """
+
+    def __init__(self, app: ASGIApp, strict: bool = False):
+        self.app = app
+        self.strict = strict
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = QueryCounter()
+        token = current_query_counter.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_query_counter.reset(token)
+            DB_QUERIES_PER_REQUEST.labels(scope["method"], route_template(scope)).observe(counter.count)
+
+        budget = route_query_budget(scope)
+        if budget is not None and counter.count > budget:
+            self._over_budget(scope, counter, budget)
+
+    def _over_budget(self, scope: Scope, counter: QueryCounter, budget: int) -> None:
+        method, route = scope["method"], route_template(scope)
+        QUERY_BUDGET_EXCEEDED.labels(method, route).inc()
+        logger.warning(f"{method} {route} ran {counter.count} SQL statements, over its budget of {budget}")
+        if self.strict:
+            raise QueryBudgetExceededError(method, route, counter.count, budget, counter.summary())
@@ -0,0 +1,27 @@
+from importlib.util import find_spec
+from typing import Union
+
+from fastapi import __version__ as FASTAPI_VERSION
+from fastapi.datastructures import Default, DefaultPlaceholder
+from fastapi.responses import JSONResponse, Response
+
+# first release that has pydantic write a route's response model straight to JSON bytes
+PYDANTIC_JSON_FASTAPI_VERSION = (0, 130)
+
+
+def default_response_class() -> Union[type[Response], DefaultPlaceholder]:
+    """The JSON response class the app is built with.
+
+    From FastAPI 0.130 pydantic writes a route's response model straight to JSON
+    bytes, but only while the default class is left in place; an explicit class,
+    orjson's included, sends them back through an intermediate dict. Earlier
+    releases, the one in uv.lock among them, always build the dict and
+    ``json.dumps`` it, and there orjson makes the last step several times faster.
+    """
+    version = tuple(int(part) for part in FASTAPI_VERSION.split(".")[:2])
+    if version >= PYDANTIC_JSON_FASTAPI_VERSION or find_spec("orjson") is None:
+        return Default(JSONResponse)
+
+    from fastapi.responses import ORJSONResponse
+
+    return ORJSONResponse
@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from dishka import AsyncContainer, FromDishka
+from dishka.integrations.fastapi import DishkaRoute
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi_users import FastAPIUsers
+from pydantic import BaseModel, ConfigDict
+
+from skill_tracker.db_access.models import User
+from skill_tracker.services.pagination import InvalidCursorError
+from skill_tracker.services.search_service import SearchHitKindEnum, SearchService
+
+
+class SearchHitResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    kind: SearchHitKindEnum
+    id: UUID
+    task_id: UUID
+    title: str
+    headline: str
+    rank: float
+    created_at: datetime
+
+
+class SearchResponse(BaseModel):
+    items: list[SearchHitResponse]
+    next_cursor: Optional[str] = None
+
+
+async def get_search_controller(container: AsyncContainer) -> APIRouter:
+    router = APIRouter(route_class=DishkaRoute, tags=["search"], prefix="/api/v1")
+    fastapi_users = await container.get(FastAPIUsers[User, UUID])
+
+    @router.get("/search", response_model=SearchResponse)
+    async def search(
+            service: FromDishka[SearchService],
+            q: str = Query(min_length=1, max_length=200),
+            limit: int = Query(10, ge=1, le=100),
+            cursor: str | None = None,
+            user: User = Depends(fastapi_users.current_user(active=True))
+    ):
+        try:
+            hits, next_cursor = await service.search(user, q, limit=limit, cursor=cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        return SearchResponse(items=hits, next_cursor=next_cursor)
+
+    return router
@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from dishka import AsyncContainer, FromDishka
+from dishka.integrations.fastapi import DishkaRoute
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi_users import FastAPIUsers
+from pydantic import BaseModel, ConfigDict
+
+from skill_tracker.db_access.models import User
+from skill_tracker.services.stats_service import OnlyManagerCanGetStatsError, StatsService
+
+
+class TeamMemberStatsResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    employee_id: UUID
+    given_name: str
+    family_name: str
+    total: int
+    pending: int
+    inprogress: int
+    done: int
+    average_progress: float
+    overdue: int
+
+
+async def get_stats_controller(container: AsyncContainer) -> APIRouter:
+    router = APIRouter(route_class=DishkaRoute, tags=["stats"], prefix="/api/v1")
+    fastapi_users = await container.get(FastAPIUsers[User, UUID])
+
+    @router.get("/stats/team", response_model=list[TeamMemberStatsResponse])
+    async def get_team_stats(
+            service: FromDishka[StatsService],
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+            user: User = Depends(fastapi_users.current_user(active=True))
+    ):
+        try:
+            stats = await service.get_team_stats(user, created_from=created_from, created_to=created_to)
+        except OnlyManagerCanGetStatsError as e:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+        return stats
+
+    return router
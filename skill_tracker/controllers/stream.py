@@ -0,0 +1,49 @@
+import asyncio
+from collections.abc import AsyncIterator
+from uuid import UUID
+
+from dishka import AsyncContainer, FromDishka
+from dishka.integrations.fastapi import DishkaRoute
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from fastapi_users import FastAPIUsers
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from skill_tracker.config import Config
+from skill_tracker.db_access.models import User
+from skill_tracker.services.events import EventBroker, encode_event
+
+
+async def event_stream(broker: EventBroker, user_id: UUID, keepalive_seconds: float) -> AsyncIterator[str]:
+    with broker.subscribe(user_id) as queue:
+        yield ": connected\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), keepalive_seconds)
+            except asyncio.TimeoutError:
+                # comment lines keep proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event.type.value}\ndata: {encode_event(event)}\n\n"
+
+
+async def get_stream_controller(container: AsyncContainer) -> APIRouter:
+    router = APIRouter(route_class=DishkaRoute, tags=["stream"], prefix="/api/v1")
+    fastapi_users = await container.get(FastAPIUsers[User, UUID])
+    broker = await container.get(EventBroker)
+    cfg = await container.get(Config)
+
+    @router.get("/stream")
+    async def stream(
+            session: FromDishka[AsyncSession],
+            user: User = Depends(fastapi_users.current_user(active=True))
+    ):
+        # the stream outlives this handler; give the connection used for auth back to the pool now
+        await session.close()
+        return StreamingResponse(
+            event_stream(broker, user.id, cfg.events.keepalive_seconds),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return router
@@ -4,18 +4,32 @@ from uuid import UUID
 
 from dishka import AsyncContainer, FromDishka
 from dishka.integrations.fastapi import DishkaRoute
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi_users import FastAPIUsers
 from pydantic import BaseModel, ConfigDict, Field, FutureDatetime
 
-from skill_tracker.db_access.models import TaskStatusEnum, User
+from skill_tracker.controllers.middleware import query_budget
+from skill_tracker.db_access.models import TaskStatusEnum, User, UserRoleEnum
+from skill_tracker.services.export import EXPORT_MEDIA_TYPES, ExportFormatEnum, encode_export
+from skill_tracker.services.pagination import InvalidCursorError, TotalModeEnum
+from skill_tracker.services.read_cache import etag_matches
 from skill_tracker.services.task_service import (
+    DEFAULT_EXPANDED_COMMENTS,
+    TASK_EXPORT_COLUMNS,
+    InvalidTaskFilterError,
     OnlyEmployeeCanBeAttachedToTask,
     OnlyManagerCanCreateTaskError,
     OnlyManagerCanDeleteTaskError,
     OnlyManagerCanUpdateTaskError,
+    SortOrderEnum,
     TaskCreateDTO,
+    TaskDTO,
+    TaskExpandEnum,
+    TaskFilterDTO,
+    TaskIncludeEnum,
     TaskService,
+    TaskSortEnum,
     TaskUpdateDTO,
 )
 
@@ -47,18 +61,79 @@ class TaskResponse(TaskBase):
     manager_id: UUID
     employee_id: UUID
     created_at: datetime
-    deadline: datetime
+    deadline: Optional[datetime] = None
     status: TaskStatusEnum
     progress: int
 
 
+class TaskUserResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    email: str
+    given_name: str
+    family_name: str
+    role: UserRoleEnum
+
+
+class TaskCommentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    text: str
+    created_at: datetime
+    user_id: UUID
+
+
+class TaskDetailResponse(TaskResponse):
+    employee: Optional[TaskUserResponse] = None
+    manager: Optional[TaskUserResponse] = None
+    comments: Optional[list[TaskCommentResponse]] = None
+
+
+class TaskListItemResponse(TaskDetailResponse):
+    comment_count: Optional[int] = None
+    last_comment_at: Optional[datetime] = None
+
+
+class TaskListResponse(BaseModel):
+    total: Optional[int] = None
+    items: list[TaskListItemResponse]
+    next_cursor: Optional[str] = None
+
+
+# detail fields of a list item that each include/expand value asks for
+TASK_DETAIL_FIELDS = {
+    TaskIncludeEnum.comment_stats: ("comment_count", "last_comment_at"),
+    TaskExpandEnum.employee: ("employee",),
+    TaskExpandEnum.manager: ("manager",),
+    TaskExpandEnum.comments: ("comments",),
+}
+
+
+def task_list_item(task: TaskDTO, fields: frozenset[str]) -> TaskListItemResponse:
+    # only the fields passed in count as set, so exclude_unset leaves the others out of the response
+    return TaskListItemResponse.model_validate({key: value for key, value in vars(task).items() if key in fields})
+
+
+class TaskBulkCreate(BaseModel):
+    tasks: list[TaskCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class TaskBulkResult(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    index: int
+    task: Optional[TaskResponse] = None
+    error: Optional[str] = None
+
+
 async def get_tasks_controller(container: AsyncContainer) -> APIRouter:
     router = APIRouter(route_class=DishkaRoute, tags=["tasks"], prefix="/api/v1")
     fastapi_users = await container.get(FastAPIUsers[User, UUID])
 
-
-    @router.post("/tasks/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-    # @measure_latency(CREATE_TASK_METHOD_DURATION)
+    # query budgets include the user lookup on a cold user cache; the tests run these routes with budgets enforced
+    @router.post("/tasks/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED, openapi_extra=query_budget(3))
     async def create_task(
             task: TaskCreate,
             service: FromDishka[TaskService],
@@ -86,32 +161,126 @@ async def get_tasks_controller(container: AsyncContainer) -> APIRouter:
 
         return db_task
 
-    @router.get("/tasks/{task_id}", response_model=TaskResponse)
+    @router.post("/tasks/bulk", response_model=list[TaskBulkResult])
+    async def create_tasks(
+            bulk: TaskBulkCreate,
+            service: FromDishka[TaskService],
+            user: User = Depends(fastapi_users.current_user(active=True))
+    ):
+        try:
+            results = await service.create_tasks(
+                caller=user,
+                tasks=[
+                    TaskCreateDTO(
+                        title=task.title,
+                        description=task.description,
+                        employee_id=task.employee_id,
+                        manager_id=user.id,
+                        deadline=task.deadline,
+                        status=task.status,
+                        progress=task.progress
+                    ) for task in bulk.tasks
+                ]
+            )
+        except OnlyManagerCanCreateTaskError as e:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+        return results
+
+    # declared before /tasks/{task_id} so "export" is not parsed as a task id
+    @router.get("/tasks/export")
+    async def export_tasks(
+            service: FromDishka[TaskService],
+            export_format: ExportFormatEnum = Query(ExportFormatEnum.ndjson, alias="format"),
+            compress: bool = Query(False, alias="gzip"),
+            user: User = Depends(fastapi_users.current_user(active=True))
+    ):
+        headers = {"Content-Disposition": f'attachment; filename="tasks.{export_format.value}"'}
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(
+            encode_export(service.export_tasks(user), TASK_EXPORT_COLUMNS, export_format, compress),
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers=headers,
+        )
+
+    @router.get("/tasks/{task_id}", response_model=TaskDetailResponse, openapi_extra=query_budget(3))
     async def get_task(
             task_id: UUID,
             service: FromDishka[TaskService],
+            response: Response,
+            expand: list[TaskExpandEnum] = Query([]),
+            comments_limit: int = Query(DEFAULT_EXPANDED_COMMENTS, ge=1, le=50),
+            if_none_match: str | None = Header(None),
             user: User = Depends(fastapi_users.current_user(active=True))
     ):
+        etag = service.task_etag(user, task_id, expand, comments_limit)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
         try:
-            task = await service.get_task(task_id)
+            task = await service.get_task(user, task_id, expand, comments_limit)
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+        except PermissionError as e:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
+        etag = service.task_etag(user, task_id, expand, comments_limit)
+        if etag:
+            response.headers["ETag"] = etag
         return task
 
-    @router.get("/tasks/")
-    # @measure_latency(GET_ALL_TASKS_METHOD_DURATION)
+    # exclude_unset: items carry only the detail fields that include/expand asked for
+    @router.get("/tasks/", response_model=TaskListResponse, response_model_exclude_unset=True, openapi_extra=query_budget(5))
     async def get_tasks(
             service: FromDishka[TaskService],
             skip: int = 0,
             limit: int = 10,
+            cursor: str | None = None,
+            total_mode: TotalModeEnum = Query(TotalModeEnum.exact, alias="total"),
+            include: list[TaskIncludeEnum] = Query([]),
+            expand: list[TaskExpandEnum] = Query([]),
+            comments_limit: int = Query(DEFAULT_EXPANDED_COMMENTS, ge=1, le=50),
+            task_status: list[TaskStatusEnum] = Query([], alias="status"),
+            deadline_from: Optional[datetime] = None,
+            deadline_to: Optional[datetime] = None,
+            progress_min: Optional[int] = Query(None, ge=0, le=100),
+            progress_max: Optional[int] = Query(None, ge=0, le=100),
+            employee_id: Optional[UUID] = None,
+            sort: TaskSortEnum = TaskSortEnum.created_at,
+            order: SortOrderEnum = SortOrderEnum.desc,
             user: User = Depends(fastapi_users.current_user(active=True))
     ):
-        res = await service.get_tasks(caller=user, skip=skip, limit=limit)
-        return res
+        filters = TaskFilterDTO(
+            status=task_status,
+            deadline_from=deadline_from,
+            deadline_to=deadline_to,
+            progress_min=progress_min,
+            progress_max=progress_max,
+            employee_id=employee_id,
+        )
+        try:
+            total, tasks, next_cursor = await service.get_tasks(
+                caller=user,
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+                total_mode=total_mode,
+                include=include,
+                expand=expand,
+                comments_limit=comments_limit,
+                filters=filters,
+                sort=sort,
+                order=order,
+            )
+        except (InvalidCursorError, InvalidTaskFilterError) as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        fields = frozenset(TaskResponse.model_fields).union(*(TASK_DETAIL_FIELDS[value] for value in (*include, *expand)))
+        return TaskListResponse(total=total, items=[task_list_item(task, fields) for task in tasks], next_cursor=next_cursor)
 
 
-    @router.put("/tasks/{task_id}", response_model=TaskResponse)
+    @router.put("/tasks/{task_id}", response_model=TaskResponse, openapi_extra=query_budget(2))
     async def update_task(
             task_id: UUID,
             task_update: TaskUpdate,
@@ -129,7 +298,7 @@ async def get_tasks_controller(container: AsyncContainer) -> APIRouter:
 
         return db_task
 
-    @router.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
+    @router.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT, openapi_extra=query_budget(2))
     async def delete_task(
             task_id: UUID,
             service: FromDishka[TaskService],
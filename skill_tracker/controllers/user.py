@@ -1,12 +1,15 @@
+from typing import Optional
 from uuid import UUID
 
 from dishka import AsyncContainer, FromDishka
 from dishka.integrations.fastapi import DishkaRoute
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi_users import FastAPIUsers
 from fastapi_users.authentication import AuthenticationBackend
+from pydantic import BaseModel
 
 from skill_tracker.db_access.models import User
+from skill_tracker.services.pagination import TotalModeEnum
 from skill_tracker.services.user_service import (
     OnlyManagerCanGetEmployeesError,
     UserCreate,
@@ -16,6 +19,11 @@ from skill_tracker.services.user_service import (
 )
 
 
+class EmployeeListResponse(BaseModel):
+    total: Optional[int] = None
+    items: list[UserRead]
+
+
 async def get_users_controller(container: AsyncContainer) -> APIRouter:
     router = APIRouter(route_class=DishkaRoute, prefix="/api/v1")
 
@@ -51,19 +59,20 @@ async def get_users_controller(container: AsyncContainer) -> APIRouter:
         tags=["users"],
     )
 
-    @router.get("/employees", tags=["employees"])
+    @router.get("/employees", tags=["employees"], response_model=EmployeeListResponse)
     async def get_employees(
             service: FromDishka[UserService],
             skip: int = 0,
             limit: int = 10,
+            total_mode: TotalModeEnum = Query(TotalModeEnum.exact, alias="total"),
             user: User = Depends(fastapi_users.current_user(active=True)),
     ):
         try:
-            res = await service.get_employees(caller=user, skip=skip, limit=limit)
+            total, employees = await service.get_employees(caller=user, skip=skip, limit=limit, total_mode=total_mode)
         except OnlyManagerCanGetEmployeesError as e:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
-        return res
+        return EmployeeListResponse(total=total, items=employees)
 
     @router.get("/authenticated-route")
     async def authenticated_route(
@@ -0,0 +1,94 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+DB_QUERY_DURATION = Histogram(
+    "skill_tracker_db_query_duration_seconds",
+    "Time from sending a statement to having its cursor, by statement fingerprint",
+    ["statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "skill_tracker_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection, opening a new one included",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+FINGERPRINT_MAX_LENGTH = 200
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|%\(\w+\)s|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:::\w+)?(?:\s*,\s*\?(?:::\w+)?)+\s*\)")
+_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACES = re.compile(r"\s+")
+
+
+class QueryCounter:
+    """Statements run on behalf of one request, however many sessions or tasks it used."""
+
+    def __init__(self):
+        self.count = 0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        self.statements[fingerprint(statement)] += 1
+
+    def summary(self, limit: int = 5) -> str:
+        """The most frequent statements, repeats first; a statement run once per row is the usual N+1."""
+        return "\n".join(f"{runs} x {statement}" for statement, runs in self.statements.most_common(limit))
+
+
+# a mutable counter rather than an int: SQLAlchemy runs the hooks in a greenlet, and only
+# changes to a shared object are guaranteed to be seen by the request that set it
+current_query_counter: ContextVar[Optional[QueryCounter]] = ContextVar("current_query_counter", default=None)
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> str:
+    """The statement with literals, placeholders and IN lists collapsed, for use as a metric label."""
+    normalized = _SPACES.sub(" ", _LITERALS.sub("?", statement)).strip()
+    # IN lists and multi-row VALUES vary in length from call to call
+    return _ROWS.sub("(...)", _LISTS.sub("(...)", normalized))[:FINGERPRINT_MAX_LENGTH]
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = current_query_counter.get()
+    if counter is not None:
+        counter.record(statement)
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    DB_QUERY_DURATION.labels(fingerprint(statement)).observe(time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # the failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
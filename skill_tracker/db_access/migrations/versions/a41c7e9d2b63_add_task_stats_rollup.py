@@ -0,0 +1,86 @@
+"""add task_stats rollup
+
+Revision ID: a41c7e9d2b63
+Revises: f87c58c0f786
+Create Date: 2026-10-18 16:20:37.114092
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c7e9d2b63'
+down_revision: Union[str, None] = 'f87c58c0f786'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TASK_STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION task_stats_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO task_stats (manager_id, employee_id, status, task_count, progress_sum)
+        SELECT manager_id, employee_id, status, -count(*), -sum(progress)
+        FROM old_rows GROUP BY manager_id, employee_id, status ORDER BY manager_id, employee_id, status
+        ON CONFLICT (manager_id, employee_id, status) DO UPDATE
+        SET task_count = task_stats.task_count + EXCLUDED.task_count,
+            progress_sum = task_stats.progress_sum + EXCLUDED.progress_sum;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO task_stats (manager_id, employee_id, status, task_count, progress_sum)
+        SELECT manager_id, employee_id, status, count(*), sum(progress)
+        FROM new_rows GROUP BY manager_id, employee_id, status ORDER BY manager_id, employee_id, status
+        ON CONFLICT (manager_id, employee_id, status) DO UPDATE
+        SET task_count = task_stats.task_count + EXCLUDED.task_count,
+            progress_sum = task_stats.progress_sum + EXCLUDED.progress_sum;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_stats',
+    sa.Column('manager_id', sa.Uuid(), nullable=False),
+    sa.Column('employee_id', sa.Uuid(), nullable=False),
+    sa.Column('status', postgresql.ENUM('pending', 'inprogress', 'done', name='taskstatusenum', create_type=False), nullable=False),
+    sa.Column('task_count', sa.BigInteger(), nullable=False),
+    sa.Column('progress_sum', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('manager_id', 'employee_id', 'status')
+    )
+    op.create_index('ix_tasks_open_manager_id_employee_id_deadline', 'tasks', ['manager_id', 'employee_id', 'deadline'], unique=False, postgresql_where=sa.text("status != 'done'"))
+    op.execute(TASK_STATS_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER task_stats_insert AFTER INSERT ON tasks "
+        "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER task_stats_update AFTER UPDATE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER task_stats_delete AFTER DELETE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply()"
+    )
+    # block task writes while backfilling so none is counted twice or missed
+    op.execute("LOCK TABLE tasks IN SHARE MODE")
+    op.execute(
+        "INSERT INTO task_stats (manager_id, employee_id, status, task_count, progress_sum) "
+        "SELECT manager_id, employee_id, status, count(*), sum(progress) FROM tasks "
+        "GROUP BY manager_id, employee_id, status"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER task_stats_delete ON tasks")
+    op.execute("DROP TRIGGER task_stats_update ON tasks")
+    op.execute("DROP TRIGGER task_stats_insert ON tasks")
+    op.execute("DROP FUNCTION task_stats_apply()")
+    op.drop_index('ix_tasks_open_manager_id_employee_id_deadline', table_name='tasks', postgresql_where=sa.text("status != 'done'"))
+    op.drop_table('task_stats')
@@ -0,0 +1,33 @@
+"""add task sort indexes
+
+Revision ID: e19b4c7a3d52
+Revises: c5d8e2f14a07
+Create Date: 2026-10-18 19:05:44.268310
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e19b4c7a3d52'
+down_revision: Union[str, None] = 'c5d8e2f14a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_manager_id_deadline_id', 'tasks', ['manager_id', sa.text("coalesce(deadline, 'infinity'::timestamptz)"), 'id'], unique=False)
+    op.create_index('ix_tasks_employee_id_deadline_id', 'tasks', ['employee_id', sa.text("coalesce(deadline, 'infinity'::timestamptz)"), 'id'], unique=False)
+    op.create_index('ix_tasks_manager_id_progress_id', 'tasks', ['manager_id', 'progress', 'id'], unique=False)
+    op.create_index('ix_tasks_employee_id_progress_id', 'tasks', ['employee_id', 'progress', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_employee_id_progress_id', table_name='tasks')
+    op.drop_index('ix_tasks_manager_id_progress_id', table_name='tasks')
+    op.drop_index('ix_tasks_employee_id_deadline_id', table_name='tasks')
+    op.drop_index('ix_tasks_manager_id_deadline_id', table_name='tasks')
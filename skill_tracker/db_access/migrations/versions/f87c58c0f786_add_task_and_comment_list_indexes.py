@@ -0,0 +1,33 @@
+"""add task and comment list indexes
+
+Revision ID: f87c58c0f786
+Revises: fd0cd85ea8be
+Create Date: 2026-10-18 12:04:51.318204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'f87c58c0f786'
+down_revision: Union[str, None] = 'fd0cd85ea8be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_manager_id_created_at_id', 'tasks', ['manager_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_tasks_employee_id_created_at_id', 'tasks', ['employee_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_comments_task_id_created_at_id', 'comments', ['task_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_comments_created_at_id', 'comments', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_created_at_id', table_name='comments')
+    op.drop_index('ix_comments_task_id_created_at_id', table_name='comments')
+    op.drop_index('ix_tasks_employee_id_created_at_id', table_name='tasks')
+    op.drop_index('ix_tasks_manager_id_created_at_id', table_name='tasks')
@@ -1,11 +1,13 @@
 from .base import Base
 from .comment import Comment
 from .task import Task, TaskStatusEnum
+from .task_stats import TaskStats
 from .user import User, UserRoleEnum
 
 __all__ = (
     "Base",
     "Task",
+    "TaskStats",
     "User",
     "Comment",
     "UserRoleEnum",
@@ -1,10 +1,12 @@
 from datetime import datetime, timezone
 from uuid import UUID, uuid4
 
-from sqlalchemy import DateTime, ForeignKey, Text
+from sqlalchemy import Computed, DateTime, ForeignKey, Index, Text, desc
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
+from .task import SEARCH_CONFIG
 
 
 class Comment(Base):
@@ -15,6 +17,13 @@ class Comment(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
     task_id: Mapped[UUID] = mapped_column(ForeignKey('tasks.id', ondelete="CASCADE"), nullable=False)
     user_id: Mapped[UUID] = mapped_column(ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, Computed(f"to_tsvector('{SEARCH_CONFIG}', text)", persisted=True), deferred=True)
 
     task: Mapped['Task'] = relationship('Task', back_populates='comments')  # noqa
     user: Mapped['User'] = relationship('User', back_populates='comments')  # noqa
+
+    __table_args__ = (
+        Index('ix_comments_task_id_created_at_id', 'task_id', desc('created_at'), desc('id')),
+        Index('ix_comments_created_at_id', desc('created_at'), desc('id')),
+        Index('ix_comments_search_vector', 'search_vector', postgresql_using='gin'),
+    )
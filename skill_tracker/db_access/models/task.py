@@ -3,11 +3,29 @@ from datetime import datetime, timezone
 from typing import List
 from uuid import UUID, uuid4
 
-from sqlalchemy import CheckConstraint, DateTime, Enum, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    CheckConstraint,
+    Computed,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    desc,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
 
+# text search configuration of the search_vector columns; queries must use the same one to hit the GIN indexes
+SEARCH_CONFIG = "english"
+# key of the ix_tasks_*_deadline_id indexes; queries must repeat it verbatim for the planner to use them
+DEADLINE_SORT_KEY = "coalesce(deadline, 'infinity'::timestamptz)"
+
 
 class TaskStatusEnum(str, enum.Enum):
     pending = "pending"
@@ -27,9 +45,29 @@ class Task(Base):
     status: Mapped[TaskStatusEnum] = mapped_column(Enum(TaskStatusEnum), nullable=False, default=TaskStatusEnum.pending)
     progress: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', title), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     comments: Mapped[List['Comment']] = relationship('Comment', back_populates='task', cascade="all, delete-orphan")  # noqa
+    employee: Mapped['User'] = relationship('User', foreign_keys=[employee_id])  # noqa
+    manager: Mapped['User'] = relationship('User', foreign_keys=[manager_id])  # noqa
 
     __table_args__ = (
         CheckConstraint('progress >= 0 AND progress <= 100', name='chk_progress_range'),
+        Index('ix_tasks_manager_id_created_at_id', 'manager_id', desc('created_at'), desc('id')),
+        Index('ix_tasks_employee_id_created_at_id', 'employee_id', desc('created_at'), desc('id')),
+        # tasks without a deadline sort as due at 'infinity', which keeps keyset conditions plain row comparisons
+        Index('ix_tasks_manager_id_deadline_id', 'manager_id', text(DEADLINE_SORT_KEY), 'id'),
+        Index('ix_tasks_employee_id_deadline_id', 'employee_id', text(DEADLINE_SORT_KEY), 'id'),
+        Index('ix_tasks_manager_id_progress_id', 'manager_id', 'progress', 'id'),
+        Index('ix_tasks_employee_id_progress_id', 'employee_id', 'progress', 'id'),
+        Index('ix_tasks_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_tasks_open_manager_id_employee_id_deadline', 'manager_id', 'employee_id', 'deadline', postgresql_where=text("status != 'done'")),
     )
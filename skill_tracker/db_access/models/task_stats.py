@@ -0,0 +1,61 @@
+from uuid import UUID
+
+from sqlalchemy import DDL, BigInteger, Enum, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .task import Task, TaskStatusEnum
+
+
+class TaskStats(Base):
+    """Per (manager, employee, status) rollup of tasks, kept current by triggers on ``tasks``."""
+    __tablename__ = "task_stats"
+
+    manager_id: Mapped[UUID] = mapped_column(primary_key=True)
+    employee_id: Mapped[UUID] = mapped_column(primary_key=True)
+    status: Mapped[TaskStatusEnum] = mapped_column(Enum(TaskStatusEnum), primary_key=True)
+    task_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    progress_sum: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+# Statement-level triggers see every row a statement touched through transition tables, so a
+# bulk insert costs one upsert per key rather than one per row. Keys are upserted in sorted
+# order so concurrent writers lock them in the same order.
+TASK_STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION task_stats_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO task_stats (manager_id, employee_id, status, task_count, progress_sum)
+        SELECT manager_id, employee_id, status, -count(*), -sum(progress)
+        FROM old_rows GROUP BY manager_id, employee_id, status ORDER BY manager_id, employee_id, status
+        ON CONFLICT (manager_id, employee_id, status) DO UPDATE
+        SET task_count = task_stats.task_count + EXCLUDED.task_count,
+            progress_sum = task_stats.progress_sum + EXCLUDED.progress_sum;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO task_stats (manager_id, employee_id, status, task_count, progress_sum)
+        SELECT manager_id, employee_id, status, count(*), sum(progress)
+        FROM new_rows GROUP BY manager_id, employee_id, status ORDER BY manager_id, employee_id, status
+        ON CONFLICT (manager_id, employee_id, status) DO UPDATE
+        SET task_count = task_stats.task_count + EXCLUDED.task_count,
+            progress_sum = task_stats.progress_sum + EXCLUDED.progress_sum;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+TASK_STATS_TRIGGERS = (
+    "CREATE TRIGGER task_stats_insert AFTER INSERT ON tasks "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply()",
+    "CREATE TRIGGER task_stats_update AFTER UPDATE ON tasks "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply()",
+    "CREATE TRIGGER task_stats_delete AFTER DELETE ON tasks "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply()",
+)
+
+# create_all/drop_all (tests) get the same function and triggers as the migration
+event.listen(Task.__table__, "after_create", DDL(TASK_STATS_FUNCTION))
+for trigger in TASK_STATS_TRIGGERS:
+    event.listen(Task.__table__, "after_create", DDL(trigger))
+event.listen(Task.__table__, "after_drop", DDL("DROP FUNCTION IF EXISTS task_stats_apply()"))
@@ -0,0 +1,101 @@
+import asyncio
+from collections.abc import Callable
+from typing import Optional
+
+import asyncpg
+from loguru import logger
+
+from skill_tracker.services.events import ChangeEvent, EventTransport, decode_event, encode_event
+
+
+class PostgresEventTransport(EventTransport):
+    """Fans events out to every worker with LISTEN/NOTIFY over one dedicated connection per worker.
+
+    When the connection drops, the transport reconnects in the background with
+    exponential backoff and listens again. Sends fail until then, so the broker
+    keeps delivering to this worker's own subscribers; notifications sent by
+    other workers in the meantime are lost.
+    """
+
+    def __init__(self, dsn: str, channel: str, reconnect_delay: float = 0.5, max_reconnect_delay: float = 30.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._connection: Optional[asyncpg.Connection] = None
+        self._deliver: Optional[Callable[[ChangeEvent], None]] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
+        # asyncpg runs one query at a time per connection
+        self._lock = asyncio.Lock()
+
+    async def start(self, deliver: Callable[[ChangeEvent], None]) -> None:
+        self._deliver = deliver
+        self._closing = False
+        await self._connect()
+
+    async def _connect(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            await connection.add_listener(self.channel, self._on_notification)
+        except BaseException:
+            await connection.close()
+            raise
+        connection.add_termination_listener(self._on_termination)
+        self._connection = connection
+        logger.info(f"Listening for change events on channel {self.channel}")
+
+    async def send(self, event: ChangeEvent) -> None:
+        connection = self._connection
+        if connection is None or connection.is_closed():
+            self._on_termination(connection)
+            raise ConnectionError(f"Change event listener on channel {self.channel} is reconnecting")
+        async with self._lock:
+            try:
+                await connection.execute("SELECT pg_notify($1, $2)", self.channel, encode_event(event))
+            except Exception:
+                # a query that meets the server's termination notice closes the connection without calling the termination listeners
+                if connection.is_closed():
+                    self._on_termination(connection)
+                raise
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            await asyncio.gather(self._reconnect_task, return_exceptions=True)
+            self._reconnect_task = None
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = decode_event(payload)
+        except (KeyError, ValueError):
+            logger.warning(f"Ignoring malformed change event on channel {channel}: {payload}")
+            return
+        self._deliver(event)
+
+    def _on_termination(self, connection: Optional[asyncpg.Connection]) -> None:
+        # asyncpg also calls the termination listener for our own close()
+        if self._closing or connection is None or connection is not self._connection:
+            return
+        logger.error(f"Change event listener on channel {self.channel} lost its connection")
+        self._connection = None
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = self.reconnect_delay
+        attempt = 1
+        while not self._closing:
+            await asyncio.sleep(delay)
+            try:
+                await self._connect()
+            except Exception as e:
+                logger.warning(f"Reconnecting change event listener on channel {self.channel} failed (attempt {attempt}): {e}")
+                delay = min(delay * 2, self.max_reconnect_delay)
+                attempt += 1
+            else:
+                logger.info(f"Change event listener on channel {self.channel} reconnected after {attempt} attempts")
+                return
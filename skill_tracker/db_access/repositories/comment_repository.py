@@ -1,26 +1,33 @@
+from collections.abc import AsyncIterator, Sequence
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, delete, insert, select, update
+from sqlalchemy.orm import aliased
 
-from skill_tracker.db_access.models import Comment
+from skill_tracker.db_access.models import Comment, Task
+from skill_tracker.db_access.repositories.paging import fetch_page
+from skill_tracker.db_access.repositories.task_repository import tasks_visible_to
+from skill_tracker.db_access.session_router import SessionRouter
 from skill_tracker.services.comment_service import CommentCreateDTO, CommentGateway, CommentUpdateDTO
+from skill_tracker.services.pagination import Cursor, TotalModeEnum
+
+COMMENT_COLUMNS = tuple(column for column in Comment.__table__.columns if column.key != "search_vector")
 
 
 class CommentRepository(CommentGateway):
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    def __init__(self, sessions: SessionRouter):
+        self.sessions = sessions
 
     async def create(self, task: CommentCreateDTO) -> Comment:
-        db_comment = Comment(**task.__dict__)
-        self.session.add(db_comment)
-        await self.session.commit()
-        await self.session.refresh(db_comment)
+        session = self.sessions.writer
+        result = await session.scalars(insert(Comment).values(**task.__dict__).returning(Comment))
+        db_comment = result.one()
+        await session.commit()
         return db_comment
 
     async def get(self, comment_id: UUID) -> Optional[Comment]:
-        result = await self.session.execute(
+        result = await self.sessions.reader.execute(
             select(Comment).filter(Comment.id == comment_id)
         )
         return result.scalars().first()
@@ -29,43 +36,93 @@ class CommentRepository(CommentGateway):
             self,
             skip: int = 0,
             limit: int = 10,
-            task_id: Optional[UUID] = None
-    ) -> tuple[list[Comment], int]:
+            task_id: Optional[UUID] = None,
+            cursor: Optional[Cursor] = None,
+            total_mode: TotalModeEnum = TotalModeEnum.exact,
+    ) -> tuple[list[Comment], Optional[int]]:
         base_query = select(Comment)
         if task_id:
             base_query = base_query.filter(Comment.task_id == task_id)
 
-        data_query = base_query.order_by(Comment.created_at.desc()).offset(skip).limit(limit)
-        data_result = await self.session.execute(data_query)
-        comments = list(data_result.scalars().all())
-
-        count_query = select(func.count()).select_from(base_query.subquery())
-        count_result = await self.session.execute(count_query)
-        total = count_result.scalar()
-
-        return comments, total
-
-    async def update(
-        self, comment_id: UUID, comment_update: CommentUpdateDTO
-    ) -> Optional[Comment]:
-        comment = await self.get(comment_id)
-        if not comment:
-            return None
-
-        if comment_update.text is not None:
-            comment.text = comment_update.text
-
-        await self.session.commit()
-        await self.session.refresh(comment)
-
-        return comment
+        return await fetch_page(self.sessions.reader, base_query, Comment, skip=skip, limit=limit, cursor=cursor, total_mode=total_mode)
 
-    async def delete(self, comment_id: UUID) -> bool:
-        comment = await self.get(comment_id)
-        if not comment:
-            return False
-
-        await self.session.delete(comment)
-        await self.session.commit()
-
-        return True
+    async def stream_all(self, caller, batch_size: int = 1000) -> AsyncIterator[Sequence[Row]]:
+        query = (
+            select(*COMMENT_COLUMNS)
+            .join(Task, Task.id == Comment.task_id)
+            .filter(tasks_visible_to(caller))
+            .order_by(Comment.task_id, Comment.created_at.desc(), Comment.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.sessions.reader.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
+    async def update_if_owner(
+        self, comment_id: UUID, user_id: UUID, comment_update: CommentUpdateDTO
+    ) -> tuple[bool, Optional[Comment], Optional[tuple[UUID, UUID]]]:
+        session = self.sessions.writer
+        if comment_update.text is None:
+            result = await session.execute(
+                select(Comment, Comment.user_id == user_id, Task.manager_id, Task.employee_id)
+                .join(Task, Task.id == Comment.task_id)
+                .filter(Comment.id == comment_id)
+            )
+            row = result.first()
+            if row is None:
+                return False, None, None
+            return True, row[0] if row[1] else None, (row[2], row[3])
+
+        # one round trip: the target CTE tells "no such comment" apart from "not yours",
+        # and the task join hands back who the change event goes to
+        target = select(Comment.id).filter(Comment.id == comment_id).cte("target")
+        updated = (
+            update(Comment)
+            .filter(Comment.id == comment_id, Comment.user_id == user_id)
+            .values(text=comment_update.text)
+            .returning(*COMMENT_COLUMNS)
+            .cte("updated")
+        )
+        updated_comment = aliased(Comment, updated)
+        result = await session.execute(
+            select(target.c.id, updated_comment, Task.manager_id, Task.employee_id)
+            .select_from(target)
+            .outerjoin(updated, updated.c.id == target.c.id)
+            .outerjoin(Task, Task.id == updated.c.task_id),
+            execution_options={"populate_existing": True},
+        )
+        row = result.first()
+        await session.commit()
+
+        if row is None:
+            return False, None, None
+        return True, row[1], (row[2], row[3]) if row[1] is not None else None
+
+    async def delete_if_owner(
+        self, comment_id: UUID, user_id: UUID
+    ) -> tuple[bool, Optional[Comment], Optional[tuple[UUID, UUID]]]:
+        target = select(Comment.id).filter(Comment.id == comment_id).cte("target")
+        deleted = (
+            delete(Comment)
+            .filter(Comment.id == comment_id, Comment.user_id == user_id)
+            .returning(*COMMENT_COLUMNS)
+            .cte("deleted")
+        )
+        deleted_comment = aliased(Comment, deleted)
+        session = self.sessions.writer
+        result = await session.execute(
+            select(target.c.id, deleted_comment, Task.manager_id, Task.employee_id)
+            .select_from(target)
+            .outerjoin(deleted, deleted.c.id == target.c.id)
+            .outerjoin(Task, Task.id == deleted.c.task_id),
+            execution_options={"populate_existing": True},
+        )
+        row = result.first()
+        await session.commit()
+
+        if row is None:
+            return False, None, None
+        if row[1] is None:
+            return True, None, None
+        session.expunge(row[1])
+        return True, row[1], (row[2], row[3])
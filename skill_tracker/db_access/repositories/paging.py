@@ -0,0 +1,79 @@
+import json
+from typing import Optional
+
+from sqlalchemy import Select, func, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from skill_tracker.services.pagination import Cursor, TotalModeEnum
+
+
+async def fetch_page(
+        session: AsyncSession,
+        base_query: Select,
+        model,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[Cursor] = None,
+        total_mode: TotalModeEnum = TotalModeEnum.exact,
+) -> tuple[list, Optional[int]]:
+    """Fetch one ``created_at DESC, id DESC`` page of ``base_query`` and its total in the requested mode.
+
+    Offset pages in exact mode get the total from a window function in the same
+    statement; keyset pages filter the window away, so they fall back to a count.
+    """
+    data_query = base_query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        data_query = data_query.filter(tuple_(model.created_at, model.id) < (cursor.created_at, cursor.id))
+    return await fetch_ordered_page(session, base_query, data_query, skip=skip, limit=limit, keyset=cursor is not None, total_mode=total_mode)
+
+
+async def fetch_ordered_page(
+        session: AsyncSession,
+        base_query: Select,
+        data_query: Select,
+        skip: int = 0,
+        limit: int = 10,
+        keyset: bool = False,
+        total_mode: TotalModeEnum = TotalModeEnum.exact,
+) -> tuple[list, Optional[int]]:
+    """Like ``fetch_page``, for a ``data_query`` that already carries its order and keyset filter."""
+    if not keyset:
+        data_query = data_query.offset(skip)
+    data_query = data_query.limit(limit)
+
+    if total_mode == TotalModeEnum.exact and not keyset:
+        rows = (await session.execute(data_query.add_columns(func.count().over()))).all()
+        if rows:
+            return [row[0] for row in rows], rows[0][1]
+        if not skip:
+            return [], 0
+        return [], await count_exact(session, base_query)
+
+    data_result = await session.execute(data_query)
+    items = list(data_result.scalars().all())
+
+    if total_mode == TotalModeEnum.exact:
+        total = await count_exact(session, base_query)
+    elif total_mode == TotalModeEnum.estimate:
+        total = await count_estimate(session, base_query)
+    else:
+        total = None
+
+    return items, total
+
+
+async def count_exact(session: AsyncSession, query: Select) -> int:
+    count_query = select(func.count()).select_from(query.subquery())
+    count_result = await session.execute(count_query)
+    return count_result.scalar()
+
+
+async def count_estimate(session: AsyncSession, query: Select) -> int:
+    """Row count from the planner statistics: no scan, but only as fresh as the last ANALYZE."""
+    compiled = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    plan_result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    plan = plan_result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,80 @@
+from typing import Optional
+
+from sqlalchemy import func, literal, select, tuple_, union_all
+
+from skill_tracker.db_access.models import Comment, Task
+from skill_tracker.db_access.models.task import SEARCH_CONFIG
+from skill_tracker.db_access.repositories.task_repository import tasks_visible_to
+from skill_tracker.db_access.session_router import SessionRouter
+from skill_tracker.services.pagination import SearchCursor
+from skill_tracker.services.search_service import SearchGateway, SearchHitDTO, SearchHitKindEnum
+
+HEADLINE_OPTIONS = "MaxFragments=1, MaxWords=20, MinWords=5"
+
+
+class SearchRepository(SearchGateway):
+    def __init__(self, sessions: SessionRouter):
+        self.sessions = sessions
+
+    async def search(
+        self, caller, query: str, limit: int = 10, cursor: Optional[SearchCursor] = None
+    ) -> list[SearchHitDTO]:
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        # both branches find their matches through the GIN indexes on search_vector and only then
+        # check visibility, so the cost follows the number of matches rather than the table sizes
+        task_hits = (
+            select(
+                literal(SearchHitKindEnum.task.value).label("kind"),
+                Task.id.label("id"),
+                Task.id.label("task_id"),
+                Task.title.label("title"),
+                func.coalesce(Task.title + " " + Task.description, Task.title).label("document"),
+                func.ts_rank(Task.search_vector, ts_query).label("rank"),
+                Task.created_at.label("created_at"),
+            )
+            .filter(Task.search_vector.op("@@")(ts_query), tasks_visible_to(caller))
+        )
+        comment_hits = (
+            select(
+                literal(SearchHitKindEnum.comment.value),
+                Comment.id,
+                Comment.task_id,
+                Task.title,
+                Comment.text,
+                func.ts_rank(Comment.search_vector, ts_query),
+                Comment.created_at,
+            )
+            .join(Task, Task.id == Comment.task_id)
+            .filter(Comment.search_vector.op("@@")(ts_query), tasks_visible_to(caller))
+        )
+        hits = union_all(task_hits, comment_hits).subquery("hits")
+
+        page = select(hits).order_by(hits.c.rank.desc(), hits.c.created_at.desc(), hits.c.id.desc())
+        if cursor:
+            page = page.filter(tuple_(hits.c.rank, hits.c.created_at, hits.c.id) < (cursor.rank, cursor.created_at, cursor.id))
+        page = page.limit(limit).subquery("page")
+
+        # headlines re-parse the matched text, so they are only built for the rows of this page
+        result = await self.sessions.reader.execute(
+            select(
+                page.c.kind,
+                page.c.id,
+                page.c.task_id,
+                page.c.title,
+                func.ts_headline(SEARCH_CONFIG, page.c.document, ts_query, HEADLINE_OPTIONS),
+                page.c.rank,
+                page.c.created_at,
+            ).order_by(page.c.rank.desc(), page.c.created_at.desc(), page.c.id.desc())
+        )
+        return [
+            SearchHitDTO(
+                kind=SearchHitKindEnum(kind),
+                id=hit_id,
+                task_id=task_id,
+                title=title,
+                headline=headline,
+                rank=rank,
+                created_at=created_at,
+            )
+            for kind, hit_id, task_id, title, headline, rank, created_at in result.all()
+        ]
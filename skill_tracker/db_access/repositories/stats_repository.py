@@ -0,0 +1,185 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import and_, delete, func, insert, or_, select, text
+
+from skill_tracker.db_access.models import Task, TaskStats, TaskStatusEnum, User
+from skill_tracker.db_access.session_router import SessionRouter
+from skill_tracker.services.stats_service import StatsGateway, TaskStatsDriftDTO, TeamMemberStatsDTO
+
+
+def task_stats_from_tasks():
+    """What ``task_stats`` should hold, aggregated from ``tasks`` itself."""
+    return select(
+        Task.manager_id,
+        Task.employee_id,
+        Task.status,
+        func.count().label("task_count"),
+        func.sum(Task.progress).label("progress_sum"),
+    ).group_by(Task.manager_id, Task.employee_id, Task.status)
+
+
+class StatsRepository(StatsGateway):
+    def __init__(self, sessions: SessionRouter):
+        self.sessions = sessions
+
+    async def get_team_stats(
+        self,
+        manager_id: UUID,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> list[TeamMemberStatsDTO]:
+        if created_from is None and created_to is None:
+            return await self._get_team_stats_from_rollup(manager_id)
+
+        # one pass over the manager's slice of ix_tasks_manager_id_created_at_id, whatever the team size
+        query = (
+            select(
+                Task.employee_id,
+                User.given_name,
+                User.family_name,
+                func.count(),
+                func.count().filter(Task.status == TaskStatusEnum.pending),
+                func.count().filter(Task.status == TaskStatusEnum.inprogress),
+                func.count().filter(Task.status == TaskStatusEnum.done),
+                func.avg(Task.progress),
+                func.count().filter(and_(Task.deadline < func.now(), Task.status != TaskStatusEnum.done)),
+            )
+            .join(User, User.id == Task.employee_id)
+            .filter(Task.manager_id == manager_id)
+            .group_by(Task.employee_id, User.given_name, User.family_name)
+            .order_by(User.family_name, User.given_name, Task.employee_id)
+        )
+        if created_from is not None:
+            query = query.filter(Task.created_at >= created_from)
+        if created_to is not None:
+            query = query.filter(Task.created_at < created_to)
+
+        return await self._team_stats(query)
+
+    async def _get_team_stats_from_rollup(self, manager_id: UUID) -> list[TeamMemberStatsDTO]:
+        # at most three task_stats rows per employee, plus the open overdue tasks through
+        # ix_tasks_open_manager_id_employee_id_deadline; task history is never scanned
+        task_count = func.sum(TaskStats.task_count)
+        rollup = (
+            select(
+                TaskStats.employee_id,
+                task_count.label("total"),
+                func.coalesce(task_count.filter(TaskStats.status == TaskStatusEnum.pending), 0).label("pending"),
+                func.coalesce(task_count.filter(TaskStats.status == TaskStatusEnum.inprogress), 0).label("inprogress"),
+                func.coalesce(task_count.filter(TaskStats.status == TaskStatusEnum.done), 0).label("done"),
+                func.sum(TaskStats.progress_sum).label("progress_sum"),
+            )
+            .filter(TaskStats.manager_id == manager_id)
+            .group_by(TaskStats.employee_id)
+            .having(task_count > 0)
+            .subquery()
+        )
+        overdue = (
+            select(func.count())
+            .where(
+                Task.manager_id == manager_id,
+                Task.employee_id == rollup.c.employee_id,
+                Task.status != TaskStatusEnum.done,
+                Task.deadline < func.now(),
+            )
+            .scalar_subquery()
+        )
+        query = (
+            select(
+                rollup.c.employee_id,
+                User.given_name,
+                User.family_name,
+                rollup.c.total,
+                rollup.c.pending,
+                rollup.c.inprogress,
+                rollup.c.done,
+                rollup.c.progress_sum / rollup.c.total,
+                overdue,
+            )
+            .join(User, User.id == rollup.c.employee_id)
+            .order_by(User.family_name, User.given_name, rollup.c.employee_id)
+        )
+        return await self._team_stats(query)
+
+    async def _team_stats(self, query) -> list[TeamMemberStatsDTO]:
+        result = await self.sessions.reader.execute(query)
+        return [
+            TeamMemberStatsDTO(
+                employee_id=employee_id,
+                given_name=given_name,
+                family_name=family_name,
+                total=int(total),
+                pending=int(pending),
+                inprogress=int(inprogress),
+                done=int(done),
+                average_progress=float(average_progress),
+                overdue=overdue,
+            )
+            for employee_id, given_name, family_name, total, pending, inprogress, done, average_progress, overdue in result.all()
+        ]
+
+    async def get_task_stats_drift(self) -> list[TaskStatsDriftDTO]:
+        # a single statement sees one snapshot, and the triggers write task_stats in the same
+        # transaction as tasks, so concurrent task writes can not show up as drift
+        expected = task_stats_from_tasks().subquery()
+        actual = select(TaskStats).filter(TaskStats.task_count != 0).subquery()
+        manager_id = func.coalesce(expected.c.manager_id, actual.c.manager_id)
+        employee_id = func.coalesce(expected.c.employee_id, actual.c.employee_id)
+        status = func.coalesce(expected.c.status, actual.c.status)
+        query = (
+            select(
+                manager_id,
+                employee_id,
+                status,
+                func.coalesce(expected.c.task_count, 0),
+                func.coalesce(actual.c.task_count, 0),
+                func.coalesce(expected.c.progress_sum, 0),
+                func.coalesce(actual.c.progress_sum, 0),
+            )
+            .select_from(expected)
+            .join(
+                actual,
+                and_(
+                    expected.c.manager_id == actual.c.manager_id,
+                    expected.c.employee_id == actual.c.employee_id,
+                    expected.c.status == actual.c.status,
+                ),
+                full=True,
+            )
+            .filter(
+                or_(
+                    func.coalesce(expected.c.task_count, 0) != func.coalesce(actual.c.task_count, 0),
+                    func.coalesce(expected.c.progress_sum, 0) != func.coalesce(actual.c.progress_sum, 0),
+                )
+            )
+            .order_by(manager_id, employee_id, status)
+        )
+        # the primary, since replica lag is not drift
+        result = await self.sessions.writer.execute(query)
+        return [
+            TaskStatsDriftDTO(
+                manager_id=manager_id,
+                employee_id=employee_id,
+                status=status,
+                expected_count=int(expected_count),
+                actual_count=int(actual_count),
+                expected_progress_sum=int(expected_progress_sum),
+                actual_progress_sum=int(actual_progress_sum),
+            )
+            for manager_id, employee_id, status, expected_count, actual_count, expected_progress_sum, actual_progress_sum in result.all()
+        ]
+
+    async def rebuild_task_stats(self) -> int:
+        session = self.sessions.writer
+        # task writes wait until the rebuilt rollup is committed, reads carry on
+        await session.execute(text("LOCK TABLE tasks IN SHARE MODE"))
+        await session.execute(delete(TaskStats))
+        result = await session.execute(
+            insert(TaskStats).from_select(
+                ["manager_id", "employee_id", "status", "task_count", "progress_sum"], task_stats_from_tasks()
+            )
+        )
+        await session.commit()
+        return result.rowcount
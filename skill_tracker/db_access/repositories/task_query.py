@@ -0,0 +1,79 @@
+from typing import Optional
+
+from sqlalchemy import Select, literal, literal_column, select, tuple_
+
+from skill_tracker.db_access.models import Task
+from skill_tracker.db_access.models.task import DEADLINE_SORT_KEY
+from skill_tracker.services.pagination import SortCursor
+from skill_tracker.services.task_service import SortOrderEnum, TaskFilterDTO, TaskSortEnum
+
+NO_DEADLINE = literal_column("'infinity'::timestamptz")
+DEADLINE = literal_column(DEADLINE_SORT_KEY)
+
+TASK_SORT_KEYS = {
+    TaskSortEnum.created_at: Task.created_at,
+    TaskSortEnum.deadline: DEADLINE,
+    TaskSortEnum.progress: Task.progress,
+}
+
+
+class TaskQuery:
+    """Builds task list queries that the ``(manager_id | employee_id, <sort key>, id)`` indexes can serve.
+
+    Every query is scoped to one manager or employee and ordered by one sort key
+    plus id, so a page is a single range scan of the matching index, read
+    forwards or backwards. Filters are comparisons on indexed keys only: those on
+    the sort key narrow the scan, the rest are checked on the rows it reads.
+    """
+
+    def __init__(self, scope):
+        self._query = select(Task).filter(scope)
+        self._sort = TaskSortEnum.created_at
+        self._order = SortOrderEnum.desc
+
+    def filter(self, filters: Optional[TaskFilterDTO]) -> "TaskQuery":
+        if filters is None:
+            return self
+
+        predicates = []
+        if filters.status:
+            predicates.append(Task.status.in_(filters.status))
+        # deadline ranges go through the sort key, so they bound a deadline ordered scan;
+        # an open upper bound still stops short of the tasks without a deadline
+        if filters.deadline_from is not None:
+            predicates.append(DEADLINE >= filters.deadline_from)
+        if filters.deadline_to is not None:
+            predicates.append(DEADLINE <= filters.deadline_to)
+        elif filters.deadline_from is not None:
+            predicates.append(DEADLINE < NO_DEADLINE)
+        if filters.progress_min is not None:
+            predicates.append(Task.progress >= filters.progress_min)
+        if filters.progress_max is not None:
+            predicates.append(Task.progress <= filters.progress_max)
+        if filters.employee_id is not None:
+            predicates.append(Task.employee_id == filters.employee_id)
+        self._query = self._query.filter(*predicates)
+        return self
+
+    def order_by(self, sort: TaskSortEnum, order: SortOrderEnum) -> "TaskQuery":
+        self._sort = sort
+        self._order = order
+        return self
+
+    def base(self) -> Select:
+        """The filtered query without order or position, for counting."""
+        return self._query
+
+    def page(self, cursor: Optional[SortCursor] = None) -> Select:
+        key = TASK_SORT_KEYS[self._sort]
+        if self._order == SortOrderEnum.desc:
+            query = self._query.order_by(key.desc(), Task.id.desc())
+        else:
+            query = self._query.order_by(key.asc(), Task.id.asc())
+        if cursor is None:
+            return query
+
+        position = tuple_(NO_DEADLINE if cursor.value is None else literal(cursor.value), literal(cursor.id, Task.id.type))
+        if self._order == SortOrderEnum.desc:
+            return query.filter(tuple_(key, Task.id) < position)
+        return query.filter(tuple_(key, Task.id) > position)
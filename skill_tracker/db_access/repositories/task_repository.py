@@ -1,27 +1,74 @@
+from collections.abc import AsyncIterator, Sequence
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, and_, delete, func, insert, select, true, update
+from sqlalchemy.orm import aliased, joinedload
 
-from skill_tracker.db_access.models import Task
-from skill_tracker.services.task_service import TaskCreateDTO, TaskGateway, TaskUpdateDTO
+from skill_tracker.db_access.models import Comment, Task
+from skill_tracker.db_access.repositories.paging import fetch_ordered_page
+from skill_tracker.db_access.repositories.task_query import TaskQuery
+from skill_tracker.db_access.session_router import SessionRouter
+from skill_tracker.services.pagination import SortCursor, TotalModeEnum
+from skill_tracker.services.task_service import (
+    CommentStatsDTO,
+    SortOrderEnum,
+    TaskCreateDTO,
+    TaskExpandEnum,
+    TaskFilterDTO,
+    TaskGateway,
+    TaskSortEnum,
+    TaskUpdateDTO,
+)
+
+# every stored column except the derived search_vector, which is only ever matched against
+TASK_COLUMNS = tuple(column for column in Task.__table__.columns if column.key != "search_vector")
+
+
+def tasks_visible_to(caller):
+    if caller.role == "manager":
+        return Task.manager_id == caller.id
+    return Task.employee_id == caller.id
+
+
+def with_expanded_users(query, expand: Sequence[TaskExpandEnum]):
+    # many-to-one, so joining them in adds columns but never rows
+    if TaskExpandEnum.employee in expand:
+        query = query.options(joinedload(Task.employee))
+    if TaskExpandEnum.manager in expand:
+        query = query.options(joinedload(Task.manager))
+    return query
+
+
+def insert_params(task: TaskCreateDTO) -> dict:
+    # unset optional fields fall back to the column defaults instead of being written as NULL
+    return {key: value for key, value in task.__dict__.items() if value is not None}
 
 
 class TaskRepository(TaskGateway):
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    def __init__(self, sessions: SessionRouter):
+        self.sessions = sessions
 
     async def create(self, task: TaskCreateDTO) -> Task:
-        db_task = Task(**task.__dict__)
-        self.session.add(db_task)
-        await self.session.commit()
-        await self.session.refresh(db_task)
+        session = self.sessions.writer
+        result = await session.scalars(insert(Task).returning(Task), [insert_params(task)])
+        db_task = result.one()
+        await session.commit()
         return db_task
 
-    async def get(self, task_id: UUID) -> Optional[Task]:
-        result = await self.session.execute(
-            select(Task).filter(Task.id == task_id)
+    async def create_many(self, tasks: list[TaskCreateDTO]) -> list[Task]:
+        session = self.sessions.writer
+        result = await session.scalars(
+            insert(Task).returning(Task, sort_by_parameter_order=True),
+            [insert_params(task) for task in tasks],
+        )
+        db_tasks = list(result.all())
+        await session.commit()
+        return db_tasks
+
+    async def get(self, task_id: UUID, expand: Sequence[TaskExpandEnum] = ()) -> Optional[Task]:
+        result = await self.sessions.reader.execute(
+            with_expanded_users(select(Task).filter(Task.id == task_id), expand)
         )
         return result.scalars().first()
 
@@ -30,52 +77,136 @@ class TaskRepository(TaskGateway):
             caller,
             skip: int = 0,
             limit: int = 10,
-    ) -> tuple[list[Task], int]:
-        base_query = select(Task)
-        if caller.role == "manager":
-            base_query = base_query.filter(Task.manager_id == caller.id)
-        else:
-            base_query = base_query.filter(Task.employee_id == caller.id)
-
-        data_query = base_query.order_by(Task.created_at.desc()).offset(skip).limit(limit)
-        data_result = await self.session.execute(data_query)
-        tasks = list(data_result.scalars().all())
-
-        count_query = select(func.count()).select_from(base_query.subquery())
-        count_result = await self.session.execute(count_query)
-        total = count_result.scalar()
-
-        return tasks, total
-
-    async def update(
-        self, task_id: UUID, task_update: TaskUpdateDTO
-    ) -> Optional[Task]:
-        task = await self.get(task_id)
-        if not task:
-            return None
-
-        if task_update.title is not None:
-            task.title = task_update.title
-        if task_update.description is not None:
-            task.description = task_update.description
-        if task_update.deadline is not None:
-            task.deadline = task_update.deadline
-        if task_update.status is not None:
-            task.status = task_update.status
-        if task_update.progress is not None:
-            task.progress = task_update.progress
-
-        await self.session.commit()
-        await self.session.refresh(task)
-
-        return task
-
-    async def delete(self, task_id: UUID) -> bool:
-        task = await self.get(task_id)
-        if not task:
-            return False
-
-        await self.session.delete(task)
-        await self.session.commit()
-
-        return True
+            cursor: Optional[SortCursor] = None,
+            total_mode: TotalModeEnum = TotalModeEnum.exact,
+            expand: Sequence[TaskExpandEnum] = (),
+            filters: Optional[TaskFilterDTO] = None,
+            sort: TaskSortEnum = TaskSortEnum.created_at,
+            order: SortOrderEnum = SortOrderEnum.desc,
+    ) -> tuple[list[Task], Optional[int]]:
+        query = TaskQuery(tasks_visible_to(caller)).filter(filters).order_by(sort, order)
+        return await fetch_ordered_page(
+            self.sessions.reader,
+            query.base(),
+            with_expanded_users(query.page(cursor), expand),
+            skip=skip,
+            limit=limit,
+            keyset=cursor is not None,
+            total_mode=total_mode,
+        )
+
+    async def get_latest_comments(self, task_ids: list[UUID], per_task: int) -> dict[UUID, list[Comment]]:
+        # selectinload has no per-parent LIMIT; a lateral subquery walks ix_comments_task_id_created_at_id
+        # for each task and stops after per_task rows, however many comments the task has
+        page = select(Task.id).filter(Task.id.in_(task_ids)).subquery("page")
+        latest = (
+            select(Comment)
+            .filter(Comment.task_id == page.c.id)
+            .order_by(Comment.created_at.desc(), Comment.id.desc())
+            .limit(per_task)
+            .lateral("latest")
+        )
+        latest_comment = aliased(Comment, latest)
+        result = await self.sessions.reader.execute(
+            select(latest_comment)
+            .select_from(page)
+            .join(latest, true())
+            .order_by(latest_comment.task_id, latest_comment.created_at.desc(), latest_comment.id.desc())
+        )
+        comments: dict[UUID, list[Comment]] = {}
+        for comment in result.scalars():
+            comments.setdefault(comment.task_id, []).append(comment)
+        return comments
+
+    async def get_comment_stats(self, task_ids: list[UUID]) -> dict[UUID, CommentStatsDTO]:
+        # grouped over the page's ids only, so ix_comments_task_id_created_at_id answers it without touching other tasks
+        result = await self.sessions.reader.execute(
+            select(Comment.task_id, func.count(), func.max(Comment.created_at))
+            .filter(Comment.task_id.in_(task_ids))
+            .group_by(Comment.task_id)
+        )
+        return {
+            task_id: CommentStatsDTO(comment_count=comment_count, last_comment_at=last_comment_at)
+            for task_id, comment_count, last_comment_at in result.all()
+        }
+
+    async def stream_all(self, caller, batch_size: int = 1000) -> AsyncIterator[Sequence[Row]]:
+        # plain rows off a server-side cursor: nothing accumulates in the identity map
+        query = (
+            select(*TASK_COLUMNS)
+            .filter(tasks_visible_to(caller))
+            .order_by(Task.created_at.desc(), Task.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.sessions.reader.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
+    async def update_if_owner(
+        self,
+        task_id: UUID,
+        task_update: TaskUpdateDTO,
+        manager_id: Optional[UUID] = None,
+        employee_id: Optional[UUID] = None,
+    ) -> tuple[bool, Optional[Task]]:
+        owner_filters = []
+        if manager_id is not None:
+            owner_filters.append(Task.manager_id == manager_id)
+        if employee_id is not None:
+            owner_filters.append(Task.employee_id == employee_id)
+
+        session = self.sessions.writer
+        values = {field: value for field, value in task_update.__dict__.items() if value is not None}
+        if not values:
+            result = await session.execute(
+                select(Task, and_(true(), *owner_filters)).filter(Task.id == task_id)
+            )
+            row = result.first()
+            if row is None:
+                return False, None
+            return True, row[0] if row[1] else None
+
+        # one round trip: the target CTE tells "no such task" apart from "not yours"
+        target = select(Task.id).filter(Task.id == task_id).cte("target")
+        updated = (
+            update(Task)
+            .filter(Task.id == task_id, *owner_filters)
+            .values(**values)
+            .returning(*TASK_COLUMNS)
+            .cte("updated")
+        )
+        updated_task = aliased(Task, updated)
+        result = await session.execute(
+            select(target.c.id, updated_task).select_from(target).outerjoin(updated, updated.c.id == target.c.id),
+            execution_options={"populate_existing": True},
+        )
+        row = result.first()
+        await session.commit()
+
+        if row is None:
+            return False, None
+        return True, row[1]
+
+    async def delete_if_owner(self, task_id: UUID, manager_id: UUID) -> tuple[bool, Optional[Task]]:
+        target = select(Task.id).filter(Task.id == task_id).cte("target")
+        deleted = (
+            delete(Task)
+            .filter(Task.id == task_id, Task.manager_id == manager_id)
+            .returning(*TASK_COLUMNS)
+            .cte("deleted")
+        )
+        deleted_task = aliased(Task, deleted)
+        session = self.sessions.writer
+        result = await session.execute(
+            select(target.c.id, deleted_task).select_from(target).outerjoin(deleted, deleted.c.id == target.c.id),
+            execution_options={"populate_existing": True},
+        )
+        row = result.first()
+        await session.commit()
+
+        if row is None:
+            return False, None
+        if row[1] is not None:
+            # the row is gone; don't leave it in the identity map as if it were still persistent
+            session.expunge(row[1])
+        return True, row[1]
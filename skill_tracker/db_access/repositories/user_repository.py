@@ -2,37 +2,38 @@ from typing import Optional
 from uuid import UUID
 
 from fastapi_users.db import SQLAlchemyUserDatabase
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 
 from skill_tracker.db_access.models import User
+from skill_tracker.db_access.repositories.paging import fetch_page
+from skill_tracker.db_access.session_router import SessionRouter
+from skill_tracker.services.pagination import TotalModeEnum
 
 
 class UserRepository:
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    def __init__(self, sessions: SessionRouter):
+        self.sessions = sessions
 
     def get_user_db(self):
-        return SQLAlchemyUserDatabase[User, UUID](self.session, User)
+        return SQLAlchemyUserDatabase[User, UUID](self.sessions.primary, User)
 
     async def get_employees(
             self,
             skip: int = 0,
-            limit: int = 10
-    ) -> tuple[list[User], int]:
+            limit: int = 10,
+            total_mode: TotalModeEnum = TotalModeEnum.exact,
+    ) -> tuple[list[User], Optional[int]]:
         base_query = select(User).filter(User.role == "employee")
-        data_query = base_query.order_by(User.created_at.desc()).offset(skip).limit(limit)
-        data_result = await self.session.execute(data_query)
-        employees = list(data_result.scalars().all())
-
-        count_query = select(func.count()).select_from(base_query.subquery())
-        count_result = await self.session.execute(count_query)
-        total = count_result.scalar()
-
-        return employees, total
+        return await fetch_page(self.sessions.reader, base_query, User, skip=skip, limit=limit, total_mode=total_mode)
 
     async def get_user(self, user_id: UUID) -> Optional[User]:
-        result = await self.session.execute(
+        result = await self.sessions.reader.execute(
             select(User).filter(User.id == user_id)
         )
         return result.scalars().first()
+
+    async def get_users(self, user_ids: list[UUID]) -> list[User]:
+        result = await self.sessions.reader.execute(
+            select(User).filter(User.id.in_(user_ids))
+        )
+        return list(result.scalars().all())
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+@dataclass
+class ReadReplica:
+    sessionmaker: Optional[async_sessionmaker] = None
+
+
+class SessionRouter:
+    """Per-request choice between the primary session and an optional read replica.
+
+    Reads go to the replica until the request writes anything; from then on they
+    stay on the primary so the request always sees its own writes.
+    """
+
+    def __init__(self, primary: AsyncSession, replica: Optional[AsyncSession] = None):
+        self.primary = primary
+        self.replica = replica
+        self._has_written = False
+
+    @property
+    def reader(self) -> AsyncSession:
+        if self.replica is None or self._has_written:
+            return self.primary
+        return self.replica
+
+    @property
+    def writer(self) -> AsyncSession:
+        self._has_written = True
+        return self.primary
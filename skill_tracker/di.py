@@ -3,17 +3,29 @@ import uuid
 from collections.abc import AsyncGenerator
 
 from dishka import Provider, Scope, make_async_container, provide
+from fastapi import Request
 from fastapi_users import FastAPIUsers
 from fastapi_users.authentication import AuthenticationBackend, BearerTransport, JWTStrategy
+from fastapi_users.password import PasswordHelper, PasswordHelperProtocol
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
-from skill_tracker.config import Config, load_config
+from skill_tracker.config import Config, DatabaseConfig, load_config
+from skill_tracker.db_access.instrumentation import InstrumentedQueuePool, instrument_engine
 from skill_tracker.db_access.models import User
+from skill_tracker.db_access.notify import PostgresEventTransport
 from skill_tracker.db_access.repositories.comment_repository import CommentRepository
+from skill_tracker.db_access.repositories.search_repository import SearchRepository
+from skill_tracker.db_access.repositories.stats_repository import StatsRepository
 from skill_tracker.db_access.repositories.task_repository import TaskRepository
 from skill_tracker.db_access.repositories.user_repository import UserRepository
+from skill_tracker.db_access.session_router import ReadReplica, SessionRouter
 from skill_tracker.services.comment_service import CommentGateway, CommentService
+from skill_tracker.services.events import EventBroker
+from skill_tracker.services.read_cache import ReadCache
+from skill_tracker.services.search_service import SearchGateway, SearchService
+from skill_tracker.services.stats_service import StatsGateway, StatsService
 from skill_tracker.services.task_service import TaskGateway, TaskService
+from skill_tracker.services.user_cache import InMemoryUserCache, RedisUserCache, UserCache
 from skill_tracker.services.user_service import UserGateway, UserManager, UserService
 
 
@@ -26,10 +38,35 @@ def config_provider() -> Provider:
 
 
 
+def create_engine(db: DatabaseConfig) -> AsyncEngine:
+    connect_args = {
+        "statement_cache_size": db.statement_cache_size,
+        "prepared_statement_cache_size": db.prepared_statement_cache_size,
+    }
+    if db.statement_timeout_ms is not None:
+        connect_args["server_settings"] = {"statement_timeout": str(db.statement_timeout_ms)}
+
+    engine = create_async_engine(
+        db.uri,
+        echo=db.echo,
+        pool_size=db.pool_size,
+        max_overflow=db.max_overflow,
+        pool_timeout=db.pool_timeout,
+        pool_recycle=db.pool_recycle,
+        pool_pre_ping=db.pool_pre_ping,
+        connect_args=connect_args,
+        poolclass=InstrumentedQueuePool,
+    )
+    instrument_engine(engine)
+    return engine
+
+
 class DatabaseProvider(Provider):
     @provide(scope=Scope.APP)
-    async def get_engine(self, cfg: Config) -> AsyncEngine:
-        return create_async_engine(cfg.db.uri, echo=True)
+    async def get_engine(self, cfg: Config) -> AsyncGenerator[AsyncEngine, None]:
+        engine = create_engine(cfg.db)
+        yield engine
+        await engine.dispose()
 
     @provide(scope=Scope.APP)
     def get_sessionmaker(self, engine: AsyncEngine) -> async_sessionmaker:
@@ -43,25 +80,71 @@ class DatabaseProvider(Provider):
         async with sessionmaker() as session:
             yield session
 
+    @provide(scope=Scope.APP)
+    async def get_read_replica(self, cfg: Config) -> AsyncGenerator[ReadReplica, None]:
+        if cfg.db_replica is None:
+            yield ReadReplica()
+            return
+
+        engine = create_engine(cfg.db_replica)
+        yield ReadReplica(async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+        await engine.dispose()
+
+    @provide(scope=Scope.REQUEST)
+    async def get_session_router(
+            self,
+            session: AsyncSession,
+            replica: ReadReplica,
+    ) -> AsyncGenerator[SessionRouter, None]:
+        if replica.sessionmaker is None:
+            yield SessionRouter(session)
+            return
+
+        async with replica.sessionmaker() as replica_session:
+            yield SessionRouter(session, replica_session)
+
 
 class TaskProvider(Provider):
+    @provide(scope=Scope.APP)
+    def get_read_cache(self, cfg: Config) -> ReadCache:
+        settle_seconds = cfg.read_cache.replica_lag_seconds if cfg.db_replica is not None else 0.0
+        return ReadCache(cfg.read_cache.ttl_seconds, cfg.read_cache.max_size, settle_seconds)
+
+    @provide(scope=Scope.APP)
+    async def get_event_broker(self, cfg: Config) -> AsyncGenerator[EventBroker, None]:
+        transport = None
+        if cfg.events.backend == "postgres":
+            transport = PostgresEventTransport(cfg.db.dsn, cfg.events.channel)
+
+        broker = EventBroker(cfg.events.queue_size, transport)
+        await broker.start()
+        yield broker
+        await broker.close()
+
     @provide(scope=Scope.REQUEST)
-    def get_task_gateway(self, session: AsyncSession) -> TaskGateway:
-        return TaskRepository(session)
+    def get_task_gateway(self, sessions: SessionRouter) -> TaskGateway:
+        return TaskRepository(sessions)
 
     @provide(scope=Scope.REQUEST)
     def get_task_service(
             self,
             repository: TaskGateway,
             user_repository: UserGateway,
+            cache: ReadCache,
+            events: EventBroker,
     ) -> TaskService:
-        return TaskService(repository, user_repository)
+        return TaskService(repository, user_repository, cache, events)
+
+
+async def get_request_user_manager(request: Request) -> UserManager:
+    # the auth stack lives for the whole app; only the manager, bound to the request's session, is per request
+    return await request.state.dishka_container.get(UserManager)
 
 
 class UserProvider(Provider):
     @provide(scope=Scope.REQUEST)
-    def get_user_gateway(self, session: AsyncSession) -> UserGateway:
-        return UserRepository(session)
+    def get_user_gateway(self, sessions: SessionRouter) -> UserGateway:
+        return UserRepository(sessions)
 
     @provide(scope=Scope.APP)
     async def get_strategy(self, cfg: Config) -> JWTStrategy[User, uuid.UUID]:
@@ -75,18 +158,34 @@ class UserProvider(Provider):
             get_strategy=lambda: strategy,
         )
 
-    @provide(scope=Scope.REQUEST)
-    def get_user_manager(self, cfg: Config, repository: UserGateway) -> UserManager:
-        return UserManager(repository.get_user_db(), cfg.auth.secret)
+    @provide(scope=Scope.APP)
+    def get_user_cache(self, cfg: Config) -> UserCache:
+        if cfg.user_cache.backend == "redis":
+            return RedisUserCache(cfg.user_cache.redis_url, cfg.user_cache.ttl_seconds)
+        return InMemoryUserCache(cfg.user_cache.ttl_seconds, cfg.user_cache.max_size)
+
+    @provide(scope=Scope.APP)
+    def get_password_helper(self) -> PasswordHelperProtocol:
+        return PasswordHelper()
 
     @provide(scope=Scope.REQUEST)
+    def get_user_manager(
+            self,
+            cfg: Config,
+            repository: UserGateway,
+            user_cache: UserCache,
+            password_helper: PasswordHelperProtocol,
+            read_cache: ReadCache,
+    ) -> UserManager:
+        return UserManager(repository.get_user_db(), cfg.auth.secret, user_cache, password_helper, read_cache)
+
+    @provide(scope=Scope.APP)
     async def get_fastapi_users(
             self,
-            user_manager: UserManager,
             auth_backend: AuthenticationBackend[User, uuid.UUID],
     ) -> FastAPIUsers[User, uuid.UUID]:
         return FastAPIUsers[User, uuid.UUID](
-            lambda: user_manager,
+            get_request_user_manager,
             auth_backends=[auth_backend]
         )
 
@@ -101,16 +200,38 @@ class UserProvider(Provider):
 
 class CommentProvider(Provider):
     @provide(scope=Scope.REQUEST)
-    def get_comment_gateway(self, session: AsyncSession) -> CommentGateway:
-        return CommentRepository(session)
+    def get_comment_gateway(self, sessions: SessionRouter) -> CommentGateway:
+        return CommentRepository(sessions)
 
     @provide(scope=Scope.REQUEST)
     def get_task_service(
             self,
             repository: CommentGateway,
             task_repository: TaskGateway,
+            cache: ReadCache,
+            events: EventBroker,
     ) -> CommentService:
-        return CommentService(repository, task_repository)
+        return CommentService(repository, task_repository, cache, events)
+
+
+class StatsProvider(Provider):
+    @provide(scope=Scope.REQUEST)
+    def get_stats_gateway(self, sessions: SessionRouter) -> StatsGateway:
+        return StatsRepository(sessions)
+
+    @provide(scope=Scope.REQUEST)
+    def get_stats_service(self, repository: StatsGateway, cache: ReadCache) -> StatsService:
+        return StatsService(repository, cache)
+
+
+class SearchProvider(Provider):
+    @provide(scope=Scope.REQUEST)
+    def get_search_gateway(self, sessions: SessionRouter) -> SearchGateway:
+        return SearchRepository(sessions)
+
+    @provide(scope=Scope.REQUEST)
+    def get_search_service(self, repository: SearchGateway) -> SearchService:
+        return SearchService(repository)
 
 
 def setup_di():
@@ -120,4 +241,6 @@ def setup_di():
         TaskProvider(),
         UserProvider(),
         CommentProvider(),
+        StatsProvider(),
+        SearchProvider(),
     )
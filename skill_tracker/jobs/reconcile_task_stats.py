@@ -0,0 +1,36 @@
+"""Compare the task_stats rollup with the tasks table and optionally rebuild it.
+
+Run periodically, e.g. from cron:
+
+    python -m skill_tracker.jobs.reconcile_task_stats [--fix]
+
+Exits with status 1 when drift was found, whether or not it was fixed.
+"""
+import argparse
+import asyncio
+import sys
+
+from skill_tracker.di import setup_di
+from skill_tracker.services.stats_service import StatsService
+
+
+async def reconcile(fix: bool) -> bool:
+    container = setup_di()
+    try:
+        async with container() as request_container:
+            service = await request_container.get(StatsService)
+            drift = await service.reconcile_task_stats(fix=fix)
+    finally:
+        await container.close()
+    return not drift
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the task_stats rollup against tasks")
+    parser.add_argument("--fix", action="store_true", help="rebuild task_stats when it has drifted")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(reconcile(args.fix)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import asyncio
+import inspect
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import traceback
+from typing import Any, Optional, TextIO
+
+from loguru import logger
+
+from skill_tracker.config import LoggingConfig
+
+TEXT_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | {name}:{function}:{line} - {message}"
+
+
+class LevelSampler:
+    """loguru filter keeping a random share of the records of each listed level.
+
+    Runs before a record is formatted, so a dropped record costs one
+    ``random()`` call. Levels that are not listed are always kept.
+    """
+
+    def __init__(self, sample_rates: dict[str, float]):
+        self.sample_rates = {level.upper(): rate for level, rate in sample_rates.items()}
+
+    def __call__(self, record: dict[str, Any]) -> bool:
+        rate = self.sample_rates.get(record["level"].name)
+        return rate is None or random.random() < rate
+
+
+def format_json(record: dict[str, Any]) -> str:
+    # a flat object Loki can parse with `| json`; loguru's serialize=True nests the whole record
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        **record["extra"],
+    }
+    if record["exception"] is not None:
+        entry["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["serialized"] = json.dumps(entry, default=str)
+    return "{extra[serialized]}\n"
+
+
+class BackgroundSink:
+    """File-like loguru sink that leaves the writing to a thread.
+
+    ``write`` only queues the formatted line. The thread takes whatever has
+    queued up, writes it to ``stream`` in one call and flushes, so a slow
+    reader of stdout stalls that thread instead of the event loop. Unlike
+    loguru's ``enqueue=True`` nothing is pickled and lines are not written
+    one at a time. When ``max_pending`` lines are waiting, ``write`` blocks
+    rather than dropping logs or growing without bound. Once closed, lines
+    are written straight to ``stream``; a lock keeps a ``write`` racing
+    ``close`` from queueing its line behind the thread's last batch.
+
+    There is no ``stop`` method on purpose: loguru stops such sinks whenever
+    they are removed, and ``setup_logging`` keeps one sink across calls.
+    """
+
+    def __init__(self, stream: TextIO, max_pending: int = 10000):
+        self.stream = stream
+        self._closed = False
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[Optional[str]] = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        with self._lock:
+            if not self._closed:
+                self._queue.put(message)
+                return
+        self.stream.write(message)
+        self.stream.flush()
+
+    def isatty(self) -> bool:
+        # lets loguru decide on colors from the real stream
+        return self.stream.isatty()
+
+    async def complete(self) -> None:
+        await asyncio.to_thread(self._queue.join)
+
+    def close(self) -> None:
+        # the thread writes out everything queued before the sentinel, then exits;
+        # writers wait on the lock meanwhile and then write straight to the stream
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            lines = [self._queue.get()]
+            while len(lines) < self._queue.maxsize:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in lines
+            try:
+                self.stream.write("".join(line for line in lines if line is not None))
+                self.stream.flush()
+            except Exception as e:
+                print(f"Failed to write {len(lines)} log lines: {e!r}", file=sys.stderr)
+            finally:
+                for _ in lines:
+                    self._queue.task_done()
+            if stop:
+                return
+
+
+class InterceptHandler(logging.Handler):
+    """Routes stdlib logging (uvicorn, SQLAlchemy echo) into loguru, so it goes through the same sink."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+
+        # report the caller of the stdlib logger, not this handler
+        frame, depth = inspect.currentframe(), 0
+        while frame is not None and (depth == 0 or frame.f_code.co_filename == logging.__file__):
+            frame = frame.f_back
+            depth += 1
+        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+
+_background_sink: Optional[BackgroundSink] = None
+
+
+def setup_logging(cfg: LoggingConfig, sink: Optional[TextIO] = None) -> None:
+    global _background_sink
+    logger.remove()
+    sink = sink or sys.stdout
+    # called by the launcher and again by the app's lifespan; both share one writer thread
+    if _background_sink is not None and (not cfg.enqueue or _background_sink.stream is not sink):
+        close_logging()
+    if cfg.enqueue and _background_sink is None:
+        _background_sink = BackgroundSink(sink)
+    logger.add(
+        _background_sink if cfg.enqueue else sink,
+        level=cfg.level,
+        format=format_json if cfg.json else TEXT_FORMAT,
+        filter=LevelSampler(cfg.sample_rates) if cfg.sample_rates else None,
+        # the variable dump of diagnose=True is slow and leaks request data into the logs
+        backtrace=False,
+        diagnose=False,
+    )
+    logging.basicConfig(handlers=[InterceptHandler()], level=logger.level(cfg.level).no, force=True)
+    for name in ("uvicorn", "uvicorn.access", "uvicorn.error"):
+        logging.getLogger(name).handlers = []
+        logging.getLogger(name).propagate = True
+
+
+def close_logging() -> None:
+    """Writes out what the ``[logging] enqueue`` thread still holds and stops it; later lines are written directly."""
+    global _background_sink
+    if _background_sink is not None:
+        _background_sink.close()
+        _background_sink = None
@@ -1,38 +1,57 @@
+import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-from dishka import AsyncContainer, Scope
+from dishka import AsyncContainer
 from dishka.integrations.fastapi import setup_dishka
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from skill_tracker.config import Config
 from skill_tracker.controllers.comment import get_comments_controller
+from skill_tracker.controllers.middleware import QueryMetricsMiddleware
+from skill_tracker.controllers.responses import default_response_class
+from skill_tracker.controllers.search import get_search_controller
+from skill_tracker.controllers.stats import get_stats_controller
+from skill_tracker.controllers.stream import get_stream_controller
 from skill_tracker.controllers.task import get_tasks_controller
 from skill_tracker.controllers.user import get_users_controller
 from skill_tracker.di import setup_di
+from skill_tracker.log_config import close_logging, setup_logging
+from skill_tracker.metrics import mark_worker_stopped
 
 
 @asynccontextmanager
 async def lifespan(app_: FastAPI) -> AsyncGenerator[None, None]:
+    cfg = await app_.container.get(Config)
+    setup_logging(cfg.logging)
     logger.info("Lifespan started")
-    async with container(scope=Scope.REQUEST) as request_container:
-        user_router = await get_users_controller(request_container)
-        task_router = await get_tasks_controller(request_container)
-        comment_router = await get_comments_controller(request_container)
-        app_.include_router(comment_router)
-        app_.include_router(task_router)
-        app_.include_router(user_router)
+    user_router = await get_users_controller(app_.container)
+    task_router = await get_tasks_controller(app_.container)
+    comment_router = await get_comments_controller(app_.container)
+    stream_router = await get_stream_controller(app_.container)
+    stats_router = await get_stats_controller(app_.container)
+    search_router = await get_search_controller(app_.container)
+    app_.include_router(comment_router)
+    app_.include_router(stream_router)
+    app_.include_router(stats_router)
+    app_.include_router(search_router)
+    app_.include_router(task_router)
+    app_.include_router(user_router)
 
     yield
 
     logger.info("Lifespan ended")
     await app_.container.close()
+    mark_worker_stopped()
+    # write out whatever the writer thread still holds and stop it
+    await asyncio.to_thread(close_logging)
 
 
 def create_app(ioc_container: AsyncContainer):
-    application = FastAPI(title="RTK Service", version="1.0.0", lifespan=lifespan)
+    application = FastAPI(title="RTK Service", version="1.0.0", lifespan=lifespan, default_response_class=default_response_class())
     application.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -40,6 +59,7 @@ def create_app(ioc_container: AsyncContainer):
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    application.add_middleware(QueryMetricsMiddleware)
     instrumentator = Instrumentator(
         should_group_status_codes=False,
         should_instrument_requests_inprogress=True,
@@ -0,0 +1,57 @@
+import functools
+import inspect
+import os
+import time
+from collections.abc import Callable
+from typing import TypeVar
+
+from prometheus_client import Histogram, multiprocess
+
+T = TypeVar("T")
+
+# set by the launcher for multi-worker runs; prometheus_client then keeps values in files there
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+SERVICE_METHOD_DURATION = Histogram(
+    "skill_tracker_service_method_duration_seconds",
+    "Time spent in a service method, database round trips included",
+    ["service", "method"],
+)
+
+
+def measure_latency(histogram: Histogram, **labels: str) -> Callable[[Callable], Callable]:
+    """Observe how long each call of the decorated coroutine function takes, failed calls included."""
+
+    def decorator(func: Callable) -> Callable:
+        metric = histogram.labels(**labels) if labels else histogram
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_service(cls: type[T]) -> type[T]:
+    """Wrap every public coroutine method of a service class in ``SERVICE_METHOD_DURATION``.
+
+    Async generators (exports) and plain methods are left alone: the first runs as
+    long as the client reads, the second never waits on I/O.
+    """
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(member):
+            continue
+        setattr(cls, name, measure_latency(SERVICE_METHOD_DURATION, service=cls.__name__, method=name)(member))
+    return cls
+
+
+def mark_worker_stopped() -> None:
+    """Drop this worker's live gauge values from the shared multiprocess files; counters and histograms stay."""
+    if MULTIPROC_DIR_ENV in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
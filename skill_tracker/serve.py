@@ -0,0 +1,82 @@
+"""Run the API the way production does, with the settings from the ``[server]`` config section.
+
+    python -m skill_tracker.serve
+
+Starts ``[server] workers`` uvicorn workers (one per CPU when 0) behind one
+listening socket. With more than one worker each process keeps its own
+Prometheus values, so the launcher points ``PROMETHEUS_MULTIPROC_DIR`` at a
+fresh shared directory first and ``/api/v1/metrics`` sums the workers' files.
+"""
+import os
+import shutil
+from importlib.util import find_spec
+
+import uvicorn
+from loguru import logger
+
+from skill_tracker.config import ServerConfig, load_config
+from skill_tracker.log_config import setup_logging
+from skill_tracker.metrics import MULTIPROC_DIR_ENV
+
+APP = "skill_tracker.main:app"
+
+
+def worker_count(cfg: ServerConfig) -> int:
+    if cfg.workers > 0:
+        return cfg.workers
+    # the CPUs this process may run on, which a container limit can make fewer than the host has
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def resolve_loop(cfg: ServerConfig) -> str:
+    if cfg.loop != "auto":
+        return cfg.loop
+    return "uvloop" if find_spec("uvloop") else "asyncio"
+
+
+def resolve_http(cfg: ServerConfig) -> str:
+    if cfg.http != "auto":
+        return cfg.http
+    return "httptools" if find_spec("httptools") else "h11"
+
+
+def prepare_multiprocess_dir(cfg: ServerConfig) -> str:
+    path = os.environ.get(MULTIPROC_DIR_ENV, cfg.prometheus_multiproc_dir)
+    # files left by an earlier run would be added to this run's counters
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    os.environ[MULTIPROC_DIR_ENV] = path
+    return path
+
+
+def main() -> None:
+    cfg = load_config(os.getenv("SKILL_TRACKER_CONFIG_PATH", "./configs/app.toml"))
+    setup_logging(cfg.logging)
+    server = cfg.server
+    workers = worker_count(server)
+    loop, http = resolve_loop(server), resolve_http(server)
+    if workers > 1:
+        logger.info(f"Prometheus multiprocess mode in {prepare_multiprocess_dir(server)}")
+
+    logger.info(f"Serving {APP} on {server.host}:{server.port} with {workers} workers, loop={loop}, http={http}")
+    uvicorn.run(
+        APP,
+        host=server.host,
+        port=server.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=server.backlog,
+        timeout_keep_alive=server.keep_alive_seconds,
+        limit_concurrency=server.limit_concurrency,
+        limit_max_requests=server.max_requests,
+        access_log=server.access_log,
+        # the app's lifespan routes uvicorn's loggers into loguru
+        log_config=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,17 @@
-from dataclasses import dataclass
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass, fields
 from datetime import datetime
-from typing import Optional, Protocol
+from typing import Any, Optional, Protocol
 from uuid import UUID
 
 from loguru import logger
 
 from skill_tracker.db_access.models import Comment
-from skill_tracker.services.task_service import TaskGateway
+from skill_tracker.metrics import instrument_service
+from skill_tracker.services.events import ChangeEvent, ChangeEventTypeEnum, EventBroker
+from skill_tracker.services.pagination import Cursor, TotalModeEnum, decode_cursor, next_page_cursor
+from skill_tracker.services.read_cache import ReadCache
+from skill_tracker.services.task_service import EXPORT_BATCH_SIZE, TaskGateway
 
 
 @dataclass
@@ -30,6 +35,9 @@ class CommentDTO:
     user_id: UUID
 
 
+COMMENT_EXPORT_COLUMNS = [field.name for field in fields(CommentDTO)]
+
+
 class CommentGateway(Protocol):
     async def create(self, comment: CommentCreateDTO) -> CommentDTO:
         raise NotImplementedError
@@ -38,25 +46,67 @@ class CommentGateway(Protocol):
         raise NotImplementedError
 
     async def get_all(
-        self, skip: int = 0, limit: int = 10, task_id: Optional[UUID] = None
-    ) -> tuple[list[Comment], int]:
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        task_id: Optional[UUID] = None,
+        cursor: Optional[Cursor] = None,
+        total_mode: TotalModeEnum = TotalModeEnum.exact,
+    ) -> tuple[list[Comment], Optional[int]]:
+        raise NotImplementedError
+
+    def stream_all(self, caller, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[Sequence[Any]]:
+        """Yield comments on every task visible to ``caller`` in batches of rows with the ``Comment`` columns."""
         raise NotImplementedError
 
-    async def update(
-        self, comment_id: UUID, comment_update: CommentUpdateDTO
-    ) -> Comment:
+    async def update_if_owner(
+        self, comment_id: UUID, user_id: UUID, comment_update: CommentUpdateDTO
+    ) -> tuple[bool, Optional[Comment], Optional[tuple[UUID, UUID]]]:
+        """Also return the ``(manager_id, employee_id)`` of the comment's task, which change events are addressed to."""
         raise NotImplementedError
 
-    async def delete(self, comment_id: UUID) -> bool:
+    async def delete_if_owner(
+        self, comment_id: UUID, user_id: UUID
+    ) -> tuple[bool, Optional[Comment], Optional[tuple[UUID, UUID]]]:
+        """Also return the ``(manager_id, employee_id)`` of the comment's task, which change events are addressed to."""
         raise NotImplementedError
 
 
 
 
+@instrument_service
 class CommentService:
-    def __init__(self, repository: CommentGateway, task_repository: TaskGateway):
+    def __init__(
+        self,
+        repository: CommentGateway,
+        task_repository: TaskGateway,
+        cache: Optional[ReadCache] = None,
+        events: Optional[EventBroker] = None,
+    ):
         self.repository = repository
         self.task_repository = task_repository
+        self.cache = cache
+        self.events = events
+
+    def _comments_cache_key(
+        self, skip: int, limit: int, task_id: UUID, cursor: Optional[str], total_mode: TotalModeEnum
+    ) -> Optional[tuple]:
+        generation = self.cache.generation(task_id)
+        if generation is None:
+            return None
+        return "comments", task_id, generation, skip, limit, cursor, total_mode
+
+    def _invalidate(self, task_id: UUID) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(task_id)
+
+    async def _publish(self, event_type: ChangeEventTypeEnum, comment: Comment, participants: Optional[tuple[UUID, UUID]]) -> None:
+        # subscribers are the task's manager and employee, which the comment row does not carry
+        if self.events is None or participants is None:
+            return
+
+        manager_id, employee_id = participants
+        await self.events.publish(ChangeEvent(type=event_type, task_id=comment.task_id, manager_id=manager_id, employee_id=employee_id, comment_id=comment.id))
 
     async def create_comment(
         self, comment: CommentCreateDTO
@@ -68,7 +118,9 @@ class CommentService:
             raise ValueError("Task not found")
 
         db_comment = await self.repository.create(comment)
+        self._invalidate(comment.task_id)
         logger.info(f"Comment created with ID: {db_comment.id}")
+        await self._publish(ChangeEventTypeEnum.comment_created, db_comment, (task_to_comment.manager_id, task_to_comment.employee_id))
         return CommentDTO(id=db_comment.id, text=db_comment.text, created_at=db_comment.created_at, task_id=db_comment.task_id, user_id=db_comment.user_id)
 
     async def get_comment(self, comment_id: UUID) -> Optional[CommentDTO]:
@@ -86,39 +138,92 @@ class CommentService:
         skip: int = 0,
         limit: int = 10,
         task_id: Optional[UUID] = None,
-    ) -> tuple[int, list[CommentDTO]]:
-        logger.info(f"Fetching comments (skip={skip}, limit={limit}, task_id={task_id})")
-        comments, total = await self.repository.get_all(skip=skip, limit=limit, task_id=task_id)
+        cursor: Optional[str] = None,
+        total_mode: TotalModeEnum = TotalModeEnum.exact,
+    ) -> tuple[Optional[int], list[CommentDTO], Optional[str]]:
+        logger.info(f"Fetching comments (skip={skip}, limit={limit}, task_id={task_id}, cursor={cursor}, total={total_mode.value})")
+        # only per-task pages are cached; the unfiltered list would be invalidated by every comment write
+        cache_key = None
+        if self.cache is not None and task_id is not None:
+            cache_key = self._comments_cache_key(skip, limit, task_id, cursor, total_mode)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached:
+                logger.info(f"Comments of task {task_id} served from cache")
+                return cached[1]
+
+        comments, total = await self.repository.get_all(
+            skip=skip,
+            limit=limit + 1,
+            task_id=task_id,
+            cursor=decode_cursor(cursor) if cursor else None,
+            total_mode=total_mode,
+        )
+        comments, next_cursor = next_page_cursor(comments, limit)
         logger.info(f"Retrieved {len(comments)} comments, total: {total}")
-        return total, [CommentDTO(id=comment.id, text=comment.text, created_at=comment.created_at, task_id=comment.task_id, user_id=comment.user_id) for comment in comments]
+        page = total, [CommentDTO(id=comment.id, text=comment.text, created_at=comment.created_at, task_id=comment.task_id, user_id=comment.user_id) for comment in comments], next_cursor
+        if cache_key is not None:
+            self.cache.set(cache_key, page)
+        return page
+
+    def comments_etag(
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        task_id: Optional[UUID] = None,
+        cursor: Optional[str] = None,
+        total_mode: TotalModeEnum = TotalModeEnum.exact,
+    ) -> Optional[str]:
+        if self.cache is None or task_id is None:
+            return None
+        cache_key = self._comments_cache_key(skip, limit, task_id, cursor, total_mode)
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        return cached[0] if cached else None
+
+    async def export_comments(self, caller, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[list[CommentDTO]]:
+        logger.info(f"User {caller.id} exporting comments")
+        exported = 0
+        async for rows in self.repository.stream_all(caller, batch_size):
+            exported += len(rows)
+            yield [CommentDTO(**row._mapping) for row in rows]
+        logger.info(f"Exported {exported} comments for user {caller.id}")
 
     async def update_comment(self, caller, comment_id: UUID, comment_update: CommentUpdateDTO) -> CommentDTO:
         logger.info(f"User {caller.id} updating comment {comment_id}")
-        db_comment = await self.repository.get(comment_id)
-        if not db_comment:
+        exists, update_comment, participants = await self.repository.update_if_owner(comment_id, caller.id, comment_update)
+        if update_comment is not None:
+            self._invalidate(update_comment.task_id)
+
+        if not exists:
             logger.warning(f"Comment {comment_id} not found")
             raise ValueError("Comment not found")
 
-        if caller.id != db_comment.user_id:
+        if update_comment is None:
             logger.warning(f"User {caller.id} denied: Cannot update comment {comment_id}")
             raise PermissionError("Can not update others person comment")
 
-        update_comment = await self.repository.update(comment_id, comment_update)
         logger.info(f"Comment {comment_id} updated successfully")
+        await self._publish(ChangeEventTypeEnum.comment_updated, update_comment, participants)
 
         return CommentDTO(id=update_comment.id, text=update_comment.text, created_at=update_comment.created_at, task_id=update_comment.task_id, user_id=update_comment.user_id)
 
     async def delete_comment(self, caller, comment_id: UUID) -> bool:
         logger.info(f"User {caller.id} deleting comment {comment_id}")
-        db_comment = await self.repository.get(comment_id)
-        if not db_comment:
+        exists, deleted_comment, participants = await self.repository.delete_if_owner(comment_id, caller.id)
+        is_deleted = deleted_comment is not None
+        if is_deleted:
+            self._invalidate(deleted_comment.task_id)
+
+        if not exists:
             logger.warning(f"Comment {comment_id} not found")
             raise ValueError("Comment not found")
 
-        if caller.id != db_comment.user_id:
+        if not is_deleted:
             logger.warning(f"User {caller.id} denied: Cannot delete comment {comment_id}")
             raise PermissionError("Can not delete others person comment")
 
-        is_deleted = await self.repository.delete(comment_id)
         logger.info(f"Comment {comment_id} deleted: {is_deleted}")
+        await self._publish(ChangeEventTypeEnum.comment_deleted, deleted_comment, participants)
         return is_deleted
@@ -0,0 +1,114 @@
+import asyncio
+import enum
+import json
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Optional, Protocol
+from uuid import UUID
+
+from loguru import logger
+
+
+class ChangeEventTypeEnum(str, enum.Enum):
+    task_created = "task.created"
+    task_updated = "task.updated"
+    task_deleted = "task.deleted"
+    comment_created = "comment.created"
+    comment_updated = "comment.updated"
+    comment_deleted = "comment.deleted"
+
+
+@dataclass
+class ChangeEvent:
+    """Notice that a task or one of its comments changed; clients refetch what they need."""
+    type: ChangeEventTypeEnum
+    task_id: UUID
+    manager_id: UUID
+    employee_id: UUID
+    comment_id: Optional[UUID] = None
+
+
+def encode_event(event: ChangeEvent) -> str:
+    return json.dumps(asdict(event), default=str)
+
+
+def decode_event(raw: str) -> ChangeEvent:
+    data = json.loads(raw)
+    return ChangeEvent(
+        type=ChangeEventTypeEnum(data["type"]),
+        task_id=UUID(data["task_id"]),
+        manager_id=UUID(data["manager_id"]),
+        employee_id=UUID(data["employee_id"]),
+        comment_id=UUID(data["comment_id"]) if data.get("comment_id") else None,
+    )
+
+
+class EventTransport(Protocol):
+    """Carries events between workers; every worker, the sender included, gets them back through ``deliver``."""
+
+    async def start(self, deliver: Callable[[ChangeEvent], None]) -> None:
+        raise NotImplementedError
+
+    async def send(self, event: ChangeEvent) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        raise NotImplementedError
+
+
+class EventBroker:
+    """In-process pub/sub from service writes to stream subscribers, keyed by user id.
+
+    A subscriber is a bounded queue, so an idle stream costs one queue and one
+    parked coroutine. When a subscriber falls behind, its oldest events are
+    dropped instead of blocking the publisher.
+    """
+
+    def __init__(self, queue_size: int = 100, transport: Optional[EventTransport] = None):
+        self.queue_size = queue_size
+        self.transport = transport
+        self._subscribers: dict[UUID, set[asyncio.Queue]] = {}
+
+    async def start(self) -> None:
+        if self.transport is not None:
+            await self.transport.start(self.dispatch)
+
+    async def close(self) -> None:
+        if self.transport is not None:
+            await self.transport.close()
+
+    async def publish(self, event: ChangeEvent) -> None:
+        if self.transport is None:
+            self.dispatch(event)
+            return
+
+        try:
+            await self.transport.send(event)
+        except Exception:
+            # the write is already committed; at least tell this worker's subscribers
+            logger.exception(f"Failed to send {event.type.value} event for task {event.task_id}")
+            self.dispatch(event)
+
+    def dispatch(self, event: ChangeEvent) -> None:
+        for user_id in {event.manager_id, event.employee_id}:
+            for queue in self._subscribers.get(user_id, ()):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(event)
+
+    @contextmanager
+    def subscribe(self, user_id: UUID) -> Iterator[asyncio.Queue]:
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers[user_id]
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
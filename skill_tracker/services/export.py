@@ -0,0 +1,77 @@
+import csv
+import enum
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+
+class ExportFormatEnum(str, enum.Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormatEnum.ndjson: "application/x-ndjson",
+    ExportFormatEnum.csv: "text/csv",
+}
+
+
+# str-based enums already encode as their value, so only these need help
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _encode_ndjson(batches: AsyncIterator[list], columns: list[str]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield "".join(json.dumps(vars(item), default=_json_default) + "\n" for item in batch).encode()
+
+
+async def _encode_csv(batches: AsyncIterator[list], columns: list[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in batches:
+        writer.writerows([_csv_value(value) for value in vars(item).values()] for item in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # header only when there was nothing to export
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def encode_export(
+        batches: AsyncIterator[list],
+        columns: list[str],
+        export_format: ExportFormatEnum,
+        compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """Encode batches of dataclass DTOs whose fields are ``columns``, one batch at a time.
+
+    Only one batch is held at once, so memory stays flat however many rows are exported.
+    """
+    chunks = _encode_csv(batches, columns) if export_format == ExportFormatEnum.csv else _encode_ndjson(batches, columns)
+    if not compress:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,98 @@
+import base64
+import binascii
+import enum
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+
+class TotalModeEnum(str, enum.Enum):
+    exact = "exact"
+    estimate = "estimate"
+    none = "none"
+
+
+class InvalidCursorError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Position of the last row of a page in ``(created_at DESC, id DESC)`` order."""
+    created_at: datetime
+    id: UUID
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(value: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        created_at, row_id = raw.split("|", 1)
+        return Cursor(created_at=datetime.fromisoformat(created_at), id=UUID(row_id))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+@dataclass(frozen=True)
+class SortCursor:
+    """Position of the last row of a page in ``(<sort key>, id)`` order; ``value`` is None for a NULL key."""
+    value: Any
+    id: UUID
+
+
+def encode_sort_cursor(value: Any, row_id: UUID) -> str:
+    # for created_at this is the same string encode_cursor produces
+    if value is None:
+        value = ""
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    raw = f"{value}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sort_cursor(value: str, parse_value: Callable[[str], Any], nullable: bool = False) -> SortCursor:
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        sort_value, row_id = raw.rsplit("|", 1)
+        if not sort_value and not nullable:
+            raise ValueError("Missing sort value")
+        return SortCursor(value=parse_value(sort_value) if sort_value else None, id=UUID(row_id))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+@dataclass(frozen=True)
+class SearchCursor:
+    """Position of the last search hit of a page in ``(rank DESC, created_at DESC, id DESC)`` order."""
+    rank: float
+    created_at: datetime
+    id: UUID
+
+
+def encode_search_cursor(rank: float, created_at: datetime, row_id: UUID) -> str:
+    # repr round-trips the float exactly, so the next page starts right after this hit
+    raw = f"{rank!r}|{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(value: str) -> SearchCursor:
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        rank, created_at, row_id = raw.split("|", 2)
+        return SearchCursor(rank=float(rank), created_at=datetime.fromisoformat(created_at), id=UUID(row_id))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+def next_page_cursor(rows: list, limit: int, sort_key: str = "created_at") -> tuple[list, Optional[str]]:
+    """Trim a page fetched with ``limit + 1`` rows and build the cursor for the next one."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_sort_cursor(getattr(last, sort_key), last.id)
@@ -0,0 +1,85 @@
+import itertools
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from uuid import uuid4
+
+
+class ReadCache:
+    """Bounded LRU/TTL cache for hot read results, each entry tagged with an ETag.
+
+    Entries are grouped by scope (a task id). Writes call ``invalidate(scope)``,
+    which moves the scope to a new generation so every key built from the old
+    one becomes unreachable and ages out of the LRU. ETags come from a
+    per-process counter and are assigned when an entry is filled, so a refill
+    after expiry always gets a new tag. Writes on other workers are only picked
+    up once the TTL runs out.
+
+    Reads that go to a lagging replica can still return the row from before a
+    write. For ``settle_seconds`` after ``invalidate(scope)`` the scope has no
+    generation, so those reads neither hit nor fill the cache and the old row
+    is not kept under the new generation.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int, settle_seconds: float = 0.0):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.settle_seconds = settle_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, str, Any]] = OrderedDict()
+        # scope -> (generation, monotonic time from which it may be cached)
+        self._generations: OrderedDict[Hashable, tuple[int, float]] = OrderedDict()
+        self._counter = itertools.count(1)
+        self._epoch = uuid4().hex[:8]
+
+    def generation(self, scope: Hashable) -> Optional[int]:
+        entry = self._generations.get(scope)
+        if entry is None:
+            return self._bump(scope, 0.0)
+
+        self._generations.move_to_end(scope)
+        generation, settled_at = entry
+        if settled_at > time.monotonic():
+            return None
+        return generation
+
+    def invalidate(self, scope: Hashable) -> None:
+        self._bump(scope, time.monotonic() + self.settle_seconds if self.settle_seconds > 0 else 0.0)
+
+    def get(self, key: Hashable) -> Optional[tuple[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, etag, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return etag, value
+
+    def set(self, key: Hashable, value: Any) -> Optional[str]:
+        if self.ttl_seconds <= 0 or self.max_size <= 0:
+            return None
+
+        etag = f'W/"{self._epoch}-{next(self._counter)}"'
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, etag, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return etag
+
+    def _bump(self, scope: Hashable, settled_at: float) -> int:
+        # generations come from the same counter as ETags, so a scope evicted here never reuses an old number
+        generation = next(self._counter)
+        self._generations[scope] = generation, settled_at
+        self._generations.move_to_end(scope)
+        while len(self._generations) > self.max_size:
+            self._generations.popitem(last=False)
+        return generation
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    if not if_none_match or not etag:
+        return False
+    return any(candidate.strip() in (etag, "*") for candidate in if_none_match.split(","))
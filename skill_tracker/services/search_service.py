@@ -0,0 +1,56 @@
+import enum
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Protocol
+from uuid import UUID
+
+from loguru import logger
+
+from skill_tracker.metrics import instrument_service
+from skill_tracker.services.pagination import SearchCursor, decode_search_cursor, encode_search_cursor
+
+
+class SearchHitKindEnum(str, enum.Enum):
+    task = "task"
+    comment = "comment"
+
+
+@dataclass
+class SearchHitDTO:
+    """A task or comment matching the query; ``id`` is the comment's id for comment hits."""
+    kind: SearchHitKindEnum
+    id: UUID
+    task_id: UUID
+    title: str
+    headline: str
+    rank: float
+    created_at: datetime
+
+
+class SearchGateway(Protocol):
+    async def search(
+        self, caller, query: str, limit: int = 10, cursor: Optional[SearchCursor] = None
+    ) -> list[SearchHitDTO]:
+        """Hits on tasks visible to ``caller``, best first, after ``cursor`` if given."""
+        raise NotImplementedError
+
+
+@instrument_service
+class SearchService:
+    def __init__(self, repository: SearchGateway):
+        self.repository = repository
+
+    async def search(
+        self, caller, query: str, limit: int = 10, cursor: Optional[str] = None
+    ) -> tuple[list[SearchHitDTO], Optional[str]]:
+        logger.info(f"User {caller.id} searching for {query!r} (limit={limit}, cursor={cursor})")
+        hits = await self.repository.search(
+            caller, query, limit=limit + 1, cursor=decode_search_cursor(cursor) if cursor else None
+        )
+        next_cursor = None
+        if len(hits) > limit:
+            hits = hits[:limit]
+            last = hits[-1]
+            next_cursor = encode_search_cursor(last.rank, last.created_at, last.id)
+        logger.info(f"Search returned {len(hits)} hits")
+        return hits, next_cursor
@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Protocol
+from uuid import UUID
+
+from loguru import logger
+
+from skill_tracker.db_access.models import TaskStatusEnum
+from skill_tracker.metrics import instrument_service
+from skill_tracker.services.read_cache import ReadCache
+
+
+@dataclass
+class TeamMemberStatsDTO:
+    employee_id: UUID
+    given_name: str
+    family_name: str
+    total: int
+    pending: int
+    inprogress: int
+    done: int
+    average_progress: float
+    overdue: int
+
+
+@dataclass
+class TaskStatsDriftDTO:
+    """A ``task_stats`` row that disagrees with the tasks it summarises."""
+    manager_id: UUID
+    employee_id: UUID
+    status: TaskStatusEnum
+    expected_count: int
+    actual_count: int
+    expected_progress_sum: int
+    actual_progress_sum: int
+
+
+class StatsGateway(Protocol):
+    async def get_team_stats(
+        self,
+        manager_id: UUID,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> list[TeamMemberStatsDTO]:
+        raise NotImplementedError
+
+    async def get_task_stats_drift(self) -> list[TaskStatsDriftDTO]:
+        raise NotImplementedError
+
+    async def rebuild_task_stats(self) -> int:
+        """Recompute ``task_stats`` from ``tasks`` and return the number of rows written."""
+        raise NotImplementedError
+
+
+class OnlyManagerCanGetStatsError(Exception):
+    pass
+
+
+def team_stats_scope(manager_id: UUID) -> tuple:
+    """Read cache scope of a manager's team stats; task writes invalidate it."""
+    return "team", manager_id
+
+
+@instrument_service
+class StatsService:
+    def __init__(self, repository: StatsGateway, cache: Optional[ReadCache] = None):
+        self.repository = repository
+        self.cache = cache
+
+    async def get_team_stats(
+        self,
+        caller,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> list[TeamMemberStatsDTO]:
+        logger.info(f"User {caller.id} requesting team stats (created_from={created_from}, created_to={created_to})")
+        if caller.role != "manager" and not caller.is_superuser:
+            logger.warning(f"User {caller.id} denied: Only managers can get team stats")
+            raise OnlyManagerCanGetStatsError("Only managers can get team stats")
+
+        cache_key = None
+        scope = team_stats_scope(caller.id)
+        generation = self.cache.generation(scope) if self.cache is not None else None
+        if generation is not None:
+            cache_key = (*scope, generation, created_from, created_to)
+            cached = self.cache.get(cache_key)
+            if cached:
+                logger.info(f"Team stats of manager {caller.id} served from cache")
+                return cached[1]
+
+        stats = await self.repository.get_team_stats(caller.id, created_from=created_from, created_to=created_to)
+        logger.info(f"Retrieved team stats for {len(stats)} employees")
+        if cache_key is not None:
+            self.cache.set(cache_key, stats)
+        return stats
+
+    async def reconcile_task_stats(self, fix: bool = False) -> list[TaskStatsDriftDTO]:
+        logger.info(f"Checking task_stats for drift (fix={fix})")
+        drift = await self.repository.get_task_stats_drift()
+        for row in drift:
+            logger.warning(
+                f"task_stats drift for manager {row.manager_id}, employee {row.employee_id}, status {row.status.value}: "
+                f"count {row.actual_count} != {row.expected_count}, progress sum {row.actual_progress_sum} != {row.expected_progress_sum}"
+            )
+
+        if drift and fix:
+            rows = await self.repository.rebuild_task_stats()
+            logger.info(f"Rebuilt task_stats with {rows} rows")
+        elif not drift:
+            logger.info("task_stats matches tasks")
+        return drift
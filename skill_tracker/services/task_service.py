@@ -1,12 +1,24 @@
-from dataclasses import dataclass
+import enum
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import Optional, Protocol
+from typing import Any, Optional, Protocol
 from uuid import UUID
 
 from loguru import logger
 
-from skill_tracker.db_access.models import Task, TaskStatusEnum
-from skill_tracker.services.user_service import UserGateway
+from skill_tracker.db_access.models import Comment, Task, TaskStatusEnum, User, UserRoleEnum
+from skill_tracker.metrics import instrument_service
+from skill_tracker.services.events import ChangeEvent, ChangeEventTypeEnum, EventBroker
+from skill_tracker.services.pagination import (
+    SortCursor,
+    TotalModeEnum,
+    decode_sort_cursor,
+    next_page_cursor,
+)
+from skill_tracker.services.read_cache import ReadCache
+from skill_tracker.services.stats_service import team_stats_scope
+from skill_tracker.services.user_service import UserGateway, expanded_users_scope
 
 
 @dataclass
@@ -42,24 +54,140 @@ class TaskDTO:
     progress: int
 
 
+@dataclass
+class TaskUserDTO:
+    id: UUID
+    email: str
+    given_name: str
+    family_name: str
+    role: UserRoleEnum
+
+
+@dataclass
+class TaskCommentDTO:
+    id: UUID
+    text: str
+    created_at: datetime
+    user_id: UUID
+
+
+@dataclass
+class TaskDetailsDTO(TaskDTO):
+    """A task with whatever ``include``/``expand`` asked for; the rest stays None."""
+    comment_count: Optional[int] = None
+    last_comment_at: Optional[datetime] = None
+    employee: Optional[TaskUserDTO] = None
+    manager: Optional[TaskUserDTO] = None
+    comments: Optional[list[TaskCommentDTO]] = None
+
+
+@dataclass
+class CommentStatsDTO:
+    comment_count: int
+    last_comment_at: Optional[datetime]
+
+
+class TaskIncludeEnum(str, enum.Enum):
+    comment_stats = "comment_stats"
+
+
+class TaskExpandEnum(str, enum.Enum):
+    employee = "employee"
+    manager = "manager"
+    comments = "comments"
+
+
+class TaskSortEnum(str, enum.Enum):
+    created_at = "created_at"
+    deadline = "deadline"
+    progress = "progress"
+
+
+class SortOrderEnum(str, enum.Enum):
+    asc = "asc"
+    desc = "desc"
+
+
+# how the sort key of a cursor is read back
+TASK_SORT_VALUE_PARSERS = {
+    TaskSortEnum.created_at: datetime.fromisoformat,
+    TaskSortEnum.deadline: datetime.fromisoformat,
+    TaskSortEnum.progress: int,
+}
+
+
+@dataclass
+class TaskFilterDTO:
+    """Task list filters; ranges are inclusive and unset bounds are open."""
+    status: list[TaskStatusEnum] = field(default_factory=list)
+    deadline_from: Optional[datetime] = None
+    deadline_to: Optional[datetime] = None
+    progress_min: Optional[int] = None
+    progress_max: Optional[int] = None
+    employee_id: Optional[UUID] = None
+
+
+DEFAULT_EXPANDED_COMMENTS = 5
+
+
+TASK_EXPORT_COLUMNS = [field.name for field in fields(TaskDTO)]
+EXPORT_BATCH_SIZE = 1000
+
+
+@dataclass
+class TaskBulkResultDTO:
+    index: int
+    task: Optional[TaskDTO] = None
+    error: Optional[str] = None
+
+
 class TaskGateway(Protocol):
     async def create(self, task: TaskCreateDTO) -> Task:
         raise NotImplementedError
 
-    async def get(self, task_id: UUID) -> Optional[Task]:
+    async def create_many(self, tasks: list[TaskCreateDTO]) -> list[Task]:
+        raise NotImplementedError
+
+    async def get(self, task_id: UUID, expand: Sequence[TaskExpandEnum] = ()) -> Optional[Task]:
         raise NotImplementedError
 
     async def get_all(
-        self, caller, skip: int = 0, limit: int = 10
-    ) -> tuple[list[Task], int]:
+        self,
+        caller,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[SortCursor] = None,
+        total_mode: TotalModeEnum = TotalModeEnum.exact,
+        expand: Sequence[TaskExpandEnum] = (),
+        filters: Optional[TaskFilterDTO] = None,
+        sort: TaskSortEnum = TaskSortEnum.created_at,
+        order: SortOrderEnum = SortOrderEnum.desc,
+    ) -> tuple[list[Task], Optional[int]]:
+        """A page of tasks visible to ``caller`` in ``(sort, id)`` order; NULL deadlines sort as the largest."""
         raise NotImplementedError
 
-    async def update(
-        self, task_id: UUID, task_update: TaskUpdateDTO
-    ) -> Task:
+    async def get_latest_comments(self, task_ids: list[UUID], per_task: int) -> dict[UUID, list[Comment]]:
+        """Up to ``per_task`` newest comments of each given task; tasks without any are left out."""
         raise NotImplementedError
 
-    async def delete(self, task_id: UUID) -> bool:
+    async def get_comment_stats(self, task_ids: list[UUID]) -> dict[UUID, CommentStatsDTO]:
+        """Stats for the given tasks that have comments; tasks without any are left out."""
+        raise NotImplementedError
+
+    def stream_all(self, caller, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[Sequence[Any]]:
+        """Yield every task visible to ``caller`` in batches of rows with the ``Task`` columns."""
+        raise NotImplementedError
+
+    async def update_if_owner(
+        self,
+        task_id: UUID,
+        task_update: TaskUpdateDTO,
+        manager_id: Optional[UUID] = None,
+        employee_id: Optional[UUID] = None,
+    ) -> tuple[bool, Optional[Task]]:
+        raise NotImplementedError
+
+    async def delete_if_owner(self, task_id: UUID, manager_id: UUID) -> tuple[bool, Optional[Task]]:
         raise NotImplementedError
 
 
@@ -80,10 +208,40 @@ class OnlyEmployeeCanBeAttachedToTask(Exception):
     pass
 
 
+class InvalidTaskFilterError(Exception):
+    pass
+
+
+def task_user_dto(user: User) -> TaskUserDTO:
+    return TaskUserDTO(id=user.id, email=user.email, given_name=user.given_name, family_name=user.family_name, role=user.role)
+
+
+def task_visible_to(caller, task) -> bool:
+    """The repository's ``tasks_visible_to`` filter, checked against a task that is already loaded."""
+    if caller.is_superuser:
+        return True
+    if caller.role == "manager":
+        return task.manager_id == caller.id
+    return task.employee_id == caller.id
+
+
+@instrument_service
 class TaskService:
-    def __init__(self, repository: TaskGateway, user_repository: UserGateway):
+    def __init__(
+        self,
+        repository: TaskGateway,
+        user_repository: UserGateway,
+        cache: Optional[ReadCache] = None,
+        events: Optional[EventBroker] = None,
+    ):
         self.repository = repository
         self.user_repository = user_repository
+        self.cache = cache
+        self.events = events
+
+    async def _publish(self, event_type: ChangeEventTypeEnum, task: Task) -> None:
+        if self.events is not None:
+            await self.events.publish(ChangeEvent(type=event_type, task_id=task.id, manager_id=task.manager_id, employee_id=task.employee_id))
 
     async def create_task(
         self, caller, task: TaskCreateDTO
@@ -102,7 +260,9 @@ class TaskService:
             raise OnlyEmployeeCanBeAttachedToTask("Manager cant attach manager to task")
 
         db_task = await self.repository.create(task)
+        self._invalidate(db_task)
         logger.info(f"Task created successfully with ID: {db_task.id}")
+        await self._publish(ChangeEventTypeEnum.task_created, db_task)
         return TaskDTO(
             title=db_task.title,
             description=db_task.description,
@@ -115,85 +275,271 @@ class TaskService:
             manager_id=task.manager_id
         )
 
-    async def get_task(self, task_id: UUID) -> Optional[TaskDTO]:
-        logger.info(f"Fetching task with ID: {task_id}")
-        task = await self.repository.get(task_id)
+    async def create_tasks(
+        self, caller, tasks: list[TaskCreateDTO]
+    ) -> list[TaskBulkResultDTO]:
+        if caller.role != "manager" and not caller.is_superuser:
+            logger.warning(f"User {caller.id} denied: Only managers can create tasks")
+            raise OnlyManagerCanCreateTaskError("Only managers can create tasks")
+
+        logger.info(f"User {caller.id} creating {len(tasks)} tasks in bulk")
+        employees = {
+            employee.id: employee
+            for employee in await self.user_repository.get_users(list({task.employee_id for task in tasks}))
+        }
+
+        results = [TaskBulkResultDTO(index=index) for index in range(len(tasks))]
+        valid = []
+        for result, task in zip(results, tasks):
+            employee = employees.get(task.employee_id)
+            if not employee:
+                result.error = "Employee not found"
+            elif employee.role == "manager":
+                result.error = "Manager cant attach manager to task"
+            else:
+                valid.append((result, task))
+
+        db_tasks = await self.repository.create_many([task for _, task in valid]) if valid else []
+        for (result, _), db_task in zip(valid, db_tasks):
+            result.task = TaskDTO(
+                title=db_task.title,
+                description=db_task.description,
+                status=db_task.status,
+                progress=db_task.progress,
+                employee_id=db_task.employee_id,
+                deadline=db_task.deadline,
+                created_at=db_task.created_at,
+                id=db_task.id,
+                manager_id=db_task.manager_id
+            )
+
+        logger.info(f"Bulk created {len(db_tasks)} of {len(tasks)} tasks")
+        for db_task in db_tasks:
+            self._invalidate(db_task)
+            await self._publish(ChangeEventTypeEnum.task_created, db_task)
+        return results
+
+    def _task_cache_key(self, task_id: UUID, expand: Sequence[TaskExpandEnum], comments_limit: int) -> Optional[tuple]:
+        generation = self.cache.generation(task_id)
+        if generation is None:
+            return None
+        # expanded users are copied into the value, so a user write has to move the key as well
+        users_generation = None
+        if TaskExpandEnum.employee in expand or TaskExpandEnum.manager in expand:
+            users_generation = self.cache.generation(expanded_users_scope())
+            if users_generation is None:
+                return None
+        if TaskExpandEnum.comments not in expand:
+            comments_limit = None
+        return "task", task_id, generation, users_generation, frozenset(expand), comments_limit
+
+    def task_etag(
+        self, caller, task_id: UUID, expand: Sequence[TaskExpandEnum] = (), comments_limit: int = DEFAULT_EXPANDED_COMMENTS
+    ) -> Optional[str]:
+        cache_key = self._task_cache_key(task_id, expand, comments_limit) if self.cache is not None else None
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if not cached or (expand and not task_visible_to(caller, cached[1])):
+            return None
+        return cached[0]
+
+    async def _with_details(
+        self,
+        tasks: list[Task],
+        task_dtos: list[TaskDTO],
+        include: Sequence[TaskIncludeEnum],
+        expand: Sequence[TaskExpandEnum],
+        comments_limit: int,
+    ) -> list[TaskDTO]:
+        if not (include or expand) or not tasks:
+            return task_dtos
+
+        # users come joined into the task query; stats and comments take one query each for all tasks
+        task_ids = [task.id for task in tasks]
+        stats = await self.repository.get_comment_stats(task_ids) if TaskIncludeEnum.comment_stats in include else None
+        comments = await self.repository.get_latest_comments(task_ids, comments_limit) if TaskExpandEnum.comments in expand else None
+
+        details = []
+        for task, task_dto in zip(tasks, task_dtos):
+            detail = TaskDetailsDTO(**vars(task_dto))
+            if stats is not None:
+                task_stats = stats.get(task.id, CommentStatsDTO(comment_count=0, last_comment_at=None))
+                detail.comment_count = task_stats.comment_count
+                detail.last_comment_at = task_stats.last_comment_at
+            if TaskExpandEnum.employee in expand:
+                detail.employee = task_user_dto(task.employee)
+            if TaskExpandEnum.manager in expand:
+                detail.manager = task_user_dto(task.manager)
+            if comments is not None:
+                detail.comments = [
+                    TaskCommentDTO(id=comment.id, text=comment.text, created_at=comment.created_at, user_id=comment.user_id)
+                    for comment in comments.get(task.id, [])
+                ]
+            details.append(detail)
+        return details
+
+    async def get_task(
+        self,
+        caller,
+        task_id: UUID,
+        expand: Sequence[TaskExpandEnum] = (),
+        comments_limit: int = DEFAULT_EXPANDED_COMMENTS,
+    ) -> Optional[TaskDTO]:
+        logger.info(f"User {caller.id} fetching task with ID: {task_id} (expand={[e.value for e in expand]})")
+        # the key is taken before the read so a write landing meanwhile leaves this result under the stale generation
+        cache_key = self._task_cache_key(task_id, expand, comments_limit) if self.cache is not None else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached:
+                self._check_expand_visible(caller, cached[1], expand)
+                logger.info(f"Task {task_id} served from cache")
+                return cached[1]
+
+        task = await self.repository.get(task_id, expand)
         if not task:
             logger.warning(f"Task {task_id} not found")
             raise ValueError("Task not found")
+        self._check_expand_visible(caller, task, expand)
 
         logger.info(f"Task {task_id} retrieved successfully")
-        return TaskDTO(title=task.title, description=task.description, status=task.status, progress=task.progress, manager_id=task.manager_id, employee_id=task.employee_id, deadline=task.deadline, created_at=task.created_at, id=task.id)
+        task_dto = TaskDTO(title=task.title, description=task.description, status=task.status, progress=task.progress, manager_id=task.manager_id, employee_id=task.employee_id, deadline=task.deadline, created_at=task.created_at, id=task.id)
+        task_dto, = await self._with_details([task], [task_dto], (), expand, comments_limit)
+        if cache_key is not None:
+            self.cache.set(cache_key, task_dto)
+        return task_dto
+
+    @staticmethod
+    def _check_expand_visible(caller, task, expand: Sequence[TaskExpandEnum]) -> None:
+        # the plain task is readable by id; its people and comments are only for those who can list it
+        if expand and not task_visible_to(caller, task):
+            logger.warning(f"User {caller.id} denied: Cannot expand task {task.id}")
+            raise PermissionError("Can not expand others task")
+
+    def _invalidate(self, task: Task) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(task.id)
+            self.cache.invalidate(team_stats_scope(task.manager_id))
 
     async def get_tasks(
         self,
         caller,
         skip: int = 0,
         limit: int = 10,
-    ) -> tuple[int, list[TaskDTO]]:
-        logger.info(f"User {caller.id} fetching tasks (skip={skip}, limit={limit})")
-        tasks, total = await self.repository.get_all(caller, skip=skip, limit=limit)
-        logger.info(f"Retrieved {len(tasks)} tasks, total: {total}")
-        return (
-            total,
-            [
-                TaskDTO(
-                    title=task.title,
-                    description=task.description,
-                    status=task.status,
-                    progress=task.progress,
-                    employee_id=task.employee_id,
-                    manager_id=task.manager_id,
-                    deadline=task.deadline,
-                    created_at=task.created_at,
-                    id=task.id
-                ) for task in tasks
-            ]
+        cursor: Optional[str] = None,
+        total_mode: TotalModeEnum = TotalModeEnum.exact,
+        include: Sequence[TaskIncludeEnum] = (),
+        expand: Sequence[TaskExpandEnum] = (),
+        comments_limit: int = DEFAULT_EXPANDED_COMMENTS,
+        filters: Optional[TaskFilterDTO] = None,
+        sort: TaskSortEnum = TaskSortEnum.created_at,
+        order: SortOrderEnum = SortOrderEnum.desc,
+    ) -> tuple[Optional[int], list[TaskDTO], Optional[str]]:
+        logger.info(f"User {caller.id} fetching tasks (skip={skip}, limit={limit}, cursor={cursor}, total={total_mode.value}, include={[i.value for i in include]}, expand={[e.value for e in expand]}, filters={filters}, sort={sort.value} {order.value})")
+        if filters is not None:
+            self._check_filters(caller, filters)
+
+        tasks, total = await self.repository.get_all(
+            caller,
+            skip=skip,
+            limit=limit + 1,
+            cursor=decode_sort_cursor(cursor, TASK_SORT_VALUE_PARSERS[sort], nullable=sort == TaskSortEnum.deadline) if cursor else None,
+            total_mode=total_mode,
+            expand=expand,
+            filters=filters,
+            sort=sort,
+            order=order,
         )
+        tasks, next_cursor = next_page_cursor(tasks, limit, sort.value)
+        logger.info(f"Retrieved {len(tasks)} tasks, total: {total}")
+        task_dtos = [
+            TaskDTO(
+                title=task.title,
+                description=task.description,
+                status=task.status,
+                progress=task.progress,
+                employee_id=task.employee_id,
+                manager_id=task.manager_id,
+                deadline=task.deadline,
+                created_at=task.created_at,
+                id=task.id
+            ) for task in tasks
+        ]
+
+        return total, await self._with_details(tasks, task_dtos, include, expand, comments_limit), next_cursor
+
+    @staticmethod
+    def _check_filters(caller, filters: TaskFilterDTO) -> None:
+        if filters.employee_id is not None and caller.role != "manager" and not caller.is_superuser:
+            raise InvalidTaskFilterError("Only managers can filter by employee")
+        if filters.deadline_from is not None and filters.deadline_to is not None and filters.deadline_from > filters.deadline_to:
+            raise InvalidTaskFilterError("deadline_from is after deadline_to")
+        if filters.progress_min is not None and filters.progress_max is not None and filters.progress_min > filters.progress_max:
+            raise InvalidTaskFilterError("progress_min is greater than progress_max")
+
+    async def export_tasks(self, caller, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[list[TaskDTO]]:
+        logger.info(f"User {caller.id} exporting tasks")
+        exported = 0
+        async for rows in self.repository.stream_all(caller, batch_size):
+            exported += len(rows)
+            yield [TaskDTO(**row._mapping) for row in rows]
+        logger.info(f"Exported {exported} tasks for user {caller.id}")
 
     async def update_task(self, caller, task_id: UUID, task_update: TaskUpdateDTO) -> TaskDTO:
         logger.info(f"User {caller.id} attempting to update task {task_id}")
-        db_task = await self.repository.get(task_id)
-        if not db_task:
-            logger.warning(f"Task {task_id} not found")
-            raise ValueError("Task not found")
-
         if caller.role == "employee" and not caller.is_superuser:
-            if db_task.employee_id != caller.id:
-                logger.warning(f"User {caller.id} denied: Cannot update task {task_id} owned by {db_task.manager_id}")
-                raise PermissionError("Can not update others person task")
-
             allowed_fields = {"status", "progress"}
             for field, value in task_update.__dict__.items():
                 if value is not None and field not in allowed_fields:
                     logger.error(f"User {caller.id} denied: Cannot update {field}")
                     raise PermissionError("Employees can update only status or progress")
+            owner = {"employee_id": caller.id}
 
         elif caller.role != "manager" and not caller.is_superuser:
             logger.warning(f"User {caller.id} denied: Only managers can update tasks")
             raise OnlyManagerCanUpdateTaskError
 
-        update_task = await self.repository.update(task_id, task_update)
+        else:
+            owner = {} if caller.is_superuser else {"manager_id": caller.id}
+
+        exists, update_task = await self.repository.update_if_owner(task_id, task_update, **owner)
+        if update_task is not None:
+            self._invalidate(update_task)
+
+        if not exists:
+            logger.warning(f"Task {task_id} not found")
+            raise ValueError("Task not found")
+
+        if update_task is None:
+            logger.warning(f"User {caller.id} denied: Cannot update task {task_id}")
+            raise PermissionError("Can not update others person task")
+
         logger.info(f"Task {task_id} updated successfully")
+        await self._publish(ChangeEventTypeEnum.task_updated, update_task)
         return TaskDTO(title=update_task.title, description=update_task.description, status=update_task.status,
                        progress=update_task.progress, employee_id=update_task.employee_id, deadline=update_task.deadline,
                        created_at=update_task.created_at, id=update_task.id, manager_id=update_task.manager_id)
 
     async def delete_task(self, caller, task_id: UUID) -> bool:
         logger.info(f"User {caller.id} attempting to delete task {task_id}")
-        db_task = await self.repository.get(task_id)
-        if not db_task:
+        if caller.role != "manager" and not caller.is_superuser:
+            logger.warning(f"User {caller.id} denied: Only managers can delete tasks")
+            raise OnlyManagerCanDeleteTaskError("Only managers can delete task")
+
+        exists, deleted_task = await self.repository.delete_if_owner(task_id, caller.id)
+        is_deleted = deleted_task is not None
+        if is_deleted:
+            # comments go with the task, so this also drops its cached comment pages
+            self._invalidate(deleted_task)
+
+        if not exists:
             logger.warning(f"Task {task_id} not found")
             raise ValueError("Task not found")
 
-        if db_task.manager_id != caller.id:
-            logger.warning(f"User {caller.id} denied: Cannot delete task {task_id} owned by {db_task.manager_id}")
+        if not is_deleted:
+            logger.warning(f"User {caller.id} denied: Cannot delete task {task_id}")
             raise PermissionError("Can not delete others person task")
 
-        if caller.role != "manager" and not caller.is_superuser:
-            logger.warning(f"User {caller.id} denied: Only managers can delete tasks")
-            raise OnlyManagerCanDeleteTaskError("Only managers can delete task")
-
-        is_deleted = await self.repository.delete(task_id)
         logger.info(f"Task {task_id} deleted: {is_deleted}")
+        await self._publish(ChangeEventTypeEnum.task_deleted, deleted_task)
         return is_deleted
@@ -0,0 +1,89 @@
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional, Protocol
+from uuid import UUID
+
+from skill_tracker.db_access.models import UserRoleEnum
+
+
+class UserCache(Protocol):
+    """Column snapshots of users keyed by id, consulted before the users table on every authenticated request."""
+
+    async def get(self, user_id: UUID) -> Optional[dict[str, Any]]:
+        raise NotImplementedError
+
+    async def set(self, user_id: UUID, values: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def delete(self, user_id: UUID) -> None:
+        raise NotImplementedError
+
+
+class InMemoryUserCache(UserCache):
+    """Per-process LRU with a TTL; the TTL bounds how long other workers keep serving a changed user."""
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: OrderedDict[UUID, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    async def get(self, user_id: UUID) -> Optional[dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+
+        expires_at, values = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+
+        self._entries.move_to_end(user_id)
+        return values
+
+    async def set(self, user_id: UUID, values: dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0 or self.max_size <= 0:
+            return
+
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, values)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, user_id: UUID) -> None:
+        self._entries.pop(user_id, None)
+
+
+class RedisUserCache(UserCache):
+    """Shared across workers, so an invalidation on one worker is seen by all of them."""
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "skill_tracker:user:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("The redis user cache backend requires the 'redis' package") from e
+
+        self.client = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def get(self, user_id: UUID) -> Optional[dict[str, Any]]:
+        raw = await self.client.get(f"{self.prefix}{user_id}")
+        if raw is None:
+            return None
+
+        values = json.loads(raw)
+        values["id"] = UUID(values["id"])
+        values["role"] = UserRoleEnum(values["role"])
+        values["created_at"] = datetime.fromisoformat(values["created_at"])
+        return values
+
+    async def set(self, user_id: UUID, values: dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+
+        await self.client.set(f"{self.prefix}{user_id}", json.dumps(values, default=str), px=int(self.ttl_seconds * 1000))
+
+    async def delete(self, user_id: UUID) -> None:
+        await self.client.delete(f"{self.prefix}{user_id}")
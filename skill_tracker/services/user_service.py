@@ -3,10 +3,17 @@ from uuid import UUID
 
 from fastapi import Request
 from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin, schemas
+from fastapi_users.password import PasswordHelperProtocol
 from loguru import logger
 from pydantic import BaseModel, Field
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
 
 from skill_tracker.db_access.models import User, UserRoleEnum
+from skill_tracker.metrics import instrument_service
+from skill_tracker.services.pagination import TotalModeEnum
+from skill_tracker.services.read_cache import ReadCache
+from skill_tracker.services.user_cache import UserCache
 
 
 class MainUser(BaseModel):
@@ -31,24 +38,92 @@ class OnlyManagerCanGetEmployeesError(Exception):
     pass
 
 
+def expanded_users_scope() -> str:
+    """Read cache scope of the user fields that expanded tasks carry; user writes invalidate it."""
+    return "users"
+
+
 class UserGateway(Protocol):
     def get_user_db(self):
         raise NotImplementedError
 
     async def get_employees(
-        self, skip: int = 0, limit: int = 10
-    ) -> tuple[list[User], int]:
+        self, skip: int = 0, limit: int = 10, total_mode: TotalModeEnum = TotalModeEnum.exact
+    ) -> tuple[list[User], Optional[int]]:
         raise NotImplementedError
 
     async def get_user(self, user_id: UUID) -> Optional[User]:
         raise NotImplementedError
 
+    async def get_users(self, user_ids: list[UUID]) -> list[User]:
+        raise NotImplementedError
+
 
 class UserManager(UUIDIDMixin, BaseUserManager[User, UUID]):
-    def __init__(self, db, secret: str):
-        super().__init__(db)
+    def __init__(
+        self,
+        db,
+        secret: str,
+        user_cache: Optional[UserCache] = None,
+        password_helper: Optional[PasswordHelperProtocol] = None,
+        read_cache: Optional[ReadCache] = None,
+    ):
+        super().__init__(db, password_helper)
         self.reset_password_token_secret = secret
         self.verification_token_secret = secret
+        self.user_cache = user_cache
+        self.read_cache = read_cache
+        self.read_through = False
+
+    async def get(self, id: UUID) -> User:
+        if self.user_cache is None or self.read_through:
+            return await super().get(id)
+
+        values = await self.user_cache.get(id)
+        if values is None:
+            user = await super().get(id)
+            # the password hash stays out of the cache; paths that check it load the user from the database
+            await self.user_cache.set(id, {
+                attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs if attr.key != "hashed_password"
+            })
+            return user
+
+        # rebuild a clean persistent instance in this request's session without touching the database
+        user = User(**values)
+        make_transient_to_detached(user)
+        return await self.user_db.session.merge(user, load=False)
+
+    async def reset_password(self, token: str, password: str, request: Optional[Request] = None) -> User:
+        # the token carries a fingerprint of the stored hash, so the user is read past the cache
+        self.read_through = True
+        try:
+            return await super().reset_password(token, password, request)
+        finally:
+            self.read_through = False
+
+    async def update(self, user_update: schemas.BaseUserUpdate, user: User, safe: bool = False, request: Optional[Request] = None) -> User:
+        if user_update.password is not None and "hashed_password" in inspect(user).unloaded:
+            # a user rebuilt from the cache has no hash loaded; take the stored row before replacing it
+            await self.user_db.session.refresh(user)
+        return await super().update(user_update, user, safe, request)
+
+    async def invalidate(self, user: User) -> None:
+        if self.user_cache is not None:
+            await self.user_cache.delete(user.id)
+        if self.read_cache is not None:
+            self.read_cache.invalidate(expanded_users_scope())
+
+    async def on_after_update(self, user: User, update_dict: dict, request: Optional[Request] = None):
+        await self.invalidate(user)
+
+    async def on_after_verify(self, user: User, request: Optional[Request] = None):
+        await self.invalidate(user)
+
+    async def on_after_reset_password(self, user: User, request: Optional[Request] = None):
+        await self.invalidate(user)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        await self.invalidate(user)
 
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         logger.info(f"User {user.id} has registered.")
@@ -64,6 +139,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, UUID]):
         logger.info(f"Verification requested for user {user.id}. Verification token: {token}")
 
 
+@instrument_service
 class UserService:
     def __init__(self, repository: UserGateway, fastapi_users: FastAPIUsers[User, UUID]):
         self.repository = repository
@@ -73,13 +149,14 @@ class UserService:
         self,
         caller,
         skip: int = 0,
-        limit: int = 10
-    ) -> tuple[int, list[User]]:
-        logger.info(f"User {caller.id} requesting employees (skip={skip}, limit={limit})")
+        limit: int = 10,
+        total_mode: TotalModeEnum = TotalModeEnum.exact,
+    ) -> tuple[Optional[int], list[User]]:
+        logger.info(f"User {caller.id} requesting employees (skip={skip}, limit={limit}, total={total_mode.value})")
         if caller.role != "manager" and not caller.is_superuser:
             logger.warning(f"User {caller.id} denied: Only managers can get employees")
             raise OnlyManagerCanGetEmployeesError("Only managers can get employees")
 
-        employees, total = await self.repository.get_employees(skip=skip, limit=limit)
+        employees, total = await self.repository.get_employees(skip=skip, limit=limit, total_mode=total_mode)
         logger.info(f"Retrieved {len(employees)} employees, total: {total}")
         return total, [employee for employee in employees]
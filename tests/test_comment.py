@@ -1,11 +1,25 @@
+import gzip
+import json
 import uuid
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from skill_tracker.controllers.comment import CommentCreate
-from skill_tracker.db_access.models import Comment
+from skill_tracker.db_access.models import Comment, Task, User, UserRoleEnum
+from skill_tracker.db_access.repositories.comment_repository import CommentRepository
+from skill_tracker.db_access.repositories.task_repository import TaskRepository
+from skill_tracker.db_access.session_router import SessionRouter
+from skill_tracker.services.comment_service import (
+    COMMENT_EXPORT_COLUMNS,
+    CommentCreateDTO,
+    CommentService,
+    CommentUpdateDTO,
+)
+from skill_tracker.services.export import ExportFormatEnum, encode_export
+from skill_tracker.services.read_cache import ReadCache
 
 
 @pytest.mark.asyncio
@@ -75,3 +89,99 @@ async def test_get_comment(test_client: AsyncClient, db_session: AsyncSession, e
 
     response = await test_client.get(f'/api/v1/comments/{existing_comment.id}')
     assert response.status_code != 200
+
+
+@pytest.mark.asyncio
+async def test_comment_list_queries_use_indexes(db_session: AsyncSession):
+    # empty tables: take full scans off the table so the planner reveals whether the index fits
+    for setting in ('enable_seqscan', 'enable_bitmapscan', 'enable_sort'):
+        await db_session.execute(text(f'SET LOCAL {setting} = off'))
+    result = await db_session.execute(
+        text('EXPLAIN SELECT * FROM comments WHERE task_id = :task_id ORDER BY created_at DESC, id DESC LIMIT 11'),
+        {'task_id': uuid.uuid4()},
+    )
+    plan = '\n'.join(result.scalars().all())
+    assert 'Index Scan using ix_comments_task_id_created_at_id' in plan
+    assert 'Sort' not in plan
+
+
+@pytest.mark.asyncio
+async def test_comment_writes_tell_missing_from_forbidden(db_session: AsyncSession, manager_and_employee):
+    manager, author = await manager_and_employee('comment')
+    task = Task(title="commented", employee_id=author.id, manager_id=manager.id)
+    db_session.add(task)
+    await db_session.flush()
+    comment = Comment(text='mine', task_id=task.id, user_id=author.id)
+    db_session.add(comment)
+    await db_session.flush()
+    service = CommentService(CommentRepository(SessionRouter(db_session)), TaskRepository(SessionRouter(db_session)))
+
+    with pytest.raises(ValueError):
+        await service.update_comment(author, uuid.uuid4(), CommentUpdateDTO(text='missing'))
+    with pytest.raises(PermissionError):
+        await service.update_comment(manager, comment.id, CommentUpdateDTO(text='not mine'))
+    assert (await service.update_comment(author, comment.id, CommentUpdateDTO(text='edited'))).text == 'edited'
+
+    with pytest.raises(PermissionError):
+        await service.delete_comment(manager, comment.id)
+    assert await service.delete_comment(author, comment.id)
+    with pytest.raises(ValueError):
+        await service.delete_comment(author, comment.id)
+
+
+@pytest.mark.asyncio
+async def test_task_comments_are_cached_until_written(db_session: AsyncSession, manager_and_employee):
+    manager, author = await manager_and_employee('cached')
+    task = Task(title="polled", employee_id=author.id, manager_id=manager.id)
+    db_session.add(task)
+    await db_session.flush()
+    service = CommentService(CommentRepository(SessionRouter(db_session)), TaskRepository(SessionRouter(db_session)), ReadCache(ttl_seconds=60, max_size=100))
+
+    total, comments, _ = await service.get_comments(task_id=task.id)
+    assert (total, comments) == (0, [])
+    etag = service.comments_etag(task_id=task.id)
+    assert etag is not None
+    assert service.comments_etag(task_id=task.id, limit=20) is None
+    assert service.comments_etag() is None
+
+    comment = await service.create_comment(CommentCreateDTO(text='first', task_id=task.id, user_id=author.id))
+    assert service.comments_etag(task_id=task.id) is None
+    total, comments, _ = await service.get_comments(task_id=task.id)
+    assert total == 1
+    etag = service.comments_etag(task_id=task.id)
+
+    await service.update_comment(author, comment.id, CommentUpdateDTO(text='edited'))
+    assert service.comments_etag(task_id=task.id) is None
+    assert (await service.get_comments(task_id=task.id))[1][0].text == 'edited'
+    assert service.comments_etag(task_id=task.id) != etag
+
+    await service.delete_comment(author, comment.id)
+    assert service.comments_etag(task_id=task.id) is None
+
+
+@pytest.mark.asyncio
+async def test_export_comments_is_scoped_to_visible_tasks(db_session: AsyncSession):
+    author = User(email='export-author@example.com', hashed_password='x', given_name='A', family_name='A', role=UserRoleEnum.employee)
+    manager = User(email='export-comments-manager@example.com', hashed_password='x', given_name='M', family_name='M', role=UserRoleEnum.manager)
+    other_manager = User(email='export-comments-other@example.com', hashed_password='x', given_name='O', family_name='O', role=UserRoleEnum.manager)
+    db_session.add_all([author, manager, other_manager])
+    await db_session.flush()
+    mine = Task(title="mine", employee_id=author.id, manager_id=manager.id)
+    theirs = Task(title="theirs", employee_id=author.id, manager_id=other_manager.id)
+    db_session.add_all([mine, theirs])
+    await db_session.flush()
+    db_session.add_all([Comment(text='a, "quoted"', task_id=mine.id, user_id=author.id), Comment(text='b', task_id=theirs.id, user_id=author.id)])
+    await db_session.flush()
+    service = CommentService(CommentRepository(SessionRouter(db_session)), TaskRepository(SessionRouter(db_session)))
+
+    export = b"".join([chunk async for chunk in encode_export(service.export_comments(manager), COMMENT_EXPORT_COLUMNS, ExportFormatEnum.csv)]).decode()
+    header, row = export.splitlines()
+    assert header == ",".join(COMMENT_EXPORT_COLUMNS)
+    assert '"a, ""quoted"""' in row and str(mine.id) in row
+
+    compressed = b"".join([chunk async for chunk in encode_export(service.export_comments(author), COMMENT_EXPORT_COLUMNS, ExportFormatEnum.ndjson, compress=True)])
+    assert sorted(json.loads(line)["text"] for line in gzip.decompress(compressed).splitlines()) == ['a, "quoted"', 'b']
+
+    nobody = User(id=uuid.uuid4(), role=UserRoleEnum.manager)
+    empty = b"".join([chunk async for chunk in encode_export(service.export_comments(nobody), COMMENT_EXPORT_COLUMNS, ExportFormatEnum.csv)])
+    assert empty.decode().splitlines() == [",".join(COMMENT_EXPORT_COLUMNS)]
@@ -0,0 +1,137 @@
+import asyncio
+import uuid
+
+import asyncpg
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from skill_tracker.config import Config
+from skill_tracker.controllers.stream import event_stream
+from skill_tracker.db_access.models import Task, User, UserRoleEnum
+from skill_tracker.db_access.notify import PostgresEventTransport
+from skill_tracker.db_access.repositories.comment_repository import CommentRepository
+from skill_tracker.db_access.repositories.task_repository import TaskRepository
+from skill_tracker.db_access.repositories.user_repository import UserRepository
+from skill_tracker.db_access.session_router import SessionRouter
+from skill_tracker.services.comment_service import CommentCreateDTO, CommentService, CommentUpdateDTO
+from skill_tracker.services.events import ChangeEvent, ChangeEventTypeEnum, EventBroker
+from skill_tracker.services.task_service import TaskService, TaskUpdateDTO
+
+
+@pytest.mark.asyncio
+async def test_writes_are_published_to_task_participants(db_session: AsyncSession, manager_and_employee):
+    manager, employee = await manager_and_employee('events')
+    outsider = User(email='events-outsider@example.com', hashed_password='x', given_name='O', family_name='O', role=UserRoleEnum.employee)
+    db_session.add(outsider)
+    await db_session.flush()
+    task = Task(title="watched", employee_id=employee.id, manager_id=manager.id)
+    db_session.add(task)
+    await db_session.flush()
+
+    broker = EventBroker()
+    tasks = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)), events=broker)
+    comments = CommentService(CommentRepository(SessionRouter(db_session)), TaskRepository(SessionRouter(db_session)), events=broker)
+
+    with broker.subscribe(manager.id) as manager_queue, broker.subscribe(employee.id) as employee_queue, broker.subscribe(outsider.id) as outsider_queue:
+        await tasks.update_task(employee, task.id, TaskUpdateDTO(progress=50))
+        comment = await comments.create_comment(CommentCreateDTO(text='done soon', task_id=task.id, user_id=employee.id))
+        await comments.update_comment(employee, comment.id, CommentUpdateDTO(text='done'))
+        await comments.delete_comment(employee, comment.id)
+        await tasks.delete_task(manager, task.id)
+
+        for queue in (manager_queue, employee_queue):
+            received = [queue.get_nowait() for _ in range(queue.qsize())]
+            assert [event.type for event in received] == [
+                ChangeEventTypeEnum.task_updated,
+                ChangeEventTypeEnum.comment_created,
+                ChangeEventTypeEnum.comment_updated,
+                ChangeEventTypeEnum.comment_deleted,
+                ChangeEventTypeEnum.task_deleted,
+            ]
+            assert {event.task_id for event in received} == {task.id}
+            assert {event.comment_id for event in received[1:4]} == {comment.id}
+        assert outsider_queue.empty()
+
+    assert broker.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest_events():
+    broker = EventBroker(queue_size=2)
+    user_id = uuid.uuid4()
+    with broker.subscribe(user_id) as queue:
+        for event_type in (ChangeEventTypeEnum.task_created, ChangeEventTypeEnum.task_updated, ChangeEventTypeEnum.task_deleted):
+            await broker.publish(ChangeEvent(type=event_type, task_id=uuid.uuid4(), manager_id=user_id, employee_id=uuid.uuid4()))
+        assert [queue.get_nowait().type for _ in range(queue.qsize())] == [ChangeEventTypeEnum.task_updated, ChangeEventTypeEnum.task_deleted]
+
+
+@pytest.mark.asyncio
+async def test_event_stream_formats_events_and_keepalives():
+    broker = EventBroker()
+    user_id = uuid.uuid4()
+    stream = event_stream(broker, user_id, keepalive_seconds=0.05)
+    assert await anext(stream) == ": connected\n\n"
+    assert await anext(stream) == ": keepalive\n\n"
+
+    event = ChangeEvent(type=ChangeEventTypeEnum.task_updated, task_id=uuid.uuid4(), manager_id=user_id, employee_id=uuid.uuid4())
+    await broker.publish(event)
+    chunk = await anext(stream)
+    assert chunk.startswith("event: task.updated\ndata: {")
+    assert str(event.task_id) in chunk
+
+    await stream.aclose()
+    assert broker.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_postgres_transport_fans_out_between_brokers(cfg: Config):
+    channel = f"test_events_{uuid.uuid4().hex}"
+    sender = EventBroker(transport=PostgresEventTransport(cfg.db.dsn, channel))
+    receiver = EventBroker(transport=PostgresEventTransport(cfg.db.dsn, channel))
+    await sender.start()
+    await receiver.start()
+    try:
+        employee_id = uuid.uuid4()
+        event = ChangeEvent(type=ChangeEventTypeEnum.comment_created, task_id=uuid.uuid4(), manager_id=uuid.uuid4(), employee_id=employee_id, comment_id=uuid.uuid4())
+        with sender.subscribe(employee_id) as own_queue, receiver.subscribe(employee_id) as other_queue:
+            await sender.publish(event)
+            assert await asyncio.wait_for(other_queue.get(), 5) == event
+            assert await asyncio.wait_for(own_queue.get(), 5) == event
+    finally:
+        await sender.close()
+        await receiver.close()
+
+
+@pytest.mark.asyncio
+async def test_postgres_transport_listens_again_after_its_connection_is_terminated(cfg: Config):
+    channel = f"test_events_{uuid.uuid4().hex}"
+    sender = EventBroker(transport=PostgresEventTransport(cfg.db.dsn, channel))
+    receiver = EventBroker(transport=PostgresEventTransport(cfg.db.dsn, channel, reconnect_delay=0.05))
+    await sender.start()
+    await receiver.start()
+    admin = await asyncpg.connect(cfg.db.dsn)
+    try:
+        employee_id = uuid.uuid4()
+        with receiver.subscribe(employee_id) as queue:
+            await admin.execute("SELECT pg_terminate_backend($1)", receiver.transport._connection.get_server_pid())
+
+            # until the listener is back its own events still reach its subscribers
+            local = ChangeEvent(type=ChangeEventTypeEnum.task_updated, task_id=uuid.uuid4(), manager_id=uuid.uuid4(), employee_id=employee_id)
+            await asyncio.sleep(0)
+            await receiver.publish(local)
+            assert await asyncio.wait_for(queue.get(), 5) == local
+
+            remote = ChangeEvent(type=ChangeEventTypeEnum.task_created, task_id=uuid.uuid4(), manager_id=uuid.uuid4(), employee_id=employee_id)
+            for _ in range(50):
+                await sender.publish(remote)
+                try:
+                    assert await asyncio.wait_for(queue.get(), 0.1) == remote
+                    break
+                except asyncio.TimeoutError:
+                    continue
+            else:
+                pytest.fail("delivery did not resume after the listener reconnected")
+    finally:
+        await admin.close()
+        await sender.close()
+        await receiver.close()
@@ -0,0 +1,93 @@
+import asyncio
+import io
+import json
+import logging
+import sys
+import threading
+
+import pytest
+from loguru import logger
+
+from skill_tracker.config import LoggingConfig
+from skill_tracker.log_config import BackgroundSink, close_logging, setup_logging
+
+
+@pytest.fixture
+def restore_logging():
+    root_handlers = logging.root.handlers[:]
+    root_level = logging.root.level
+    yield
+    logger.remove()
+    close_logging()
+    logger.add(sys.stderr)
+    logging.root.handlers = root_handlers
+    logging.root.setLevel(root_level)
+
+
+@pytest.mark.asyncio
+async def test_setup_logging_writes_sampled_json_lines(restore_logging):
+    sink = io.StringIO()
+    setup_logging(LoggingConfig(level="DEBUG", enqueue=True, sample_rates={"info": 0.0}), sink)
+
+    logger.bind(request_id="r1").warning("Task {} not found", 42)
+    logger.info("dropped by sampling")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Failed")
+    logging.getLogger("uvicorn.error").debug("Started server process")
+    await logger.complete()
+
+    records = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert [(r["level"], r["message"]) for r in records] == [
+        ("WARNING", "Task 42 not found"),
+        ("ERROR", "Failed"),
+        ("DEBUG", "Started server process"),
+    ]
+    assert records[0]["request_id"] == "r1"
+    assert records[0]["function"] == "test_setup_logging_writes_sampled_json_lines"
+    assert "ValueError: boom" in records[1]["exception"]
+    # stdlib records point at their caller, not at the intercepting handler
+    assert records[2]["function"] == "test_setup_logging_writes_sampled_json_lines"
+
+
+def log_writers() -> list[threading.Thread]:
+    return [thread for thread in threading.enumerate() if thread.name == "log-writer"]
+
+
+def test_setup_logging_keeps_one_writer_thread(restore_logging):
+    first, second = io.StringIO(), io.StringIO()
+    cfg = LoggingConfig(enqueue=True)
+    setup_logging(cfg, first)
+    setup_logging(cfg, first)
+    [writer] = log_writers()
+
+    setup_logging(cfg, second)
+    assert not writer.is_alive()
+    assert len(log_writers()) == 1
+
+    logger.info("queued")
+    close_logging()
+    assert log_writers() == []
+    logger.info("after shutdown")
+    assert [json.loads(line)["message"] for line in second.getvalue().splitlines()] == ["queued", "after shutdown"]
+
+
+@pytest.mark.asyncio
+async def test_background_sink_keeps_lines_written_while_it_closes():
+    stream = io.StringIO()
+    sink = BackgroundSink(stream, max_pending=16)
+
+    def write(writer: int) -> None:
+        for i in range(2000):
+            sink.write(f"{writer}-{i}\n")
+
+    writers = [threading.Thread(target=write, args=(writer,)) for writer in range(4)]
+    for thread in writers:
+        thread.start()
+    sink.close()
+    for thread in writers:
+        thread.join()
+
+    await asyncio.wait_for(sink.complete(), timeout=5)
+    assert sorted(stream.getvalue().splitlines()) == sorted(f"{writer}-{i}" for writer in range(4) for i in range(2000))
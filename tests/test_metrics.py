@@ -0,0 +1,60 @@
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from skill_tracker.db_access.instrumentation import QueryCounter, current_query_counter, fingerprint
+from skill_tracker.db_access.models import User, UserRoleEnum
+from skill_tracker.db_access.repositories.task_repository import TaskRepository
+from skill_tracker.db_access.repositories.user_repository import UserRepository
+from skill_tracker.db_access.session_router import SessionRouter
+from skill_tracker.services.task_service import TaskService
+
+
+def sample(name: str, labels: dict = None) -> float:
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_service_methods_and_queries_are_measured(engine: AsyncEngine, db_session: AsyncSession):
+    manager = User(email='metrics-manager@example.com', hashed_password='x', given_name='M', family_name='M', role=UserRoleEnum.manager)
+    db_session.add(manager)
+    await db_session.flush()
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)))
+    method_labels = {"service": "TaskService", "method": "get_tasks"}
+    calls_before = sample("skill_tracker_service_method_duration_seconds_count", method_labels)
+    checkouts_before = sample("skill_tracker_db_pool_checkout_wait_seconds_count")
+
+    counter = QueryCounter()
+    token = current_query_counter.set(counter)
+    try:
+        await service.get_tasks(manager)
+        await db_session.execute(text("SELECT 1"))
+    finally:
+        current_query_counter.reset(token)
+
+    assert counter.count == 2
+    assert sample("skill_tracker_service_method_duration_seconds_count", method_labels) == calls_before + 1
+    assert sample("skill_tracker_db_query_duration_seconds_count", {"statement": "SELECT ?"}) >= 1
+
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    assert sample("skill_tracker_db_pool_checkout_wait_seconds_count") > checkouts_before
+
+
+def test_fingerprint_collapses_literals_and_lists():
+    assert fingerprint("SELECT *\n  FROM tasks WHERE id IN ($1::UUID, $2::UUID) AND title = 'a''b' LIMIT $3") == (
+        "SELECT * FROM tasks WHERE id IN (...) AND title = ? LIMIT ?"
+    )
+    assert fingerprint("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4)") == "INSERT INTO t (a, b) VALUES (...)"
+
+
+@pytest.mark.asyncio
+async def test_queries_per_request_are_recorded_by_route(test_client: AsyncClient):
+    labels = {"method": "GET", "route": "/api/v1/health"}
+    before = sample("skill_tracker_db_queries_per_request_count", labels)
+    response = await test_client.get("/api/v1/health")
+    assert response.status_code == 200
+    assert sample("skill_tracker_db_queries_per_request_count", labels) == before + 1
+    assert sample("skill_tracker_db_queries_per_request_sum", labels) == 0
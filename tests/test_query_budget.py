@@ -0,0 +1,164 @@
+from uuid import UUID
+
+import pytest
+import pytest_asyncio
+from dishka import AsyncContainer
+from dishka.integrations.fastapi import setup_dishka
+from fastapi import FastAPI
+from fastapi_users.authentication import JWTStrategy
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from skill_tracker.controllers.comment import get_comments_controller
+from skill_tracker.controllers.middleware import (
+    QueryBudgetExceededError,
+    QueryMetricsMiddleware,
+    query_budget,
+)
+from skill_tracker.controllers.task import get_tasks_controller
+from skill_tracker.db_access.models import User, UserRoleEnum
+
+BASE_URL = "http://test"
+
+
+@pytest_asyncio.fixture(scope="module")
+async def budget_app(ioc_container: AsyncContainer, _make_migrations) -> FastAPI:
+    # the routers without the rest of create_app, whose Prometheus instrumentator can only be set up once per process
+    app = FastAPI()
+    app.add_middleware(QueryMetricsMiddleware, strict=True)
+    setup_dishka(container=ioc_container, app=app)
+    app.include_router(await get_tasks_controller(ioc_container))
+    app.include_router(await get_comments_controller(ioc_container))
+    return app
+
+
+@pytest_asyncio.fixture(scope="module")
+async def budget_client(budget_app: FastAPI) -> AsyncClient:
+    async with AsyncClient(transport=ASGITransport(app=budget_app), base_url=BASE_URL) as client:
+        yield client
+
+
+async def bearer(ioc_container: AsyncContainer, user: User) -> dict:
+    strategy = await ioc_container.get(JWTStrategy[User, UUID])
+    return {"Authorization": f"Bearer {await strategy.write_token(user)}"}
+
+
+@pytest.mark.asyncio
+async def test_task_and_comment_routes_stay_within_query_budget(
+        ioc_container: AsyncContainer, db_session: AsyncSession, budget_client: AsyncClient, manager_and_employee
+):
+    manager, employee = await manager_and_employee('budget')
+    reader = User(email='budget-reader@example.com', hashed_password='x', given_name='R', family_name='R', role=UserRoleEnum.employee)
+    db_session.add(reader)
+    await db_session.commit()
+    as_manager = await bearer(ioc_container, manager)
+    as_employee = await bearer(ioc_container, employee)
+    as_reader = await bearer(ioc_container, reader)
+    details = {"expand": ["comments", "employee", "manager"], "include": "comment_stats"}
+
+    # every call below fails with QueryBudgetExceededError if its route runs more statements than declared
+    older = await budget_client.post("/api/v1/tasks/", json={"title": "older", "employee_id": str(employee.id)}, headers=as_manager)
+    created = await budget_client.post("/api/v1/tasks/", json={"title": "budget", "employee_id": str(employee.id)}, headers=as_manager)
+    assert created.status_code == 201
+    task_id = created.json()["id"]
+
+    # the worst list path: a cursor page counts its total separately, and the employee's user is not cached yet
+    first_page = await budget_client.get("/api/v1/tasks/", params={"limit": 1}, headers=as_manager)
+    cursor_page = await budget_client.get("/api/v1/tasks/", params={"limit": 1, "cursor": first_page.json()["next_cursor"], **details}, headers=as_employee)
+    assert cursor_page.status_code == 200
+    assert cursor_page.json()["total"] == 2
+    assert [item["id"] for item in cursor_page.json()["items"]] == [older.json()["id"]]
+    for _ in range(3):
+        comment = await budget_client.post("/api/v1/comments/", json={"text": "note", "task_id": task_id}, headers=as_employee)
+        assert comment.status_code == 201
+    comment_id = comment.json()["id"]
+
+    listed = await budget_client.get("/api/v1/tasks/", params=details, headers=as_manager)
+    assert listed.status_code == 200
+    assert listed.json()["total"] == 2
+    assert listed.json()["items"][0]["comment_count"] == 3
+    assert listed.json()["items"][0]["employee"]["email"] == employee.email
+    assert (await budget_client.get(f"/api/v1/tasks/{task_id}", params={"expand": ["comments", "employee", "manager"]}, headers=as_employee)).status_code == 200
+    assert (await budget_client.get(f"/api/v1/tasks/{task_id}", params={"expand": "employee"}, headers=as_reader)).status_code == 403
+    assert (await budget_client.put(f"/api/v1/tasks/{task_id}", json={"progress": 50}, headers=as_employee)).status_code == 200
+    comments = await budget_client.get("/api/v1/comments/", params={"task_id": task_id}, headers=as_employee)
+    assert comments.status_code == 200
+    assert comments.json()["total"] == 3 and len(comments.json()["items"]) == 3
+    first_comments = await budget_client.get("/api/v1/comments/", params={"task_id": task_id, "limit": 2}, headers=as_employee)
+    comments_cursor = {"task_id": task_id, "limit": 2, "cursor": first_comments.json()["next_cursor"]}
+    assert len((await budget_client.get("/api/v1/comments/", params=comments_cursor, headers=as_reader)).json()["items"]) == 1
+    assert (await budget_client.get(f"/api/v1/comments/{comment_id}", headers=as_manager)).status_code == 200
+    assert (await budget_client.put(f"/api/v1/comment/{comment_id}", json={"text": "edited"}, headers=as_employee)).status_code == 200
+    assert (await budget_client.delete(f"/api/v1/comment/{comment_id}", headers=as_employee)).status_code == 204
+    assert (await budget_client.delete(f"/api/v1/tasks/{task_id}", headers=as_manager)).status_code == 204
+    assert (await budget_client.delete(f"/api/v1/tasks/{older.json()['id']}", headers=as_manager)).status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_task_list_items_carry_only_requested_details(ioc_container: AsyncContainer, db_session: AsyncSession, budget_client: AsyncClient, manager_and_employee):
+    manager, employee = await manager_and_employee('envelope')
+    await db_session.commit()
+    as_manager = await bearer(ioc_container, manager)
+    created = await budget_client.post("/api/v1/tasks/", json={"title": "plain", "employee_id": str(employee.id)}, headers=as_manager)
+
+    listed = await budget_client.get("/api/v1/tasks/", headers=as_manager)
+
+    assert listed.json() == {"total": 1, "items": [created.json()], "next_cursor": None}
+
+
+@pytest.mark.asyncio
+async def test_task_list_items_carry_only_the_expanded_user(ioc_container: AsyncContainer, db_session: AsyncSession, budget_client: AsyncClient, manager_and_employee):
+    manager, employee = await manager_and_employee('expand')
+    await db_session.commit()
+    as_manager = await bearer(ioc_container, manager)
+    created = await budget_client.post("/api/v1/tasks/", json={"title": "expanded", "employee_id": str(employee.id)}, headers=as_manager)
+
+    listed = await budget_client.get("/api/v1/tasks/", params={"expand": "employee"}, headers=as_manager)
+
+    [item] = listed.json()["items"]
+    assert item.pop("employee")["email"] == 'expand-employee@example.com'
+    assert item == created.json()
+
+
+@pytest.mark.asyncio
+async def test_create_task_with_null_status_and_progress_uses_defaults(ioc_container: AsyncContainer, db_session: AsyncSession, budget_client: AsyncClient, manager_and_employee):
+    manager, employee = await manager_and_employee('null')
+    await db_session.commit()
+
+    response = await budget_client.post(
+        "/api/v1/tasks/",
+        json={"title": "nulls", "employee_id": str(employee.id), "status": None, "progress": None},
+        headers=await bearer(ioc_container, manager),
+    )
+
+    assert response.status_code == 201
+    assert response.json()["status"] == "pending"
+    assert response.json()["progress"] == 0
+
+
+@pytest.mark.asyncio
+async def test_route_over_its_budget_fails_the_request(ioc_container: AsyncContainer, db_session: AsyncSession, budget_app: FastAPI):
+    @budget_app.get("/api/v1/test/n-plus-one", openapi_extra=query_budget(2))
+    async def n_plus_one():
+        for _ in range(3):
+            await db_session.execute(text("SELECT 1"))
+
+    async with AsyncClient(transport=ASGITransport(app=budget_app), base_url=BASE_URL) as client:
+        with pytest.raises(QueryBudgetExceededError) as exc_info:
+            await client.get("/api/v1/test/n-plus-one")
+
+    assert exc_info.value.count == 3
+    assert "3 x SELECT ?" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_query_budget_fixture_counts_statements(db_session: AsyncSession, query_budget):
+    with query_budget(1) as counter:
+        await db_session.execute(text("SELECT 1"))
+    assert counter.count == 1
+
+    with pytest.raises(AssertionError, match="ran 2 SQL statements"):
+        with query_budget(1):
+            await db_session.execute(text("SELECT 1"))
+            await db_session.execute(text("SELECT 2"))
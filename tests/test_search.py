@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from skill_tracker.db_access.models import Comment, Task, User, UserRoleEnum
+from skill_tracker.db_access.repositories.search_repository import SearchRepository
+from skill_tracker.db_access.session_router import SessionRouter
+from skill_tracker.services.pagination import InvalidCursorError
+from skill_tracker.services.search_service import SearchHitKindEnum, SearchService
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_visible_tasks_and_comments(db_session: AsyncSession, manager_and_employee):
+    manager, employee = await manager_and_employee('search')
+    other_manager = User(email='search-other@example.com', hashed_password='x', given_name='O', family_name='O', role=UserRoleEnum.manager)
+    db_session.add(other_manager)
+    await db_session.flush()
+    titled = Task(title="Kubernetes certification", description="Pass the CKA exam", employee_id=employee.id, manager_id=manager.id)
+    described = Task(title="Cloud skills", description="Start with kubernetes basics, then certifications", employee_id=employee.id, manager_id=manager.id)
+    hidden = Task(title="Kubernetes certification for someone else", employee_id=employee.id, manager_id=other_manager.id)
+    unrelated = Task(title="Learn Go", employee_id=employee.id, manager_id=manager.id)
+    db_session.add_all([titled, described, hidden, unrelated])
+    await db_session.flush()
+    db_session.add(Comment(text="Booked the Kubernetes certification exam for May", task_id=unrelated.id, user_id=employee.id))
+    await db_session.flush()
+    service = SearchService(SearchRepository(SessionRouter(db_session)))
+
+    hits, next_cursor = await service.search(manager, "kubernetes certification")
+    assert next_cursor is None
+    assert [(hit.kind, hit.task_id) for hit in hits] == [
+        (SearchHitKindEnum.task, titled.id),
+        (SearchHitKindEnum.task, described.id),
+        (SearchHitKindEnum.comment, unrelated.id),
+    ]
+    assert hits[0].rank > hits[1].rank > hits[2].rank
+    assert "<b>Kubernetes</b>" in hits[2].headline
+    assert hits[2].title == "Learn Go"
+
+    # the employee sees the other manager's task too, since it is assigned to them
+    paged = []
+    cursor = None
+    while True:
+        page, cursor = await service.search(employee, "kubernetes", limit=1, cursor=cursor)
+        paged += page
+        if cursor is None:
+            break
+    assert len(paged) == 4
+    assert len({hit.id for hit in paged}) == 4
+    assert [hit.rank for hit in paged] == sorted((hit.rank for hit in paged), reverse=True)
+
+    assert await service.search(manager, "the") == ([], None)
+    with pytest.raises(InvalidCursorError):
+        await service.search(manager, "kubernetes", cursor="not-a-cursor")
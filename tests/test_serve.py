@@ -0,0 +1,24 @@
+import os
+
+from skill_tracker.config import ServerConfig
+from skill_tracker.metrics import MULTIPROC_DIR_ENV
+from skill_tracker.serve import prepare_multiprocess_dir, resolve_http, resolve_loop, worker_count
+
+
+def test_worker_count_and_loop_follow_config():
+    assert worker_count(ServerConfig(workers=3)) == 3
+    assert worker_count(ServerConfig(workers=0)) >= 1
+    assert resolve_loop(ServerConfig(loop="asyncio")) == "asyncio"
+    assert resolve_loop(ServerConfig()) in ("uvloop", "asyncio")
+    assert resolve_http(ServerConfig()) in ("httptools", "h11")
+
+
+def test_multiprocess_dir_is_emptied_and_exported(tmp_path, monkeypatch):
+    path = tmp_path / "prometheus"
+    path.mkdir()
+    (path / "counter_1.db").write_bytes(b"stale")
+    monkeypatch.setenv(MULTIPROC_DIR_ENV, str(path))
+
+    assert prepare_multiprocess_dir(ServerConfig(prometheus_multiproc_dir="/unused")) == str(path)
+    assert os.listdir(path) == []
+    assert os.environ[MULTIPROC_DIR_ENV] == str(path)
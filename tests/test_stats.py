@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from skill_tracker.db_access.models import Task, TaskStats, TaskStatusEnum, User, UserRoleEnum
+from skill_tracker.db_access.repositories.stats_repository import StatsRepository
+from skill_tracker.db_access.repositories.task_repository import TaskRepository
+from skill_tracker.db_access.repositories.user_repository import UserRepository
+from skill_tracker.db_access.session_router import SessionRouter
+from skill_tracker.services.read_cache import ReadCache
+from skill_tracker.services.stats_service import OnlyManagerCanGetStatsError, StatsService
+from skill_tracker.services.task_service import TaskCreateDTO, TaskService, TaskUpdateDTO
+
+
+@pytest.mark.asyncio
+async def test_team_stats(db_session: AsyncSession, query_budget):
+    manager = User(email='team-manager@example.com', hashed_password='x', given_name='M', family_name='M', role=UserRoleEnum.manager)
+    other_manager = User(email='team-other@example.com', hashed_password='x', given_name='O', family_name='O', role=UserRoleEnum.manager)
+    anna = User(email='team-anna@example.com', hashed_password='x', given_name='Anna', family_name='Alpha', role=UserRoleEnum.employee)
+    boris = User(email='team-boris@example.com', hashed_password='x', given_name='Boris', family_name='Beta', role=UserRoleEnum.employee)
+    db_session.add_all([manager, other_manager, anna, boris])
+    await db_session.flush()
+    now = datetime.now(timezone.utc)
+    db_session.add_all([
+        Task(title="late", employee_id=anna.id, manager_id=manager.id, status=TaskStatusEnum.inprogress, progress=40, deadline=now - timedelta(days=1), created_at=now - timedelta(days=10)),
+        Task(title="late but done", employee_id=anna.id, manager_id=manager.id, status=TaskStatusEnum.done, progress=100, deadline=now - timedelta(days=1), created_at=now - timedelta(days=2)),
+        Task(title="new", employee_id=anna.id, manager_id=manager.id, progress=0, created_at=now),
+        Task(title="boris", employee_id=boris.id, manager_id=manager.id, progress=50, deadline=now + timedelta(days=1), created_at=now),
+        Task(title="elsewhere", employee_id=boris.id, manager_id=other_manager.id, created_at=now),
+    ])
+    await db_session.flush()
+    cache = ReadCache(ttl_seconds=60, max_size=100)
+    service = StatsService(StatsRepository(SessionRouter(db_session)), cache)
+
+    stats = await service.get_team_stats(manager)
+    assert [(s.given_name, s.total, s.pending, s.inprogress, s.done, s.average_progress, s.overdue) for s in stats] == [
+        ("Anna", 3, 1, 1, 1, pytest.approx(140 / 3), 1),
+        ("Boris", 1, 1, 0, 0, 50.0, 0),
+    ]
+
+    windowed = await service.get_team_stats(manager, created_from=now - timedelta(days=3), created_to=now - timedelta(hours=1))
+    assert [(s.given_name, s.total, s.done) for s in windowed] == [("Anna", 1, 1)]
+
+    with query_budget(0):
+        assert await service.get_team_stats(manager) == stats
+
+    tasks = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)), cache)
+    _, page, _ = await tasks.get_tasks(boris)
+    boris_task, = [task for task in page if task.title == "boris"]
+    await tasks.update_task(manager, boris_task.id, TaskUpdateDTO(status=TaskStatusEnum.done))
+    assert [(s.given_name, s.done) for s in await service.get_team_stats(manager)] == [("Anna", 1), ("Boris", 1)]
+
+    with pytest.raises(OnlyManagerCanGetStatsError):
+        await service.get_team_stats(anna)
+
+
+@pytest.mark.asyncio
+async def test_task_stats_rollup_follows_task_writes(db_session: AsyncSession, manager_and_employee):
+    manager, employee = await manager_and_employee('rollup')
+    repository = StatsRepository(SessionRouter(db_session))
+    service = StatsService(repository)
+    tasks = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)))
+
+    async def rollup() -> dict:
+        result = await db_session.execute(
+            select(TaskStats.status, TaskStats.task_count, TaskStats.progress_sum)
+            .filter(TaskStats.manager_id == manager.id, TaskStats.task_count != 0)
+        )
+        return {status: (count, progress_sum) for status, count, progress_sum in result.all()}
+
+    await tasks.create_tasks(manager, [
+        TaskCreateDTO(title=f"t{i}", description=None, employee_id=employee.id, manager_id=manager.id, deadline=None, status=None, progress=10 * i)
+        for i in range(3)
+    ])
+    assert await rollup() == {TaskStatusEnum.pending: (3, 30)}
+
+    _, page, _ = await tasks.get_tasks(manager)
+    first, second, _ = sorted(page, key=lambda task: task.title)
+    await tasks.update_task(manager, first.id, TaskUpdateDTO(status=TaskStatusEnum.done, progress=100))
+    await tasks.delete_task(manager, second.id)
+    assert await rollup() == {TaskStatusEnum.pending: (1, 20), TaskStatusEnum.done: (1, 100)}
+
+    stats, = await service.get_team_stats(manager)
+    assert (stats.total, stats.pending, stats.done, stats.average_progress) == (2, 1, 1, 60.0)
+    assert await service.reconcile_task_stats() == []
+
+    await db_session.execute(
+        update(TaskStats)
+        .filter(TaskStats.manager_id == manager.id, TaskStats.status == TaskStatusEnum.done)
+        .values(task_count=TaskStats.task_count + 5)
+    )
+    drift, = await service.reconcile_task_stats(fix=True)
+    assert (drift.manager_id, drift.status, drift.expected_count, drift.actual_count) == (manager.id, TaskStatusEnum.done, 1, 6)
+    assert await service.reconcile_task_stats() == []
+    assert await rollup() == {TaskStatusEnum.pending: (1, 20), TaskStatusEnum.done: (1, 100)}
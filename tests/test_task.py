@@ -1,11 +1,37 @@
-from datetime import datetime, timedelta
+import asyncio
+import json
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
 
 import pytest
+from dishka import AsyncContainer
 from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from skill_tracker.controllers.task import TaskCreate
-from skill_tracker.db_access.models import Task, TaskStatusEnum
+from skill_tracker.db_access.models import Comment, Task, TaskStatusEnum, User, UserRoleEnum
+from skill_tracker.db_access.repositories.task_repository import TaskRepository
+from skill_tracker.db_access.repositories.user_repository import UserRepository
+from skill_tracker.db_access.session_router import SessionRouter
+from skill_tracker.services.export import ExportFormatEnum, encode_export
+from skill_tracker.services.pagination import InvalidCursorError, TotalModeEnum
+from skill_tracker.services.read_cache import ReadCache, etag_matches
+from skill_tracker.services.task_service import (
+    TASK_EXPORT_COLUMNS,
+    InvalidTaskFilterError,
+    OnlyManagerCanCreateTaskError,
+    SortOrderEnum,
+    TaskCreateDTO,
+    TaskExpandEnum,
+    TaskFilterDTO,
+    TaskIncludeEnum,
+    TaskService,
+    TaskSortEnum,
+    TaskUpdateDTO,
+)
+from skill_tracker.services.user_service import UserManager
 
 
 @pytest.mark.asyncio
@@ -91,3 +117,399 @@ async def test_get_task(test_client: AsyncClient, db_session: AsyncSession, empl
 
     response = await test_client.get(f'/api/v1/tasks/{existing_task.id}')
     assert response.status_code != 200
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_cursor_pagination(db_session: AsyncSession, manager_and_employee):
+    manager, employee = await manager_and_employee('cursor')
+    created_at = datetime.now(timezone.utc)
+    db_session.add_all([
+        Task(title=f"t{i}", employee_id=employee.id, manager_id=manager.id, created_at=created_at - timedelta(minutes=i % 3))
+        for i in range(7)
+    ])
+    await db_session.flush()
+
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)))
+    _, offset_page, _ = await service.get_tasks(manager, skip=0, limit=7)
+
+    seen, cursor = [], None
+    while True:
+        total, page, cursor = await service.get_tasks(manager, limit=3, cursor=cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    assert total == 7
+    assert [task.id for task in seen] == [task.id for task in offset_page]
+
+    with pytest.raises(InvalidCursorError):
+        await service.get_tasks(manager, cursor='not a cursor')
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_total_modes(db_session: AsyncSession, manager_and_employee):
+    manager, employee = await manager_and_employee('total')
+    db_session.add_all([Task(title=f"t{i}", employee_id=employee.id, manager_id=manager.id) for i in range(4)])
+    await db_session.flush()
+
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)))
+
+    total, page, _ = await service.get_tasks(manager, limit=2, total_mode=TotalModeEnum.exact)
+    assert total == 4 and len(page) == 2
+    total, page, _ = await service.get_tasks(manager, skip=10, limit=2, total_mode=TotalModeEnum.exact)
+    assert total == 4 and page == []
+    total, _, _ = await service.get_tasks(manager, limit=2, total_mode=TotalModeEnum.none)
+    assert total is None
+    total, _, _ = await service.get_tasks(manager, limit=2, total_mode=TotalModeEnum.estimate)
+    assert isinstance(total, int)
+
+
+@pytest.mark.asyncio
+async def test_task_list_queries_use_indexes(db_session: AsyncSession):
+    # empty tables: take full scans off the table so the planner reveals whether the index fits
+    for setting in ('enable_seqscan', 'enable_bitmapscan', 'enable_sort'):
+        await db_session.execute(text(f'SET LOCAL {setting} = off'))
+    for column, index in (('manager_id', 'ix_tasks_manager_id_created_at_id'), ('employee_id', 'ix_tasks_employee_id_created_at_id')):
+        result = await db_session.execute(
+            text(f'EXPLAIN SELECT * FROM tasks WHERE {column} = :owner ORDER BY created_at DESC, id DESC LIMIT 11'),
+            {'owner': uuid.uuid4()},
+        )
+        plan = '\n'.join(result.scalars().all())
+        assert f'Index Scan using {index}' in plan
+        assert 'Sort' not in plan
+
+
+@pytest.mark.asyncio
+async def test_reads_use_replica_until_request_writes(ioc_container: AsyncContainer, db_session: AsyncSession, manager_and_employee):
+    manager, employee = await manager_and_employee('replica')
+    task = Task(title="replica", employee_id=employee.id, manager_id=manager.id)
+    db_session.add(task)
+    await db_session.flush()
+
+    sessionmaker = await ioc_container.get(async_sessionmaker)
+    async with sessionmaker() as replica_session:
+        sessions = SessionRouter(db_session, replica_session)
+        repository = TaskRepository(sessions)
+
+        # the replica runs on its own connection, so it cannot see the uncommitted row
+        assert sessions.reader is replica_session
+        assert await repository.get(task.id) is None
+
+        assert sessions.writer is db_session
+        assert sessions.reader is db_session
+        assert (await repository.get(task.id)).id == task.id
+
+
+@pytest.mark.asyncio
+async def test_create_tasks_in_bulk(db_session: AsyncSession):
+    manager = User(email='bulk-manager@example.com', hashed_password='x', given_name='M', family_name='M', role=UserRoleEnum.manager)
+    employees = [
+        User(email=f'bulk-employee{i}@example.com', hashed_password='x', given_name='E', family_name='E', role=UserRoleEnum.employee)
+        for i in range(2)
+    ]
+    db_session.add_all([manager, *employees])
+    await db_session.flush()
+
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)))
+    assignees = [employees[0].id, uuid.uuid4(), employees[1].id, manager.id]
+    results = await service.create_tasks(manager, [
+        TaskCreateDTO(title="bulk", description=None, employee_id=employee_id, manager_id=manager.id, deadline=None, status=TaskStatusEnum.pending, progress=0)
+        for employee_id in assignees
+    ])
+
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert [result.task.employee_id if result.task else None for result in results] == [employees[0].id, None, employees[1].id, None]
+    assert [result.error for result in results] == [None, "Employee not found", None, "Manager cant attach manager to task"]
+
+    with pytest.raises(OnlyManagerCanCreateTaskError):
+        await service.create_tasks(employees[0], [])
+
+
+@pytest.mark.asyncio
+async def test_task_writes_use_returning(db_session: AsyncSession, manager_and_employee, query_budget):
+    manager, employee = await manager_and_employee('returning')
+    await db_session.commit()
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)))
+
+    with query_budget(2):  # employee lookup + INSERT ... RETURNING
+        task = await service.create_task(manager, TaskCreateDTO(title="returning", description=None, employee_id=employee.id, manager_id=manager.id, deadline=None, status=TaskStatusEnum.pending, progress=0))
+
+    with query_budget(1):  # UPDATE ... RETURNING with the ownership check in its WHERE clause
+        updated = await service.update_task(employee, task.id, TaskUpdateDTO(progress=40))
+    assert updated.progress == 40
+
+    with query_budget(1):  # DELETE ... RETURNING with the ownership check in its WHERE clause
+        assert await service.delete_task(manager, task.id)
+
+
+@pytest.mark.asyncio
+async def test_task_writes_tell_missing_from_forbidden(db_session: AsyncSession, manager_and_employee):
+    manager, employee = await manager_and_employee('owner')
+    other_manager = User(email='owner-other@example.com', hashed_password='x', given_name='O', family_name='O', role=UserRoleEnum.manager)
+    db_session.add(other_manager)
+    await db_session.flush()
+    task = Task(title="owned", employee_id=employee.id, manager_id=manager.id)
+    db_session.add(task)
+    await db_session.flush()
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)))
+
+    with pytest.raises(ValueError):
+        await service.update_task(manager, uuid.uuid4(), TaskUpdateDTO(title="missing"))
+    with pytest.raises(PermissionError):
+        await service.update_task(other_manager, task.id, TaskUpdateDTO(title="stolen"))
+    with pytest.raises(PermissionError):
+        await service.update_task(other_manager, task.id, TaskUpdateDTO())
+    assert (await service.update_task(manager, task.id, TaskUpdateDTO())).title == "owned"
+    assert (await service.update_task(manager, task.id, TaskUpdateDTO(title="renamed"))).title == "renamed"
+
+    with pytest.raises(ValueError):
+        await service.delete_task(manager, uuid.uuid4())
+    with pytest.raises(PermissionError):
+        await service.delete_task(other_manager, task.id)
+    assert await service.delete_task(manager, task.id)
+
+
+@pytest.mark.asyncio
+async def test_get_task_is_cached_until_written(db_session: AsyncSession, manager_and_employee, query_budget):
+    manager, employee = await manager_and_employee('cache')
+    task = Task(title="cached", employee_id=employee.id, manager_id=manager.id)
+    db_session.add(task)
+    await db_session.flush()
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)), ReadCache(ttl_seconds=60, max_size=100))
+
+    assert service.task_etag(manager, task.id) is None
+    assert (await service.get_task(manager, task.id)).title == "cached"
+    etag = service.task_etag(manager, task.id)
+    assert etag_matches(etag, etag)
+
+    with query_budget(0):
+        assert (await service.get_task(manager, task.id)).title == "cached"
+        assert service.task_etag(manager, task.id) == etag
+
+    await service.update_task(manager, task.id, TaskUpdateDTO(title="renamed"))
+    assert service.task_etag(manager, task.id) is None
+    assert (await service.get_task(manager, task.id)).title == "renamed"
+    assert service.task_etag(manager, task.id) not in (None, etag)
+
+
+@pytest.mark.asyncio
+async def test_expanded_task_is_scoped_to_its_people_and_follows_user_writes(db_session: AsyncSession, manager_and_employee, query_budget):
+    manager, employee = await manager_and_employee('scoped')
+    other_manager, outsider = await manager_and_employee('scoped-other')
+    task = Task(title="scoped", employee_id=employee.id, manager_id=manager.id)
+    db_session.add(task)
+    await db_session.flush()
+    cache = ReadCache(ttl_seconds=60, max_size=100)
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)), cache)
+    expand = [TaskExpandEnum.employee, TaskExpandEnum.manager]
+
+    assert (await service.get_task(outsider, task.id)).title == "scoped"
+    assert (await service.get_task(employee, task.id, expand)).manager.email == manager.email
+    etag = service.task_etag(employee, task.id, expand)
+    assert etag is not None
+    for caller in (outsider, other_manager):
+        assert service.task_etag(caller, task.id, expand) is None
+        with pytest.raises(PermissionError):
+            await service.get_task(caller, task.id, expand)
+
+    with query_budget(0):
+        assert (await service.get_task(manager, task.id, expand)).employee.given_name == "E"
+
+    employee.given_name = "Renamed"
+    await db_session.flush()
+    await UserManager(None, 'SECRET', read_cache=cache).on_after_update(employee, {'given_name': "Renamed"})
+    assert service.task_etag(manager, task.id, expand) is None
+    assert service.task_etag(manager, task.id) is not None
+    assert (await service.get_task(manager, task.id, expand)).employee.given_name == "Renamed"
+    assert service.task_etag(manager, task.id, expand) not in (None, etag)
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_read_is_not_cached_under_the_new_generation(engine: AsyncEngine, manager_and_employee):
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    cache = ReadCache(ttl_seconds=60, max_size=100, settle_seconds=0.2)
+
+    def request_service(primary: AsyncSession, replica: AsyncSession) -> TaskService:
+        router = SessionRouter(primary, replica)
+        return TaskService(TaskRepository(router), UserRepository(router), cache)
+
+    async with sessionmaker() as primary, sessionmaker() as replica:
+        manager, employee = await manager_and_employee('replica', primary)
+        task = Task(title="before", employee_id=employee.id, manager_id=manager.id)
+        primary.add(task)
+        await primary.commit()
+        try:
+            # a snapshot taken now plays a replica that has not replayed the update yet
+            await replica.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+            assert (await request_service(primary, replica).get_task(manager, task.id)).title == "before"
+
+            await request_service(primary, replica).update_task(manager, task.id, TaskUpdateDTO(title="after"))
+            assert (await request_service(primary, replica).get_task(manager, task.id)).title == "before"
+            assert request_service(primary, replica).task_etag(manager, task.id) is None
+
+            await replica.rollback()
+            assert (await request_service(primary, replica).get_task(manager, task.id)).title == "after"
+
+            await asyncio.sleep(0.2)
+            assert (await request_service(primary, replica).get_task(manager, task.id)).title == "after"
+            assert request_service(primary, replica).task_etag(manager, task.id) is not None
+        finally:
+            await primary.execute(text("DELETE FROM tasks WHERE id = :id"), {"id": task.id})
+            await primary.execute(text("DELETE FROM users WHERE id IN (:m, :e)"), {"m": manager.id, "e": employee.id})
+            await primary.commit()
+
+
+def test_read_cache_expires_and_evicts():
+    cache = ReadCache(ttl_seconds=60, max_size=2)
+    etags = [cache.set(key, key) for key in ("a", "b", "c")]
+    assert len(set(etags)) == 3
+    assert cache.get("a") is None
+    assert cache.get("c") == (etags[2], "c")
+    assert not etag_matches(f'{etags[1]}, W/"other"', etags[2])
+    assert etag_matches(f'{etags[1]}, {etags[2]}', etags[2])
+
+    expired = ReadCache(ttl_seconds=0, max_size=2)
+    assert expired.set("a", "a") is None
+    assert expired.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_export_tasks_streams_in_constant_memory(db_session: AsyncSession, manager_and_employee):
+    manager, employee = await manager_and_employee('export')
+    await db_session.execute(
+        text(
+            "insert into tasks (id, employee_id, manager_id, title, description, status, progress, created_at) "
+            "select gen_random_uuid(), :employee_id, :manager_id, 'task ' || n, repeat('x', 200), 'pending', n % 101, now() - n * interval '1 second' "
+            "from generate_series(1, 100000) as n"
+        ),
+        {"employee_id": employee.id, "manager_id": manager.id},
+    )
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)))
+
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    lines = 0
+    first = None
+    async for chunk in encode_export(service.export_tasks(manager), TASK_EXPORT_COLUMNS, ExportFormatEnum.ndjson):
+        lines += chunk.count(b"\n")
+        first = first or chunk.split(b"\n", 1)[0]
+    _, peak = tracemalloc.get_traced_memory()
+
+    assert lines == 100000
+    assert json.loads(first)["title"] == "task 1"
+    # the export is ~50 MB of NDJSON; holding it or its rows in memory would blow well past this
+    assert peak - baseline < 8 * 1024 * 1024
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_includes_comment_stats_in_one_query(db_session: AsyncSession, manager_and_employee, query_budget):
+    manager, employee = await manager_and_employee('stats')
+    created_at = datetime.now(timezone.utc)
+    busy = Task(title="busy", employee_id=employee.id, manager_id=manager.id, created_at=created_at)
+    quiet = Task(title="quiet", employee_id=employee.id, manager_id=manager.id, created_at=created_at - timedelta(minutes=1))
+    db_session.add_all([busy, quiet])
+    await db_session.flush()
+    db_session.add_all([
+        Comment(text=f"c{i}", task_id=busy.id, user_id=employee.id, created_at=created_at + timedelta(minutes=i))
+        for i in range(3)
+    ])
+    await db_session.flush()
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)))
+
+    _, page, _ = await service.get_tasks(manager)
+    assert not hasattr(page[0], 'comment_count')
+
+    with query_budget(2):  # the page with its windowed total + one grouped comment query
+        total, page, _ = await service.get_tasks(manager, include=[TaskIncludeEnum.comment_stats])
+    assert total == 2
+    assert [(task.title, task.comment_count, task.last_comment_at) for task in page] == [
+        ("busy", 3, created_at + timedelta(minutes=2)),
+        ("quiet", 0, None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_expands_users_and_latest_comments(db_session: AsyncSession, manager_and_employee, query_budget):
+    manager, employee = await manager_and_employee('expand')
+    created_at = datetime.now(timezone.utc)
+    tasks = [Task(title=f"t{i}", employee_id=employee.id, manager_id=manager.id, created_at=created_at - timedelta(minutes=i)) for i in range(5)]
+    db_session.add_all(tasks)
+    await db_session.flush()
+    db_session.add_all([
+        Comment(text=f"{task.title}-c{i}", task_id=task.id, user_id=employee.id, created_at=created_at + timedelta(minutes=i))
+        for task in tasks[:4] for i in range(3)
+    ])
+    await db_session.flush()
+    db_session.expunge_all()
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)))
+
+    expand = [TaskExpandEnum.employee, TaskExpandEnum.manager, TaskExpandEnum.comments]
+    with query_budget(2):  # page with users joined in + one lateral query for every task's comments
+        total, page, _ = await service.get_tasks(manager, expand=expand, comments_limit=2)
+
+    with query_budget(2):
+        task = await service.get_task(manager, tasks[0].id, expand=[TaskExpandEnum.comments], comments_limit=1)
+
+    assert total == 5
+    assert [task.employee.email for task in page] == [employee.email] * 5
+    assert [task.manager.id for task in page] == [manager.id] * 5
+    assert [[comment.text for comment in task.comments] for task in page] == [
+        ["t0-c2", "t0-c1"], ["t1-c2", "t1-c1"], ["t2-c2", "t2-c1"], ["t3-c2", "t3-c1"], [],
+    ]
+    assert page[0].comment_count is None
+    assert task.employee is None
+    assert [comment.text for comment in task.comments] == ["t0-c2"]
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_filters_and_sorts_in_keyset_pages(db_session: AsyncSession):
+    manager = User(email='sort-manager@example.com', hashed_password='x', given_name='M', family_name='M', role=UserRoleEnum.manager)
+    anna = User(email='sort-anna@example.com', hashed_password='x', given_name='A', family_name='A', role=UserRoleEnum.employee)
+    boris = User(email='sort-boris@example.com', hashed_password='x', given_name='B', family_name='B', role=UserRoleEnum.employee)
+    db_session.add_all([manager, anna, boris])
+    await db_session.flush()
+    now = datetime.now(timezone.utc)
+    db_session.add_all([
+        Task(title="soon", employee_id=anna.id, manager_id=manager.id, deadline=now + timedelta(days=1), progress=10),
+        Task(title="later", employee_id=anna.id, manager_id=manager.id, deadline=now + timedelta(days=5), progress=90, status=TaskStatusEnum.inprogress),
+        Task(title="later too", employee_id=boris.id, manager_id=manager.id, deadline=now + timedelta(days=5), progress=50, status=TaskStatusEnum.inprogress),
+        Task(title="open-ended", employee_id=anna.id, manager_id=manager.id, progress=30),
+        Task(title="open-ended too", employee_id=boris.id, manager_id=manager.id, progress=100, status=TaskStatusEnum.done),
+    ])
+    await db_session.flush()
+    service = TaskService(TaskRepository(SessionRouter(db_session)), UserRepository(SessionRouter(db_session)))
+
+    async def titles(caller, **kwargs) -> list[str]:
+        seen, cursor = [], None
+        while True:
+            _, page, cursor = await service.get_tasks(caller, limit=2, cursor=cursor, total_mode=TotalModeEnum.none, **kwargs)
+            seen += [task.title for task in page]
+            if cursor is None:
+                return seen
+
+    by_deadline = await titles(manager, sort=TaskSortEnum.deadline, order=SortOrderEnum.asc)
+    assert by_deadline[0] == "soon"
+    assert set(by_deadline[1:3]) == {"later", "later too"}
+    assert set(by_deadline[3:]) == {"open-ended", "open-ended too"}
+    assert await titles(manager, sort=TaskSortEnum.deadline) == by_deadline[::-1]
+
+    assert await titles(manager, sort=TaskSortEnum.progress, order=SortOrderEnum.asc) == ["soon", "open-ended", "later too", "later", "open-ended too"]
+    assert await titles(
+        manager,
+        filters=TaskFilterDTO(status=[TaskStatusEnum.pending, TaskStatusEnum.inprogress], progress_min=20, progress_max=90),
+        sort=TaskSortEnum.progress,
+    ) == ["later", "later too", "open-ended"]
+    assert await titles(manager, filters=TaskFilterDTO(deadline_from=now + timedelta(days=2), employee_id=boris.id)) == ["later too"]
+    assert await titles(anna, filters=TaskFilterDTO(deadline_to=now + timedelta(days=2))) == ["soon"]
+
+    total, _, _ = await service.get_tasks(manager, filters=TaskFilterDTO(status=[TaskStatusEnum.inprogress]))
+    assert total == 2
+
+    with pytest.raises(InvalidTaskFilterError):
+        await service.get_tasks(anna, filters=TaskFilterDTO(employee_id=boris.id))
+    with pytest.raises(InvalidTaskFilterError):
+        await service.get_tasks(manager, filters=TaskFilterDTO(progress_min=50, progress_max=10))
+    for sort, order in [(TaskSortEnum.deadline, SortOrderEnum.asc), (TaskSortEnum.deadline, SortOrderEnum.desc)]:
+        _, _, cursor = await service.get_tasks(manager, limit=1, sort=sort, order=order)
+        with pytest.raises(InvalidCursorError):
+            await service.get_tasks(manager, cursor=cursor, sort=TaskSortEnum.progress)
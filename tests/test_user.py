@@ -0,0 +1,73 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users.db import SQLAlchemyUserDatabase
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from skill_tracker.db_access.models import User, UserRoleEnum
+from skill_tracker.services.user_cache import InMemoryUserCache
+from skill_tracker.services.user_service import UserCreate, UserManager, UserUpdate
+
+
+@pytest.mark.asyncio
+async def test_user_manager_serves_cached_user_until_invalidated(db_session: AsyncSession):
+    user = User(email='cached@example.com', hashed_password='x', given_name='Cached', family_name='User', role=UserRoleEnum.employee)
+    db_session.add(user)
+    await db_session.flush()
+
+    manager = UserManager(SQLAlchemyUserDatabase(db_session, User), 'SECRET', InMemoryUserCache(ttl_seconds=60, max_size=10))
+    assert (await manager.get(user.id)).is_active
+
+    await db_session.execute(update(User).where(User.id == user.id).values(is_active=False))
+    db_session.expunge_all()
+
+    cached = await manager.get(user.id)
+    assert cached.is_active
+    assert cached in db_session
+
+    await manager.on_after_update(cached, {'is_active': False})
+    db_session.expunge_all()
+    assert not (await manager.get(user.id)).is_active
+
+
+@pytest.mark.asyncio
+async def test_password_paths_read_the_hash_past_the_user_cache(db_session: AsyncSession):
+    cache = InMemoryUserCache(ttl_seconds=60, max_size=10)
+    manager = UserManager(SQLAlchemyUserDatabase(db_session, User), 'SECRET', cache)
+    user = await manager.create(UserCreate(email='hash@example.com', password='first-password', given_name='Hash', family_name='User', role=UserRoleEnum.employee))
+    await manager.get(user.id)
+    assert 'hashed_password' not in await cache.get(user.id)
+
+    db_session.expunge_all()
+    cached = await manager.get(user.id)
+    await manager.update(UserUpdate(password='second-password', given_name='Hash', family_name='User', role=UserRoleEnum.employee), cached, safe=True)
+    assert await manager.authenticate(OAuth2PasswordRequestForm(username='hash@example.com', password='second-password'))
+
+    db_session.expunge_all()
+    await manager.get(user.id)
+    tokens = []
+    manager.on_after_forgot_password = lambda user, token, request=None: asyncio.sleep(0, tokens.append(token))
+    await manager.forgot_password(await manager.get_by_email('hash@example.com'))
+    db_session.expunge_all()
+    await manager.get(user.id)
+    await manager.reset_password(tokens[0], 'third-password')
+    assert await manager.authenticate(OAuth2PasswordRequestForm(username='hash@example.com', password='third-password'))
+
+
+@pytest.mark.asyncio
+async def test_in_memory_user_cache_expires_and_evicts():
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    cache = InMemoryUserCache(ttl_seconds=0.05, max_size=2)
+    await cache.set(first, {'id': first})
+    await cache.set(second, {'id': second})
+    await cache.get(first)
+    await cache.set(third, {'id': third})
+
+    assert await cache.get(second) is None
+    assert await cache.get(first) == {'id': first}
+
+    await asyncio.sleep(0.06)
+    assert await cache.get(first) is None